@@ -0,0 +1,156 @@
+#  Gispo Ltd., hereby disclaims all copyright interest in the program
+#  SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+"""
+Exports the snapshots saved in a QGIS project without the GUI.
+
+Run from the QGIS plugin directory, for example:
+
+    python -m SpatialDataPackageExport.cli project.qgz output/ --jobs 8
+
+The timings of the export are written as JSON to the standard output or to the
+file given with --timings.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from qgis.core import QgsApplication, QgsProject
+
+from .core.datapackage import DataPackageHandler
+from .core.processing.snapshot_export import SnapshotExporter, select_configs
+from .core.processing.task_runner import create_resource_cache
+from .definitions.configurable_settings import ResourceFormatOptions
+from .qgis_plugin_tools.tools.resources import plugin_name
+
+LOGGER = logging.getLogger(plugin_name())
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog=f"python -m {plugin_name()}.cli",
+        description="Export snapshots saved in a QGIS project to spatial data "
+        "packages",
+    )
+    parser.add_argument("project", type=Path, help="QGIS project file (.qgz, .qgs)")
+    parser.add_argument("output", type=Path, help="Directory of the snapshots")
+    parser.add_argument(
+        "-s",
+        "--snapshot",
+        action="append",
+        default=[],
+        help="Name of a snapshot to export, can be repeated. Defaults to all "
+        "snapshots of the project.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes exporting the layers",
+    )
+    parser.add_argument(
+        "--timings", type=Path, help="File to write the JSON timings to"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Export all layers instead of reusing unchanged layers from the cache",
+    )
+    parser.add_argument(
+        "--resource-format",
+        choices=[option.value for option in ResourceFormatOptions],
+        help="Write the layers inline or as files next to the snapshots. Defaults "
+        "to the resource_format setting.",
+    )
+    parser.add_argument(
+        "-l", "--list", action="store_true", help="List the snapshots and exit"
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    :return: 0 if all snapshots were exported, 1 if some failed and 2 on invalid
+        arguments
+    """
+    args = parse_args(argv)
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    LOGGER.addHandler(handler)
+    LOGGER.setLevel(logging.DEBUG if args.verbose else logging.INFO)
+
+    app = QgsApplication([], False)
+    app.initQgis()
+    project = QgsProject.instance()
+    try:
+        if not project.read(str(args.project)):
+            LOGGER.error(f"Could not read project {args.project}")
+            return 2
+
+        available = DataPackageHandler.get_available_settings_from_project()
+        if args.list:
+            print("\n".join(available))
+            return 0
+        configs, missing = select_configs(available, args.snapshot)
+        if missing:
+            LOGGER.error(f"Snapshots not found in the project: {', '.join(missing)}")
+            return 2
+
+        args.output.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+        exporter = SnapshotExporter(
+            project,
+            args.output,
+            processes=args.jobs,
+            cache=None if args.no_cache else create_resource_cache(),
+            resource_format=args.resource_format,
+        )
+        results = exporter.export(configs)
+        timings = {
+            "project": str(args.project),
+            "jobs": args.jobs,
+            "seconds": round(time.perf_counter() - start, 3),
+            "snapshots": [result.to_dict() for result in results],
+        }
+        if args.timings is not None:
+            with open(args.timings, "w", encoding="utf-8") as f:
+                json.dump(timings, f, indent=2)
+        else:
+            json.dump(timings, sys.stdout, indent=2)
+            sys.stdout.write("\n")
+
+        failed = [result.name for result in results if not result.successful]
+        if failed:
+            LOGGER.error(f"Failed snapshots: {', '.join(failed)}")
+            return 1
+        return 0
+    finally:
+        project.clear()
+        app.exitQgis()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+#  Gispo Ltd., hereby disclaims all copyright interest in the program
+#  SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+import logging
+import os
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from qgis.core import (
+    QgsCoordinateTransformContext,
+    QgsFeedback,
+    QgsRectangle,
+    QgsVectorLayer,
+)
+
+from ..qgis_plugin_tools.tools.resources import plugin_name
+from .geojson_writer import (
+    GeoJsonFeatureRecorder,
+    GeoJsonWriter,
+    write_feature_collection,
+)
+from .layer_snapshot import LayerSnapshot
+from .styles2attributes import StylesToAttributes
+from .utils import file_versions
+
+LOGGER = logging.getLogger(plugin_name())
+
+
+def data_version(layer: QgsVectorLayer) -> Any:
+    """
+    Version of the saved data of the layer, changing when the data source is
+    modified. Edits in the edit buffer do not change it.
+    """
+    path = layer.source().split("|")[0]
+    if os.path.isfile(path):
+        return file_versions(path)
+    # Without a file, the feature count of the provider is an approximation
+    return layer.dataProvider().featureCount()
+
+
+class FeatureCache:
+    """Serialized GeoJSON Features of an exported layer by feature id"""
+
+    def __init__(self, key: str, name: str, data_version: Any = None) -> None:
+        """
+        :param key: Fingerprint of the layer style, extent and export options
+        :param name: Name of the FeatureCollection
+        :param data_version: Version of the saved data the features were exported
+            from, see data_version()
+        """
+        self.key = key
+        self.name = name
+        self.data_version = data_version
+        self.features: Dict[int, str] = {}
+        self.legend: List[Dict[str, Any]] = []
+        self.style_type = ""
+
+    def copy(self) -> "FeatureCache":
+        cache = FeatureCache(self.key, self.name, self.data_version)
+        cache.features = dict(self.features)
+        cache.legend = list(self.legend)
+        cache.style_type = self.style_type
+        return cache
+
+    def patch(self, fids: Iterable[int], features: Dict[int, str]) -> None:
+        """
+        Replaces the features with the given ids. Features missing from features
+        were deleted or are outside of the extent and are removed.
+        """
+        for fid in fids:
+            if fid in features:
+                self.features[fid] = features[fid]
+            else:
+                self.features.pop(fid, None)
+
+    def write(self, output_file: Path) -> int:
+        return write_feature_collection(output_file, self.name, self.features.values())
+
+
+class ChangeTracker:
+    """
+    Tracks the features edited in exported layers through the signals of the
+    layers, so that only the changed features need to be styled on the next
+    export. Must be used on the main thread.
+    """
+
+    def __init__(self) -> None:
+        self.caches: Dict[str, FeatureCache] = {}
+        self.changes: Dict[str, Set[int]] = {}
+        self._connections: Dict[str, List[Tuple[Any, Callable]]] = {}
+
+    def get_cache(self, layer: QgsVectorLayer, key: str) -> Optional[FeatureCache]:
+        """
+        :return: Copy of the cache of the layer if it was exported with the same
+            fingerprint and the saved data has not been changed outside of the
+            layer since
+        """
+        cache = self.caches.get(layer.id())
+        if cache is None or cache.key != key:
+            return None
+        if cache.data_version != data_version(layer):
+            LOGGER.debug(f"Data of {layer.name()} changed on disk, exporting fully")
+            self.invalidate(layer.id())
+            return None
+        return cache.copy()
+
+    def take_changes(self, layer: QgsVectorLayer) -> Set[int]:
+        """
+        Ids of the features changed since the last export. Features added in the
+        edit buffer are always included, since their ids change on commit.
+        """
+        changes = self.changes.get(layer.id(), set())
+        self.changes[layer.id()] = set()
+        cache = self.caches.get(layer.id())
+        uncommitted = {fid for fid in cache.features if fid < 0} if cache else set()
+        return changes | uncommitted
+
+    def store(self, layer: QgsVectorLayer, cache: FeatureCache) -> None:
+        """Stores the cache of the exported layer and starts tracking it"""
+        self.caches[layer.id()] = cache
+        self.changes.setdefault(layer.id(), set())
+        self.track(layer)
+
+    def track(self, layer: QgsVectorLayer) -> None:
+        if layer.id() in self._connections:
+            return
+        changed = partial(self._changed, layer.id())
+        connections = [
+            (layer.featureAdded, changed),
+            (layer.featureDeleted, changed),
+            (layer.geometryChanged, changed),
+            (layer.attributeValueChanged, changed),
+            (layer.committedFeaturesAdded, partial(self._committed, layer.id())),
+            (layer.afterCommitChanges, partial(self._saved, layer)),
+            (layer.dataSourceChanged, partial(self.invalidate, layer.id())),
+            (layer.willBeDeleted, partial(self.invalidate, layer.id())),
+        ]
+        for signal, slot in connections:
+            signal.connect(slot)
+        self._connections[layer.id()] = connections
+
+    def invalidate(self, layer_id: str) -> None:
+        """Forgets the layer, so that it is exported fully the next time"""
+        self.caches.pop(layer_id, None)
+        self.changes.pop(layer_id, None)
+        for signal, slot in self._connections.pop(layer_id, []):
+            try:
+                signal.disconnect(slot)
+            except (TypeError, RuntimeError):
+                pass
+
+    def clear(self) -> None:
+        for layer_id in list(self._connections):
+            self.invalidate(layer_id)
+
+    def _changed(self, layer_id: str, fid: int, *args: Any) -> None:
+        self.changes.setdefault(layer_id, set()).add(fid)
+
+    def _committed(self, layer_id: str, _: str, features: List[Any]) -> None:
+        self.changes.setdefault(layer_id, set()).update(f.id() for f in features)
+
+    def _saved(self, layer: QgsVectorLayer) -> None:
+        # The committed edits are tracked, only other changes invalidate the cache
+        cache = self.caches.get(layer.id())
+        if cache is not None:
+            cache.data_version = data_version(layer)
+
+
+class IncrementalExporter:
+    """
+    Exports a layer to GeoJSON styling only the changed features and patching
+    them into the cached features of the previous export
+    """
+
+    def __init__(
+        self,
+        layer: LayerSnapshot,
+        converter: StylesToAttributes,
+        transform_context: QgsCoordinateTransformContext,
+        cache: FeatureCache,
+        fids: Optional[Set[int]] = None,
+    ) -> None:
+        """
+        :param layer: Snapshot of the layer taken on the main thread
+        :param converter: Converter created for the snapshot
+        :param transform_context: Transform context of the project
+        :param cache: Cache to patch, empty for a full export
+        :param fids: Ids of the changed features, None for a full export
+        """
+        self.layer = layer
+        self.converter = converter
+        self.transform_context = transform_context
+        self.cache = cache
+        self.fids = fids
+
+    def export(
+        self,
+        output_file: Path,
+        extent: Optional[QgsRectangle],
+        feedback: QgsFeedback,
+    ) -> bool:
+        """
+        :param output_file: GeoJSON file to write the patched FeatureCollection to
+        :param extent: Extent in the layer CRS
+        :param feedback: Feedback of the converter
+        :return: False if the export was canceled or failed
+        """
+        recorder = GeoJsonFeatureRecorder(
+            GeoJsonWriter(
+                output_file,
+                self.converter.fields,
+                self.layer.sourceCrs(),
+                self.transform_context,
+                name=self.cache.name,
+            )
+        )
+        self.converter.extract_styles_to_layer(recorder, extent, self.fids)
+        if feedback.isCanceled():
+            return False
+
+        if self.fids is None:
+            self.cache.features = recorder.features
+        else:
+            self.cache.patch(self.fids, recorder.features)
+            LOGGER.debug(
+                f"Patched {len(self.fids)} changed features of {self.layer.name()}"
+            )
+        self.cache.legend = self.converter.get_legend()
+        self.cache.style_type = self.converter.style_type.name
+        self.cache.write(output_file)
+        return True
@@ -18,15 +18,24 @@
 #  You should have received a copy of the GNU General Public License
 #  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
 import logging
+import tempfile
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
-from ..definitions.configurable_settings import ProjectSettings, Settings
+from qgis.core import QgsFeedback
+
+from ..definitions.configurable_settings import (
+    ProjectSettings,
+    ResourceFormatOptions,
+    Settings,
+)
 from ..model.config import Config, SnapshotConfig
 from ..model.snapshot import Legend, License, Resource, Snapshot
 from ..model.styled_layer import StyledLayer
-from ..qgis_plugin_tools.tools.resources import plugin_name
+from ..qgis_plugin_tools.tools.resources import plugin_name, resources_path
 from ..qgis_plugin_tools.tools.settings import get_project_setting, get_setting
+from .sidecar_writer import SidecarWriter
+from .snapshot_writer import DataSource, SnapshotWriter
 from .utils import load_json
 
 LOGGER = logging.getLogger(plugin_name())
@@ -76,7 +85,7 @@ class DataPackageHandler:
         Load default Snapshot and Legend templates
         """
         template_path = get_setting(
-            Settings.snapshot_template.name, Settings.snapshot_template.value, str
+            Settings.snapshot_template.name, Settings.snapshot_template.default, str
         )
         template = load_json(template_path)
 
@@ -91,7 +100,7 @@ class DataPackageHandler:
         """
         template_path = get_setting(
             Settings.export_config_template.name,
-            Settings.export_config_template.value,
+            Settings.export_config_template.default,
             str,
         )
         return Config.from_dict(load_json(template_path))
@@ -176,6 +185,7 @@ class DataPackageHandler:
         snapshot_config: SnapshotConfig,
         styled_layers: List[StyledLayer],
         snapshot_license: Optional[License] = None,
+        inline_data: bool = True,
     ) -> Snapshot:
         """
         Creates new Snapshot with data
@@ -183,6 +193,7 @@ class DataPackageHandler:
         :param snapshot_config:
         :param styled_layers:
         :param snapshot_license:
+        :param inline_data: Whether to load the data of the layers to the resources
         :return:
         """
         snapshot = Snapshot.from_dict(self.snapshot_template.to_dict())
@@ -221,7 +232,7 @@ class DataPackageHandler:
                 styled_layer.resource_name,
                 mediatype=styled_layer.style_type.media_type,
                 licenses=styled_layer.get_licenses(),
-                data=styled_layer.get_geojson_data(),
+                data=styled_layer.get_geojson_data() if inline_data else None,
             )
             kwords = styled_layer.get_keywords()
             keywords += kwords if kwords else []
@@ -236,3 +247,90 @@ class DataPackageHandler:
             snapshot.views[0].spec.legend += styled_layer.legend
 
         return snapshot
+
+    def write_snapshot(
+        self,
+        output_file: Path,
+        snapshot_name: str,
+        snapshot_config: SnapshotConfig,
+        styled_layers: List[StyledLayer],
+        snapshot_license: Optional[License] = None,
+        feedback: Optional[QgsFeedback] = None,
+        resource_format: Optional[str] = None,
+    ) -> bool:
+        """
+        Creates new Snapshot and writes it to the file, streaming the data of the
+        layers from GeoJSON files instead of loading it to memory
+        :param output_file: Path of the snapshot JSON file
+        :param snapshot_name:
+        :param snapshot_config:
+        :param styled_layers:
+        :param snapshot_license:
+        :param feedback: Feedback for progress and cancellation
+        :param resource_format: One of ResourceFormatOptions, defaults to the
+            setting
+        :return: False if writing was canceled
+        """
+        snapshot = self.create_snapshot(
+            snapshot_name,
+            snapshot_config,
+            styled_layers,
+            snapshot_license,
+            inline_data=False,
+        )
+        return self.stream_snapshot(
+            output_file, snapshot, styled_layers, feedback, resource_format
+        )
+
+    @staticmethod
+    def stream_snapshot(
+        output_file: Path,
+        snapshot: Snapshot,
+        styled_layers: List[StyledLayer],
+        feedback: Optional[QgsFeedback] = None,
+        resource_format: Optional[str] = None,
+    ) -> bool:
+        """
+        Writes the snapshot created without inline data to the file, streaming the
+        data of the layers from GeoJSON files. With a sidecar resource format, the
+        layers are written to files next to the snapshot and referenced by path.
+        :param output_file: Path of the snapshot JSON file
+        :param snapshot: Snapshot created with inline_data=False
+        :param styled_layers: Layers of the snapshot
+        :param feedback: Feedback for progress and cancellation
+        :param resource_format: One of ResourceFormatOptions, defaults to the
+            setting
+        :return: False if writing was canceled
+        """
+        if resource_format is None:
+            resource_format = Settings.resource_format.get()
+        with tempfile.TemporaryDirectory(dir=resources_path()) as tmpdirname:
+            layer_files = {
+                styled_layer.resource_name: styled_layer.get_geojson_file(
+                    Path(tmpdirname)
+                )
+                for styled_layer in styled_layers
+            }
+            data_sources: Dict[str, DataSource] = dict(layer_files)
+            for styled_layer in styled_layers:
+                # Layers exported in the format are copied instead of converted
+                exported_file = styled_layer.get_exported_file(resource_format)
+                if exported_file is not None:
+                    layer_files[styled_layer.resource_name] = exported_file
+            if resource_format != ResourceFormatOptions.inline.value:
+                sidecar_writer = SidecarWriter(
+                    output_file.parent,
+                    resource_format,
+                    Settings.parallel_exports.get(),
+                )
+                paths = sidecar_writer.write(snapshot.name, layer_files, feedback)
+                if paths is None:
+                    return False
+                for resource in snapshot.resources:
+                    if resource.name in paths:
+                        resource.path = paths[resource.name].name
+                        resource.mediatype = (
+                            sidecar_writer.format.media_type or resource.mediatype
+                        )
+                data_sources = {}
+            return SnapshotWriter(snapshot, data_sources).write(output_file, feedback)
@@ -0,0 +1,110 @@
+#  Gispo Ltd., hereby disclaims all copyright interest in the program
+#  SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+import time
+from typing import TYPE_CHECKING, Any, Dict, Union
+
+from qgis.core import (
+    QgsExpression,
+    QgsExpressionContext,
+    QgsFeature,
+    QgsProcessingFeedback,
+    QgsVectorLayer,
+)
+
+from ..qgis_plugin_tools.tools.custom_logging import bar_msg
+from ..qgis_plugin_tools.tools.exceptions import QgsPluginExpressionException
+from ..qgis_plugin_tools.tools.i18n import tr
+
+if TYPE_CHECKING:
+    from .layer_snapshot import LayerSnapshot
+
+
+class ExpressionEvaluator:
+    """
+    Evaluates expressions against the features of a layer.
+
+    Each expression is prepared once against the fields and the expression
+    context scopes of the layer, and a single expression context is reused for
+    all evaluations by swapping only the feature.
+    """
+
+    def __init__(self, layer: Union[QgsVectorLayer, "LayerSnapshot"]) -> None:
+        self.context: QgsExpressionContext = layer.createExpressionContext()
+        self.context.setFields(layer.fields())
+        self.expressions: Dict[str, QgsExpression] = {}
+        self.evaluation_times: Dict[str, float] = {}
+        self.evaluation_counts: Dict[str, int] = {}
+
+    def prepare(self, expression: QgsExpression) -> QgsExpression:
+        """
+        Prepares the expression if it is not prepared already
+        :param expression: Expression to prepare
+        :return: Prepared copy of the expression
+        """
+        key = expression.expression()
+        prepared = self.expressions.get(key)
+        if prepared is None:
+            prepared = QgsExpression(key)
+            prepared.prepare(self.context)
+            self.expressions[key] = prepared
+            self.evaluation_times[key] = 0.0
+            self.evaluation_counts[key] = 0
+        return prepared
+
+    def evaluate(self, expression: QgsExpression, feature: QgsFeature) -> Any:
+        """
+        Evaluates the prepared version of the expression against the feature
+        :param expression: Expression to evaluate
+        :param feature: Feature to evaluate the expression against
+        :return: Value of the expression
+        """
+        key = expression.expression()
+        prepared = self.expressions.get(key)
+        if prepared is None:
+            prepared = self.prepare(expression)
+        self.context.setFeature(feature)
+
+        start = time.perf_counter()
+        value = prepared.evaluate(self.context)
+        self.evaluation_times[key] += time.perf_counter() - start
+        self.evaluation_counts[key] += 1
+
+        if prepared.hasEvalError():
+            raise QgsPluginExpressionException(
+                tr("Could not evaluate expression {}", key),
+                bar_msg=bar_msg(prepared.evalErrorString()),
+            )
+        return value
+
+    def merge(self, other: "ExpressionEvaluator") -> None:
+        """Adds the evaluation times and counts of the other evaluator"""
+        for key, elapsed in other.evaluation_times.items():
+            self.evaluation_times[key] = self.evaluation_times.get(key, 0.0) + elapsed
+            self.evaluation_counts[key] = (
+                self.evaluation_counts.get(key, 0) + other.evaluation_counts[key]
+            )
+
+    def report(self, feedback: QgsProcessingFeedback) -> None:
+        """Pushes the evaluation times of the expressions to the feedback"""
+        for key, elapsed in self.evaluation_times.items():
+            feedback.pushDebugInfo(
+                f"Expression {key}: {self.evaluation_counts[key]} evaluations "
+                f"in {elapsed:.3f} s"
+            )
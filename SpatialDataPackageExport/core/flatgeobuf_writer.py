@@ -0,0 +1,147 @@
+#  Gispo Ltd., hereby disclaims all copyright interest in the program
+#  SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+import logging
+from pathlib import Path
+from typing import Any, Iterable, Optional, Union
+
+from qgis.core import (
+    QgsCoordinateReferenceSystem,
+    QgsCoordinateTransform,
+    QgsCoordinateTransformContext,
+    QgsFeature,
+    QgsFeatureSink,
+    QgsFields,
+    QgsGeometry,
+    QgsVectorFileWriter,
+    QgsWkbTypes,
+)
+
+from ..qgis_plugin_tools.tools.custom_logging import bar_msg
+from ..qgis_plugin_tools.tools.i18n import tr
+from ..qgis_plugin_tools.tools.resources import plugin_name
+from .exceptions import DataPackageException
+
+LOGGER = logging.getLogger(plugin_name())
+
+
+class FlatGeobufWriter(QgsFeatureSink):
+    """
+    Feature sink that writes the features to a FlatGeobuf file in EPSG:4326.
+
+    The file is written with a packed Hilbert R-tree, which GDAL builds when the
+    file is closed, so that readers can stream the features intersecting a
+    bounding box without reading the whole file.
+    """
+
+    DRIVER = "FlatGeobuf"
+    LAYER_OPTIONS = ["SPATIAL_INDEX=YES"]
+
+    def __init__(
+        self,
+        output_file: Union[str, Path],
+        fields: QgsFields,
+        wkb_type: QgsWkbTypes.Type,
+        source_crs: QgsCoordinateReferenceSystem,
+        transform_context: QgsCoordinateTransformContext,
+        name: Optional[str] = None,
+    ) -> None:
+        super().__init__()
+        self.output_file = Path(output_file)
+        self.fields = fields
+        self.wkb_type = wkb_type
+        self.name = name if name is not None else self.output_file.stem
+        self.crs = QgsCoordinateReferenceSystem("EPSG:4326")
+        self.transform_context = transform_context
+        self.transform = QgsCoordinateTransform(source_crs, self.crs, transform_context)
+        self.feature_count = 0
+        self._error = ""
+        self._writer: Optional[QgsVectorFileWriter] = None
+
+    def __enter__(self) -> "FlatGeobufWriter":
+        self.open()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def open(self) -> None:
+        options = QgsVectorFileWriter.SaveVectorOptions()
+        options.driverName = self.DRIVER
+        options.fileEncoding = "utf-8"
+        options.layerName = self.name
+        options.layerOptions = self.LAYER_OPTIONS
+        writer = QgsVectorFileWriter.create(
+            str(self.output_file),
+            self.fields,
+            self.wkb_type,
+            self.crs,
+            self.transform_context,
+            options,
+        )
+        if writer.hasError() != QgsVectorFileWriter.NoError:
+            raise DataPackageException(
+                tr("Could not write layer {} to disk", self.output_file),
+                bar_msg(writer.errorMessage()),
+            )
+        self._writer = writer
+
+    def close(self) -> None:
+        """Writes the spatial index and closes the file"""
+        if self._writer is None:
+            return
+        # The file is finalized when the writer is deleted
+        self._writer = None
+        LOGGER.debug(f"Wrote {self.feature_count} features to {self.output_file}")
+
+    def addFeature(  # noqa: N802
+        self, feature: QgsFeature, flags: QgsFeatureSink.Flags = QgsFeatureSink.Flags()
+    ) -> bool:
+        return self.addFeatures([feature], flags)
+
+    def addFeatures(  # noqa: N802
+        self,
+        features: Iterable[QgsFeature],
+        flags: QgsFeatureSink.Flags = QgsFeatureSink.Flags(),
+    ) -> bool:
+        if self._writer is None:
+            self._error = tr("FlatGeobuf writer is not open")
+            return False
+        try:
+            transformed = [self._transform(feature) for feature in features]
+        except Exception as e:
+            self._error = str(e)
+            return False
+        if not self._writer.addFeatures(transformed, flags):
+            self._error = self._writer.errorMessage()
+            return False
+        self.feature_count += len(transformed)
+        return True
+
+    def lastError(self) -> str:  # noqa: N802
+        return self._error
+
+    def _transform(self, feature: QgsFeature) -> QgsFeature:
+        """Copy of the feature in EPSG:4326, the feature may be shared by sinks"""
+        output = QgsFeature(feature)
+        if feature.hasGeometry() and not self.transform.isShortCircuited():
+            geom = QgsGeometry(feature.geometry())
+            geom.transform(self.transform)
+            output.setGeometry(geom)
+        return output
@@ -0,0 +1,249 @@
+#  Gispo Ltd., hereby disclaims all copyright interest in the program
+#  SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+import json
+import logging
+import math
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from qgis.core import (
+    QgsCoordinateReferenceSystem,
+    QgsCoordinateTransform,
+    QgsCoordinateTransformContext,
+    QgsFeature,
+    QgsFeatureSink,
+    QgsFields,
+    QgsGeometry,
+)
+from qgis.PyQt.QtCore import QDate, QDateTime, Qt, QTime
+
+from ..qgis_plugin_tools.tools.i18n import tr
+from ..qgis_plugin_tools.tools.resources import plugin_name
+from .symbol_index import is_null
+
+LOGGER = logging.getLogger(plugin_name())
+
+COLLECTION_FOOTER = "\n]}\n"
+
+
+class GeoJsonWriter(QgsFeatureSink):
+    """
+    Feature sink that streams the features as a GeoJSON FeatureCollection in
+    EPSG:4326 directly to a file.
+
+    Each feature is reprojected and serialized as soon as it is added, so only
+    one feature is held in memory at a time.
+    """
+
+    COORDINATE_PRECISION = 15
+
+    def __init__(
+        self,
+        output_file: Union[str, Path],
+        fields: QgsFields,
+        source_crs: QgsCoordinateReferenceSystem,
+        transform_context: QgsCoordinateTransformContext,
+        name: Optional[str] = None,
+        precision: int = COORDINATE_PRECISION,
+    ) -> None:
+        super().__init__()
+        self.output_file = Path(output_file)
+        self.field_names: List[str] = fields.names()
+        self.name = name if name is not None else self.output_file.stem
+        self.precision = precision
+        self.transform = QgsCoordinateTransform(
+            source_crs, QgsCoordinateReferenceSystem("EPSG:4326"), transform_context
+        )
+        self.feature_count = 0
+        self._error = ""
+        self._file = None
+
+    def __enter__(self) -> "GeoJsonWriter":
+        self.open()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def open(self) -> None:
+        self._file = open(self.output_file, "w", encoding="utf-8")
+        self._file.write(collection_header(self.name))
+
+    def close(self) -> None:
+        """Closes the FeatureCollection and the file"""
+        if self._file is None:
+            return
+        self._file.write(COLLECTION_FOOTER)
+        self._file.close()
+        self._file = None
+        LOGGER.debug(f"Wrote {self.feature_count} features to {self.output_file}")
+
+    def addFeature(  # noqa: N802
+        self, feature: QgsFeature, flags: QgsFeatureSink.Flags = QgsFeatureSink.Flags()
+    ) -> bool:
+        return self.addFeatures([feature], flags)
+
+    def addFeatures(  # noqa: N802
+        self,
+        features: Iterable[QgsFeature],
+        flags: QgsFeatureSink.Flags = QgsFeatureSink.Flags(),
+    ) -> bool:
+        if self._file is None:
+            self._error = tr("GeoJSON writer is not open")
+            return False
+        try:
+            for feature in features:
+                separator = ",\n" if self.feature_count else "\n"
+                self._file.write(separator + self.feature_to_json(feature))
+                self.feature_count += 1
+        except Exception as e:
+            self._error = str(e)
+            return False
+        return True
+
+    def lastError(self) -> str:  # noqa: N802
+        return self._error
+
+    def feature_to_json(self, feature: QgsFeature) -> str:
+        """
+        :param feature: Feature in the source CRS
+        :return: GeoJSON Feature text of the feature in EPSG:4326
+        """
+        attributes = feature.attributes()
+        properties = {
+            name: json_value(attributes[i]) if i < len(attributes) else None
+            for i, name in enumerate(self.field_names)
+        }
+        geometry = "null"
+        if feature.hasGeometry():
+            geom = QgsGeometry(feature.geometry())
+            if not self.transform.isShortCircuited():
+                geom.transform(self.transform)
+            geometry = geom.asJson(self.precision)
+        properties_json = json.dumps(
+            properties, ensure_ascii=False, allow_nan=False, default=str
+        )
+        return (
+            '{"type": "Feature", "properties": '
+            f'{properties_json}, "geometry": {geometry}}}'
+        )
+
+
+class MultiFeatureSink(QgsFeatureSink):
+    """Feature sink that adds the features to all of the given sinks"""
+
+    def __init__(self, sinks: List[QgsFeatureSink]) -> None:
+        super().__init__()
+        self.sinks = sinks
+        self._error = ""
+
+    def addFeature(  # noqa: N802
+        self, feature: QgsFeature, flags: QgsFeatureSink.Flags = QgsFeatureSink.Flags()
+    ) -> bool:
+        return self.addFeatures([feature], flags)
+
+    def addFeatures(  # noqa: N802
+        self,
+        features: Iterable[QgsFeature],
+        flags: QgsFeatureSink.Flags = QgsFeatureSink.Flags(),
+    ) -> bool:
+        features = list(features)
+        for sink in self.sinks:
+            if not sink.addFeatures(features, flags):
+                self._error = sink.lastError() if hasattr(sink, "lastError") else ""
+                return False
+        return True
+
+    def lastError(self) -> str:  # noqa: N802
+        return self._error
+
+
+class GeoJsonFeatureRecorder(QgsFeatureSink):
+    """
+    Feature sink that keeps the GeoJSON Feature text of each added feature by its
+    feature id instead of writing a FeatureCollection
+    """
+
+    def __init__(self, writer: GeoJsonWriter) -> None:
+        """
+        :param writer: Writer used to serialize the features, does not need to be
+            opened
+        """
+        super().__init__()
+        self.writer = writer
+        self.features: Dict[int, str] = {}
+
+    def addFeature(  # noqa: N802
+        self, feature: QgsFeature, flags: QgsFeatureSink.Flags = QgsFeatureSink.Flags()
+    ) -> bool:
+        return self.addFeatures([feature], flags)
+
+    def addFeatures(  # noqa: N802
+        self,
+        features: Iterable[QgsFeature],
+        flags: QgsFeatureSink.Flags = QgsFeatureSink.Flags(),
+    ) -> bool:
+        for feature in features:
+            self.features[feature.id()] = self.writer.feature_to_json(feature)
+        return True
+
+    def lastError(self) -> str:  # noqa: N802
+        return ""
+
+
+def collection_header(name: str) -> str:
+    return (
+        '{"type": "FeatureCollection", "name": '
+        f'{json.dumps(name, ensure_ascii=False)}, "features": ['
+    )
+
+
+def write_feature_collection(
+    output_file: Union[str, Path], name: str, features: Iterable[str]
+) -> int:
+    """
+    Writes serialized GeoJSON Features as a FeatureCollection in the format of
+    GeoJsonWriter
+    :return: Number of features written
+    """
+    count = 0
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(collection_header(name))
+        for feature in features:
+            f.write((",\n" if count else "\n") + feature)
+            count += 1
+        f.write(COLLECTION_FOOTER)
+    return count
+
+
+def json_value(value: Any) -> Any:
+    """Converts an attribute value to a JSON serializable value"""
+    if is_null(value):
+        return None
+    if isinstance(value, float) and not math.isfinite(value):
+        # NaN and infinity are not valid JSON
+        return None
+    if isinstance(value, (QDate, QDateTime, QTime)):
+        return value.toString(Qt.ISODate)
+    if isinstance(value, list):
+        return [json_value(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): json_value(item) for key, item in value.items()}
+    return value
@@ -0,0 +1,223 @@
+#  Gispo Ltd., hereby disclaims all copyright interest in the program
+#  SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+import json
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from qgis.core import (
+    QgsCoordinateReferenceSystem,
+    QgsCoordinateTransform,
+    QgsCoordinateTransformContext,
+    QgsFeature,
+    QgsFeatureSink,
+    QgsFields,
+    QgsGeometry,
+)
+from qgis.PyQt.QtCore import QVariant
+
+from ..qgis_plugin_tools.tools.custom_logging import bar_msg
+from ..qgis_plugin_tools.tools.i18n import tr
+from ..qgis_plugin_tools.tools.resources import plugin_name
+from .exceptions import DataPackageException
+from .geojson_writer import json_value
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+LOGGER = logging.getLogger(plugin_name())
+
+GEOPARQUET_VERSION = "1.0.0"
+GEOMETRY_COLUMN = "geometry"
+
+
+def is_available() -> bool:
+    """Whether pyarrow is installed"""
+    return pa is not None
+
+
+class GeoParquetWriter(QgsFeatureSink):
+    """
+    Feature sink that writes the features to a GeoParquet file in EPSG:4326.
+
+    The attributes are buffered column by column and written as a row group once
+    the buffer is full. The geometries are stored as WKB. The style columns,
+    which have only a few distinct values, are dictionary encoded.
+    """
+
+    ROW_GROUP_SIZE = 64 * 1024
+
+    def __init__(
+        self,
+        output_file: Union[str, Path],
+        fields: QgsFields,
+        source_crs: QgsCoordinateReferenceSystem,
+        transform_context: QgsCoordinateTransformContext,
+        dictionary_fields: Iterable[str] = (),
+        row_group_size: int = ROW_GROUP_SIZE,
+    ) -> None:
+        """
+        :param output_file: Path of the GeoParquet file
+        :param fields: Fields of the features
+        :param source_crs: CRS of the features
+        :param transform_context: Transform context of the project
+        :param dictionary_fields: Names of the fields to dictionary encode
+        :param row_group_size: Number of features in a row group
+        """
+        super().__init__()
+        if pa is None:
+            raise DataPackageException(
+                tr("Writing GeoParquet requires pyarrow"),
+                bar_msg(tr("Install pyarrow to the Python environment of QGIS")),
+            )
+        self.output_file = Path(output_file)
+        self.row_group_size = row_group_size
+        self.transform = QgsCoordinateTransform(
+            source_crs, QgsCoordinateReferenceSystem("EPSG:4326"), transform_context
+        )
+        dictionary_fields = set(dictionary_fields)
+        self.field_names: List[str] = fields.names()
+        self.converters: List[Callable[[Any], Any]] = []
+        schema_fields = []
+        for field in fields:
+            arrow_type, converter = self._arrow_type(field.type())
+            if field.name() in dictionary_fields:
+                arrow_type = pa.dictionary(pa.int32(), arrow_type)
+            schema_fields.append(pa.field(field.name(), arrow_type))
+            self.converters.append(converter)
+        schema_fields.append(pa.field(GEOMETRY_COLUMN, pa.binary()))
+        self.schema = pa.schema(
+            schema_fields, metadata={"geo": json.dumps(self._geo_metadata())}
+        )
+        self.feature_count = 0
+        self._columns: List[List[Any]] = [[] for _ in schema_fields]
+        self._error = ""
+        self._writer: Optional[Any] = None
+
+    def __enter__(self) -> "GeoParquetWriter":
+        self.open()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def open(self) -> None:
+        # The WKB geometries are unique, unlike the values of the attributes
+        self._writer = pq.ParquetWriter(
+            str(self.output_file), self.schema, use_dictionary=self.field_names
+        )
+
+    def close(self) -> None:
+        """Writes the buffered features and the footer of the file"""
+        if self._writer is None:
+            return
+        self._flush()
+        self._writer.close()
+        self._writer = None
+        LOGGER.debug(f"Wrote {self.feature_count} features to {self.output_file}")
+
+    def addFeature(  # noqa: N802
+        self, feature: QgsFeature, flags: QgsFeatureSink.Flags = QgsFeatureSink.Flags()
+    ) -> bool:
+        return self.addFeatures([feature], flags)
+
+    def addFeatures(  # noqa: N802
+        self,
+        features: Iterable[QgsFeature],
+        flags: QgsFeatureSink.Flags = QgsFeatureSink.Flags(),
+    ) -> bool:
+        if self._writer is None:
+            self._error = tr("GeoParquet writer is not open")
+            return False
+        try:
+            for feature in features:
+                self._append(feature)
+                if len(self._columns[-1]) >= self.row_group_size:
+                    self._flush()
+        except Exception as e:
+            self._error = str(e)
+            return False
+        return True
+
+    def lastError(self) -> str:  # noqa: N802
+        return self._error
+
+    def _append(self, feature: QgsFeature) -> None:
+        attributes = feature.attributes()
+        for i, converter in enumerate(self.converters):
+            value = json_value(attributes[i]) if i < len(attributes) else None
+            self._columns[i].append(converter(value) if value is not None else None)
+        wkb = None
+        if feature.hasGeometry():
+            geom = QgsGeometry(feature.geometry())
+            if not self.transform.isShortCircuited():
+                geom.transform(self.transform)
+            wkb = bytes(geom.asWkb())
+        self._columns[-1].append(wkb)
+        self.feature_count += 1
+
+    def _flush(self) -> None:
+        if not self._columns[-1]:
+            return
+        arrays = []
+        for values, field in zip(self._columns, self.schema):
+            if pa.types.is_dictionary(field.type):
+                array = pa.array(values, field.type.value_type).dictionary_encode()
+            else:
+                array = pa.array(values, field.type)
+            arrays.append(array)
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+        self._columns = [[] for _ in self._columns]
+
+    @staticmethod
+    def _arrow_type(field_type: int) -> Tuple[Any, Callable[[Any], Any]]:
+        """:return: Arrow type and the converter of the values of the field type"""
+        if field_type == QVariant.Bool:
+            return pa.bool_(), bool
+        if field_type in (
+            QVariant.Int,
+            QVariant.UInt,
+            QVariant.LongLong,
+            QVariant.ULongLong,
+        ):
+            return pa.int64(), int
+        if field_type == QVariant.Double:
+            return pa.float64(), float
+        return pa.string(), _to_string
+
+    @staticmethod
+    def _geo_metadata() -> Dict[str, Any]:
+        # Without a crs member the coordinates are in OGC:CRS84, the longitude and
+        # latitude order of EPSG:4326 in QGIS
+        return {
+            "version": GEOPARQUET_VERSION,
+            "primary_column": GEOMETRY_COLUMN,
+            "columns": {GEOMETRY_COLUMN: {"encoding": "WKB", "geometry_types": []}},
+        }
+
+
+def _to_string(value: Any) -> str:
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
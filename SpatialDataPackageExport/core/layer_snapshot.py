@@ -0,0 +1,132 @@
+#  Gispo Ltd., hereby disclaims all copyright interest in the program
+#  SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+from typing import List, Optional
+
+from qgis.core import (
+    QgsCoordinateReferenceSystem,
+    QgsExpressionContext,
+    QgsFeatureIterator,
+    QgsFeatureRenderer,
+    QgsFeatureRequest,
+    QgsFeatureSource,
+    QgsFields,
+    QgsLayerMetadata,
+    QgsVectorLayer,
+    QgsVectorLayerFeatureSource,
+    QgsWkbTypes,
+)
+
+
+class LayerSnapshot:
+    """
+    Thread-safe read-only snapshot of a vector layer.
+
+    The feature source, renderer and expression context are copied from the layer
+    on the main thread. The snapshot provides the parts of the QgsVectorLayer
+    interface used by the exporter, so workers in other threads can use it in
+    place of the layer. A feature source must not be iterated in several threads
+    at once, so the snapshot holds a separate source for each worker thread.
+    """
+
+    def __init__(self, layer: QgsVectorLayer, workers: int = 0) -> None:
+        """
+        Must be created on the thread owning the layer
+        :param layer: Layer to take the snapshot of
+        :param workers: Number of worker threads reading the features at once,
+            besides the thread using the snapshot
+        """
+        self.source = QgsVectorLayerFeatureSource(layer)
+        self.worker_sources: List[QgsVectorLayerFeatureSource] = [
+            QgsVectorLayerFeatureSource(layer) for _ in range(max(0, workers))
+        ]
+        self._renderer: QgsFeatureRenderer = layer.renderer().clone()
+        self._expression_context = layer.createExpressionContext()
+        self._fields = QgsFields(layer.fields())
+        self._id = layer.id()
+        self._name = layer.name()
+        self._source_uri = layer.source()
+        self._provider_type = layer.providerType()
+        self._storage_type = layer.storageType()
+        self._crs = QgsCoordinateReferenceSystem(layer.crs())
+        self._wkb_type = layer.wkbType()
+        self._feature_count = layer.featureCount()
+        self._is_modified = layer.isModified()
+        self._metadata = QgsLayerMetadata(layer.metadata())
+        self._spatial_index = (
+            layer.hasSpatialIndex()
+            if hasattr(layer, "hasSpatialIndex")
+            else QgsFeatureSource.SpatialIndexUnknown
+        )
+
+    def getFeatures(  # noqa: N802
+        self, request: Optional[QgsFeatureRequest] = None
+    ) -> QgsFeatureIterator:
+        return self.source.getFeatures(
+            request if request is not None else QgsFeatureRequest()
+        )
+
+    def renderer(self) -> QgsFeatureRenderer:
+        """Gets a copy of the renderer owned by the caller"""
+        return self._renderer.clone()
+
+    def createExpressionContext(self) -> QgsExpressionContext:  # noqa: N802
+        return QgsExpressionContext(self._expression_context)
+
+    def fields(self) -> QgsFields:
+        return QgsFields(self._fields)
+
+    def id(self) -> str:
+        return self._id
+
+    def name(self) -> str:
+        return self._name
+
+    def source(self) -> str:
+        return self._source_uri
+
+    def providerType(self) -> str:  # noqa: N802
+        return self._provider_type
+
+    def storageType(self) -> str:  # noqa: N802
+        return self._storage_type
+
+    def crs(self) -> QgsCoordinateReferenceSystem:
+        return QgsCoordinateReferenceSystem(self._crs)
+
+    def sourceCrs(self) -> QgsCoordinateReferenceSystem:  # noqa: N802
+        return self.crs()
+
+    def wkbType(self) -> QgsWkbTypes.Type:  # noqa: N802
+        return self._wkb_type
+
+    def geometryType(self) -> QgsWkbTypes.GeometryType:  # noqa: N802
+        return QgsWkbTypes.geometryType(self._wkb_type)
+
+    def featureCount(self) -> int:  # noqa: N802
+        return self._feature_count
+
+    def isModified(self) -> bool:  # noqa: N802
+        return self._is_modified
+
+    def metadata(self) -> QgsLayerMetadata:
+        return QgsLayerMetadata(self._metadata)
+
+    def hasSpatialIndex(self) -> QgsFeatureSource.SpatialIndexPresence:  # noqa: N802
+        return self._spatial_index
@@ -18,7 +18,7 @@
 #  You should have received a copy of the GNU General Public License
 #  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Union
 
 from qgis.core import (
     QgsCoordinateReferenceSystem,
@@ -30,14 +30,21 @@ from qgis.core import (
     QgsProcessingParameterBoolean,
     QgsProcessingParameterExtent,
     QgsProcessingParameterFeatureSink,
+    QgsProcessingParameterFileDestination,
+    QgsProcessingParameterNumber,
     QgsProcessingParameterString,
     QgsProcessingParameterVectorLayer,
     QgsRectangle,
     QgsVectorLayer,
+    QgsWkbTypes,
 )
 
 from ...qgis_plugin_tools.tools.algorithm_processing import BaseProcessingAlgorithm
 from ...qgis_plugin_tools.tools.i18n import tr
+from ..flatgeobuf_writer import FlatGeobufWriter
+from ..geojson_writer import GeoJsonWriter, MultiFeatureSink
+from ..geoparquet_writer import GeoParquetWriter
+from ..layer_snapshot import LayerSnapshot
 from ..styles2attributes import StylesToAttributes
 
 
@@ -52,9 +59,20 @@ class StyleToAttributesAlg(BaseProcessingAlgorithm):
     PRIMARY = "PRIMARY"
     LEGEND_SHAPE = "LEGEND_SHAPE"
     OUTPUT = "OUTPUT"
+    OUTPUT_GEOJSON = "OUTPUT_GEOJSON"
+    OUTPUT_FLATGEOBUF = "OUTPUT_FLATGEOBUF"
+    OUTPUT_GEOPARQUET = "OUTPUT_GEOPARQUET"
     OUTPUT_LEGEND = "OUTPUT_LEGEND"
     OUTPUT_STYLE_TYPE = "OUTPUT_STYLE_TYPE"
     EXTENT = "EXTENT"
+    BULK_CLASSIFICATION = "BULK_CLASSIFICATION"
+    RULE_PUSHDOWN = "RULE_PUSHDOWN"
+    CLIP = "CLIP"
+    BATCH_SIZE = "BATCH_SIZE"
+    THREAD_SAFE_SOURCE = "THREAD_SAFE_SOURCE"
+    WORKERS = "WORKERS"
+
+    layer_snapshot: Optional[LayerSnapshot] = None
 
     def name(self) -> str:
         return StyleToAttributesAlg.ID
@@ -84,6 +102,14 @@ class StyleToAttributesAlg(BaseProcessingAlgorithm):
                 self.EXTENT, tr("Input extent"), defaultValue=None
             )
         )
+        self.addParameter(
+            QgsProcessingParameterBoolean(
+                self.CLIP,
+                tr("Clip geometries to the input extent"),
+                defaultValue=False,
+                optional=True,
+            )
+        )
         self.addParameter(
             QgsProcessingParameterBoolean(
                 self.PRIMARY, tr("Is layer a primary layer"), defaultValue=False
@@ -103,9 +129,126 @@ class StyleToAttributesAlg(BaseProcessingAlgorithm):
         )
 
         self.addParameter(
-            QgsProcessingParameterFeatureSink(self.OUTPUT, tr("Layer with attributes"))
+            QgsProcessingParameterBoolean(
+                self.BULK_CLASSIFICATION,
+                tr("Classify all features at once using NumPy"),
+                defaultValue=False,
+                optional=True,
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterBoolean(
+                self.RULE_PUSHDOWN,
+                tr(
+                    "Evaluate rule filters in the data provider "
+                    "(GeoPackage and SpatiaLite layers)"
+                ),
+                defaultValue=False,
+                optional=True,
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterBoolean(
+                self.THREAD_SAFE_SOURCE,
+                tr(
+                    "Read the features from a snapshot of the input layer "
+                    "taken before running"
+                ),
+                defaultValue=False,
+                optional=True,
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                self.WORKERS,
+                tr(
+                    "Number of worker threads styling the features of the layer, "
+                    "requires reading from a snapshot of the input layer"
+                ),
+                type=QgsProcessingParameterNumber.Integer,
+                defaultValue=1,
+                minValue=1,
+                optional=True,
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                self.BATCH_SIZE,
+                tr("Number of features written to the output at once"),
+                type=QgsProcessingParameterNumber.Integer,
+                defaultValue=1000,
+                minValue=1,
+                optional=True,
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterFeatureSink(
+                self.OUTPUT, tr("Layer with attributes"), optional=True
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterFileDestination(
+                self.OUTPUT_GEOJSON,
+                tr("GeoJSON file with attributes in EPSG:4326"),
+                fileFilter="GeoJSON (*.geojson)",
+                defaultValue=None,
+                optional=True,
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterFileDestination(
+                self.OUTPUT_FLATGEOBUF,
+                tr("FlatGeobuf file with attributes and a spatial index in EPSG:4326"),
+                fileFilter="FlatGeobuf (*.fgb)",
+                defaultValue=None,
+                optional=True,
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterFileDestination(
+                self.OUTPUT_GEOPARQUET,
+                tr("GeoParquet file with attributes in EPSG:4326 (requires pyarrow)"),
+                fileFilter="GeoParquet (*.parquet)",
+                defaultValue=None,
+                optional=True,
+            )
         )
 
+    # noinspection PyMethodOverriding
+    def prepareAlgorithm(  # noqa: N802
+        self,
+        parameters: Dict[str, Any],
+        context: QgsProcessingContext,
+        feedback: QgsProcessingFeedback,
+    ) -> bool:
+        """
+        Run on the main thread before processAlgorithm. Takes a snapshot of the
+        input layer so that processAlgorithm does not touch the live layer.
+        """
+        self.layer_snapshot = None
+        workers = self.parameterAsInt(parameters, self.WORKERS, context)
+        if (
+            self.parameterAsBool(parameters, self.THREAD_SAFE_SOURCE, context)
+            or workers > 1
+        ):
+            layer = self.parameterAsVectorLayer(parameters, self.INPUT, context)
+            if layer is None:
+                raise QgsProcessingException(
+                    self.invalidSourceError(parameters, self.INPUT)
+                )
+            self.layer_snapshot = LayerSnapshot(
+                layer, workers=workers if workers > 1 else 0
+            )
+        return True
+
     # noinspection PyMethodOverriding
     def processAlgorithm(  # noqa: N802
         self,
@@ -113,8 +256,10 @@ class StyleToAttributesAlg(BaseProcessingAlgorithm):
         context: QgsProcessingContext,
         feedback: QgsProcessingFeedback,
     ) -> Dict[str, Any]:
-        source: QgsVectorLayer = self.parameterAsVectorLayer(
-            parameters, self.INPUT, context
+        source: Union[QgsVectorLayer, LayerSnapshot, None] = (
+            self.layer_snapshot
+            if self.layer_snapshot is not None
+            else self.parameterAsVectorLayer(parameters, self.INPUT, context)
         )
         if source is None:
             raise QgsProcessingException(
@@ -131,6 +276,15 @@ class StyleToAttributesAlg(BaseProcessingAlgorithm):
         )
         if legend_shape == "automatic":
             legend_shape = None
+        bulk_classification: bool = self.parameterAsBool(
+            parameters, self.BULK_CLASSIFICATION, context
+        )
+        rule_pushdown: bool = self.parameterAsBool(
+            parameters, self.RULE_PUSHDOWN, context
+        )
+        clip: bool = self.parameterAsBool(parameters, self.CLIP, context)
+        batch_size: int = self.parameterAsInt(parameters, self.BATCH_SIZE, context)
+        workers: int = self.parameterAsInt(parameters, self.WORKERS, context)
 
         wrkr = StylesToAttributes(
             source,
@@ -138,6 +292,11 @@ class StyleToAttributesAlg(BaseProcessingAlgorithm):
             feedback,
             primary_layer=primary_layer,
             legend_shape=legend_shape,
+            bulk_classification=bulk_classification,
+            rule_pushdown=rule_pushdown,
+            clip=clip,
+            batch_size=batch_size,
+            workers=workers,
         )
 
         extent_crs = QgsCoordinateReferenceSystem("EPSG:4326")
@@ -153,7 +312,8 @@ class StyleToAttributesAlg(BaseProcessingAlgorithm):
         else:
             extent_transformed = extent
 
-        sink: QgsFeatureSink
+        sinks: List[QgsFeatureSink] = []
+        sink: Optional[QgsFeatureSink]
         (sink, dest_id) = self.parameterAsSink(
             parameters,
             self.OUTPUT,
@@ -162,13 +322,76 @@ class StyleToAttributesAlg(BaseProcessingAlgorithm):
             source.wkbType(),
             source.sourceCrs(),
         )
-        if sink is None:
+        if sink is not None:
+            sinks.append(sink)
+
+        file_writers: List[
+            Union[GeoJsonWriter, FlatGeobufWriter, GeoParquetWriter]
+        ] = []
+        geojson_path = self.parameterAsFileOutput(
+            parameters, self.OUTPUT_GEOJSON, context
+        )
+        if geojson_path:
+            file_writers.append(
+                GeoJsonWriter(
+                    geojson_path,
+                    wrkr.fields,
+                    source.sourceCrs(),
+                    context.transformContext(),
+                    name=output_name,
+                )
+            )
+        flatgeobuf_path = self.parameterAsFileOutput(
+            parameters, self.OUTPUT_FLATGEOBUF, context
+        )
+        if flatgeobuf_path:
+            file_writers.append(
+                FlatGeobufWriter(
+                    flatgeobuf_path,
+                    wrkr.fields,
+                    # Clipped geometries may become multipart
+                    QgsWkbTypes.multiType(source.wkbType())
+                    if clip
+                    else source.wkbType(),
+                    source.sourceCrs(),
+                    context.transformContext(),
+                    name=output_name,
+                )
+            )
+        geoparquet_path = self.parameterAsFileOutput(
+            parameters, self.OUTPUT_GEOPARQUET, context
+        )
+        if geoparquet_path:
+            file_writers.append(
+                GeoParquetWriter(
+                    geoparquet_path,
+                    wrkr.fields,
+                    source.sourceCrs(),
+                    context.transformContext(),
+                    dictionary_fields=wrkr.field_template.keys(),
+                )
+            )
+        sinks += file_writers
+
+        if not sinks:
             raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
 
-        wrkr.extract_styles_to_layer(sink, extent_transformed)
+        for file_writer in file_writers:
+            file_writer.open()
+        try:
+            wrkr.extract_styles_to_layer(
+                sinks[0] if len(sinks) == 1 else MultiFeatureSink(sinks),
+                extent_transformed,
+            )
+        finally:
+            for file_writer in file_writers:
+                file_writer.close()
 
         ret_val = {
             self.OUTPUT: dest_id,
+            self.OUTPUT_GEOJSON: geojson_path if geojson_path else None,
+            self.OUTPUT_FLATGEOBUF: flatgeobuf_path if flatgeobuf_path else None,
+            self.OUTPUT_GEOPARQUET: geoparquet_path if geoparquet_path else None,
             self.OUTPUT_LEGEND: wrkr.get_legend(),
             self.OUTPUT_STYLE_TYPE: wrkr.style_type.name,
         }
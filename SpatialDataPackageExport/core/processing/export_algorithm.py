@@ -0,0 +1,315 @@
+#  Gispo Ltd., hereby disclaims all copyright interest in the program
+#  SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+import tempfile
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from qgis.core import (
+    QgsCoordinateReferenceSystem,
+    QgsCoordinateTransform,
+    QgsCoordinateTransformContext,
+    QgsProcessing,
+    QgsProcessingContext,
+    QgsProcessingException,
+    QgsProcessingFeedback,
+    QgsProcessingMultiStepFeedback,
+    QgsProcessingParameterFile,
+    QgsProcessingParameterFileDestination,
+    QgsProcessingParameterMultipleLayers,
+    QgsProcessingParameterNumber,
+    QgsProcessingParameterString,
+    QgsRectangle,
+    QgsVectorLayer,
+)
+
+from ...definitions.configurable_settings import RuleFilterOptions, Settings
+from ...model.config import Config, SnapshotConfig, SnapshotResource
+from ...model.styled_layer import StyledLayer
+from ...qgis_plugin_tools.tools.algorithm_processing import BaseProcessingAlgorithm
+from ...qgis_plugin_tools.tools.i18n import tr
+from ..datapackage import DataPackageHandler
+from ..geojson_writer import GeoJsonWriter
+from ..layer_snapshot import LayerSnapshot
+from ..styles2attributes import StylesToAttributes
+from ..utils import datapackage_bounds_to_extent, load_json
+from .worker_pool import JobFeedback
+
+
+class ExportDataPackageAlg(BaseProcessingAlgorithm):
+    """
+    Exports the layers to a snapshot described by a configuration JSON. The styles
+    of the layers are extracted concurrently in threads from snapshots of the
+    layers taken in prepareAlgorithm.
+    """
+
+    ID = "exportdatapackage"
+    LAYERS = "LAYERS"
+    CONFIG = "CONFIG"
+    NAME = "NAME"
+    WORKERS = "WORKERS"
+    OUTPUT = "OUTPUT"
+    POLL_INTERVAL = 0.1
+
+    layer_snapshots: List[LayerSnapshot] = []
+
+    def name(self) -> str:
+        return ExportDataPackageAlg.ID
+
+    def shortHelpString(self) -> str:  # noqa: N802
+        return tr(
+            "Exports the layers with their styles to a spatial data package "
+            "snapshot. The configuration JSON has the format of the export "
+            "configuration template, and its resources define the primary layers "
+            "and the legend shapes by layer name."
+        )
+
+    def displayName(self) -> str:  # noqa: N802
+        return tr("Export spatial data package")
+
+    def group(self) -> str:
+        return tr("Vector")
+
+    def groupId(self) -> str:  # noqa: N802
+        return "vector"
+
+    # noinspection PyMethodOverriding
+    def initAlgorithm(self, config: Dict[str, Any]) -> None:  # noqa: N802
+        self.addParameter(
+            QgsProcessingParameterMultipleLayers(
+                self.LAYERS,
+                tr("Input layers"),
+                QgsProcessing.TypeVectorAnyGeometry,
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterFile(
+                self.CONFIG,
+                tr("Snapshot configuration"),
+                extension="json",
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterString(
+                self.NAME,
+                tr("Snapshot name, defaults to the name in the configuration"),
+                optional=True,
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                self.WORKERS,
+                tr("Number of layers exported concurrently"),
+                QgsProcessingParameterNumber.Integer,
+                defaultValue=4,
+                minValue=1,
+                optional=True,
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterFileDestination(
+                self.OUTPUT, tr("Snapshot"), tr("JSON files (*.json)")
+            )
+        )
+
+    # noinspection PyMethodOverriding
+    def prepareAlgorithm(  # noqa: N802
+        self,
+        parameters: Dict[str, Any],
+        context: QgsProcessingContext,
+        feedback: QgsProcessingFeedback,
+    ) -> bool:
+        """Run on the main thread before processAlgorithm"""
+        layers = self.parameterAsLayerList(parameters, self.LAYERS, context)
+        self.layer_snapshots = [
+            LayerSnapshot(layer)
+            for layer in layers
+            if isinstance(layer, QgsVectorLayer)
+        ]
+        if not self.layer_snapshots:
+            raise QgsProcessingException(
+                self.invalidSourceError(parameters, self.LAYERS)
+            )
+        return True
+
+    # noinspection PyMethodOverriding
+    def processAlgorithm(  # noqa: N802
+        self,
+        parameters: Dict[str, Any],
+        context: QgsProcessingContext,
+        feedback: QgsProcessingFeedback,
+    ) -> Dict[str, Any]:
+        config_file = self.parameterAsFile(parameters, self.CONFIG, context)
+        config = Config.from_dict(load_json(config_file))
+        snapshot_config = config.get_snapshot_config()
+        if snapshot_config is None:
+            raise QgsProcessingException(
+                tr("Configuration {} does not contain any snapshots", config_file)
+            )
+        snapshot_name = self.parameterAsString(parameters, self.NAME, context)
+        if not snapshot_name:
+            snapshot_name = list(config.snapshots[0].keys())[0]  # type: ignore
+        output_file = Path(self.parameterAsFileOutput(parameters, self.OUTPUT, context))
+        workers = self.parameterAsInt(parameters, self.WORKERS, context)
+
+        multi_feedback = QgsProcessingMultiStepFeedback(2, feedback)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            styled_layers = self._export_layers(
+                snapshot_config,
+                Path(tmp_dir),
+                max(1, workers),
+                context.transformContext(),
+                multi_feedback,
+            )
+            if feedback.isCanceled():
+                return {}
+
+            multi_feedback.setCurrentStep(1)
+            written = DataPackageHandler.create(config).write_snapshot(
+                output_file,
+                snapshot_name,
+                snapshot_config,
+                styled_layers,
+                snapshot_config.licenses[0] if snapshot_config.licenses else None,
+                multi_feedback,
+            )
+        if not written:
+            return {}
+        return {self.OUTPUT: str(output_file)}
+
+    def _export_layers(
+        self,
+        snapshot_config: SnapshotConfig,
+        tmp_dir: Path,
+        workers: int,
+        transform_context: QgsCoordinateTransformContext,
+        feedback: QgsProcessingFeedback,
+    ) -> List[StyledLayer]:
+        resources: Dict[str, SnapshotResource] = {
+            resource.name: resource for resource in snapshot_config.resources or []
+        }
+        extent: Optional[QgsRectangle] = (
+            datapackage_bounds_to_extent(snapshot_config.bounds)
+            if snapshot_config.crop_layers and snapshot_config.bounds
+            else None
+        )
+        clip = bool(extent is not None and snapshot_config.clip_layers)
+
+        layer_feedbacks = [JobFeedback() for _ in self.layer_snapshots]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    self._export_layer,
+                    layer,
+                    resources.get(layer.name()),
+                    Path(tmp_dir, f"{i}.geojson"),
+                    extent,
+                    clip,
+                    transform_context,
+                    layer_feedback,
+                )
+                for i, (layer, layer_feedback) in enumerate(
+                    zip(self.layer_snapshots, layer_feedbacks)
+                )
+            ]
+            pending = set(futures)
+            while pending:
+                _, pending = wait(
+                    pending, timeout=self.POLL_INTERVAL, return_when=FIRST_EXCEPTION
+                )
+                if feedback.isCanceled() or any(
+                    future.exception() for future in futures if future.done()
+                ):
+                    for layer_feedback in layer_feedbacks:
+                        layer_feedback.cancel()
+                feedback.setProgress(
+                    sum(f.progress() for f in layer_feedbacks) / len(layer_feedbacks)
+                )
+
+        # The layers canceled because of a failed layer are not the cause
+        for future in futures:
+            exception = future.exception()
+            if exception is not None:
+                raise exception
+
+        styled_layers = []
+        for layer, future, layer_feedback in zip(
+            self.layer_snapshots, futures, layer_feedbacks
+        ):
+            styled_layer = future.result()
+            if layer_feedback.isCanceled() and not feedback.isCanceled():
+                raise QgsProcessingException(
+                    tr(
+                        "Exporting styles for {} failed: {}",
+                        layer.name(),
+                        layer_feedback.last_error,
+                    )
+                )
+            styled_layers.append(styled_layer)
+        return styled_layers
+
+    @staticmethod
+    def _export_layer(
+        layer: LayerSnapshot,
+        resource: Optional[SnapshotResource],
+        geojson_path: Path,
+        extent: Optional[QgsRectangle],
+        clip: bool,
+        transform_context: QgsCoordinateTransformContext,
+        feedback: QgsProcessingFeedback,
+    ) -> StyledLayer:
+        legend_shape = resource.shape if resource is not None else None
+        converter = StylesToAttributes(
+            layer,
+            layer.name(),
+            feedback,
+            primary_layer=resource.primary if resource is not None else False,
+            legend_shape=legend_shape if legend_shape != "automatic" else None,
+            bulk_classification=Settings.bulk_classification.get(),
+            rule_pushdown=(
+                Settings.rule_filter.get() == RuleFilterOptions.provider.value
+            ),
+            clip=clip,
+            batch_size=Settings.export_batch_size.get(),
+        )
+
+        extent_crs = QgsCoordinateReferenceSystem("EPSG:4326")
+        if extent is not None and extent_crs != layer.crs():
+            extent = QgsCoordinateTransform(
+                extent_crs, layer.crs(), transform_context
+            ).transformBoundingBox(extent)
+
+        with GeoJsonWriter(
+            geojson_path,
+            converter.fields,
+            layer.sourceCrs(),
+            transform_context,
+            name=layer.name(),
+        ) as writer:
+            converter.extract_styles_to_layer(writer, extent)
+
+        return StyledLayer(
+            layer.name(),
+            layer.id(),
+            list(converter.legend.values()),
+            converter.style_type,
+            geojson_path=geojson_path,
+            metadata=layer.metadata(),
+        )
@@ -20,6 +20,7 @@
 from qgis.core import QgsProcessingProvider
 
 from .algorithms import StyleToAttributesAlg
+from .export_algorithm import ExportDataPackageAlg
 
 
 class SpatialDataPackageProcessingProvider(QgsProcessingProvider):
@@ -29,7 +30,7 @@ class SpatialDataPackageProcessingProvider(QgsProcessingProvider):
         QgsProcessingProvider.__init__(self)
 
     def loadAlgorithms(self) -> None:  # noqa: N802
-        for alg in [StyleToAttributesAlg()]:
+        for alg in [StyleToAttributesAlg(), ExportDataPackageAlg()]:
             self.addAlgorithm(alg)
 
     def id(self) -> str:
@@ -0,0 +1,113 @@
+#  Gispo Ltd., hereby disclaims all copyright interest in the program
+#  SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from ...qgis_plugin_tools.tools.resources import plugin_name
+
+LOGGER = logging.getLogger(plugin_name())
+
+
+class ScheduledJob:
+    def __init__(
+        self,
+        key: Any,
+        start: Callable[[], None],
+        cost: float = 0.0,
+        memory: float = 0.0,
+        lane: Optional[str] = None,
+    ) -> None:
+        """
+        :param key: Unique key of the job
+        :param start: Starts the job, the job must report back with
+            JobScheduler.job_finished when it is done
+        :param cost: Estimated cost of the job, costlier jobs are started first
+        :param memory: Estimated peak memory usage of the job in bytes
+        :param lane: Jobs in the same lane are never run concurrently
+        """
+        self.key = key
+        self.start = start
+        self.cost = cost
+        self.memory = memory
+        self.lane = lane
+
+
+class JobScheduler:
+    """
+    Runs jobs concurrently in the order of their estimated cost.
+
+    At most `max_parallel` jobs are running at once and a job is started only if
+    the estimated memory usage of the running jobs stays below `memory_limit`.
+    Jobs sharing a lane, for example layers in the same non-thread-safe data
+    source, are run sequentially. A job is always started if nothing else is
+    running, so that a single job exceeding the memory limit is not blocked.
+    """
+
+    def __init__(
+        self,
+        jobs: List[ScheduledJob],
+        max_parallel: int = 1,
+        memory_limit: Optional[float] = None,
+    ) -> None:
+        self.pending: List[ScheduledJob] = sorted(
+            jobs, key=lambda job: job.cost, reverse=True
+        )
+        self.running: Dict[Any, ScheduledJob] = {}
+        self.max_parallel = max(1, max_parallel)
+        self.memory_limit = memory_limit
+
+    @property
+    def finished(self) -> bool:
+        return not self.pending and not self.running
+
+    def start(self) -> None:
+        self._schedule()
+
+    def job_finished(self, key: Any) -> None:
+        """Marks the job as finished and starts the next jobs"""
+        if self.running.pop(key, None) is not None:
+            self._schedule()
+
+    def _schedule(self) -> None:
+        for job in list(self.pending):
+            if len(self.running) >= self.max_parallel:
+                break
+            if job not in self.pending or not self._can_start(job):
+                continue
+            self.pending.remove(job)
+            self.running[job.key] = job
+            LOGGER.debug(
+                f"Starting job {job.key} with estimated cost {job.cost:.0f}, "
+                f"{len(self.running)} jobs running and {len(self.pending)} pending"
+            )
+            job.start()
+
+    def _can_start(self, job: ScheduledJob) -> bool:
+        if not self.running:
+            return True
+        if job.lane is not None and any(
+            running.lane == job.lane for running in self.running.values()
+        ):
+            return False
+        if self.memory_limit is not None:
+            memory = sum(running.memory for running in self.running.values())
+            if memory + job.memory > self.memory_limit:
+                return False
+        return True
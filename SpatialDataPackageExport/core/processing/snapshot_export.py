@@ -0,0 +1,315 @@
+#  Gispo Ltd., hereby disclaims all copyright interest in the program
+#  SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from qgis.core import QgsFeedback, QgsProject
+
+from ...definitions.configurable_settings import (
+    ResourceFormatOptions,
+    RuleFilterOptions,
+    Settings,
+)
+from ...model.config import Config, SnapshotConfig
+from ...model.snapshot import Legend
+from ...model.styled_layer import StyledLayer
+from ...qgis_plugin_tools.tools.i18n import tr
+from ...qgis_plugin_tools.tools.resources import plugin_name
+from ..datapackage import DataPackageHandler
+from ..geoparquet_writer import is_available as geoparquet_available
+from ..resource_cache import ResourceCache
+from ..utils import datapackage_bounds_to_extent
+from .algorithms import StyleToAttributesAlg
+from .task_runner import layer_fingerprint
+from .worker_pool import LayerJob, LayerResult, WorkerPool, extent_parameter
+
+LOGGER = logging.getLogger(plugin_name())
+
+
+class SnapshotExportResult:
+    def __init__(self, name: str, output_file: Path) -> None:
+        self.name = name
+        self.output_file = output_file
+        self.layers: List[LayerResult] = []
+        self.error = ""
+        self.write_seconds = 0.0
+
+    @property
+    def successful(self) -> bool:
+        return not self.error and all(layer.successful for layer in self.layers)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Machine-readable summary with the timings in seconds"""
+        return {
+            "name": self.name,
+            "output": str(self.output_file),
+            "successful": self.successful,
+            "error": self.error,
+            "layers": [
+                {
+                    "name": layer.key[1],
+                    "successful": layer.successful,
+                    "cached": layer.cached,
+                    "error": layer.error,
+                    "seconds": round(layer.elapsed, 3),
+                }
+                for layer in self.layers
+            ],
+            "layer_seconds": round(sum(layer.elapsed for layer in self.layers), 3),
+            "write_seconds": round(self.write_seconds, 3),
+        }
+
+
+class SnapshotExporter:
+    """
+    Exports snapshot configurations without the GUI.
+
+    The layers of all snapshots are exported in a single worker pool, after which
+    the snapshots are written one by one from the exported GeoJSON files.
+    """
+
+    def __init__(
+        self,
+        project: QgsProject,
+        output_dir: Path,
+        processes: int = 1,
+        feedback: Optional[QgsFeedback] = None,
+        cache: Optional[ResourceCache] = None,
+        resource_format: Optional[str] = None,
+    ) -> None:
+        """
+        :param project: Project containing the layers of the snapshots
+        :param output_dir: Directory of the snapshot JSON files
+        :param processes: Number of worker processes
+        :param feedback: Feedback for cancellation
+        :param cache: Cache of the exported layers
+        :param resource_format: One of ResourceFormatOptions, defaults to the
+            setting
+        """
+        self.project = project
+        self.output_dir = output_dir
+        self.pool = WorkerPool(processes)
+        self.feedback = feedback
+        self.cache = cache
+        self.resource_format = (
+            resource_format
+            if resource_format is not None
+            else Settings.resource_format.get()
+        )
+        self._cache_keys: Dict[Any, str] = {}
+
+    def export(self, configs: Dict[str, Config]) -> List[SnapshotExportResult]:
+        """
+        :param configs: Configurations by snapshot name
+        :return: Results in the order of the configurations
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            results: Dict[str, SnapshotExportResult] = {}
+            jobs: List[LayerJob] = []
+            for name, config in configs.items():
+                output_file = Path(self.output_dir, f"{name}.json")
+                result = SnapshotExportResult(name, output_file)
+                results[name] = result
+                try:
+                    jobs += self._create_jobs(name, config, Path(tmp_dir))
+                except ValueError as e:
+                    result.error = str(e)
+
+            layer_results = self._get_cached(jobs)
+            exported = self.pool.run(
+                [job for job in jobs if job.key not in layer_results], self.feedback
+            )
+            for layer_result in exported:
+                self._store_in_cache(layer_result)
+                layer_results[layer_result.key] = layer_result
+            for job in jobs:
+                layer_result = layer_results[job.key]
+                results[layer_result.key[0]].layers.append(layer_result)
+
+            for name, config in configs.items():
+                result = results[name]
+                if not result.successful:
+                    LOGGER.error(tr("Exporting snapshot {} failed", name))
+                    continue
+                start = time.perf_counter()
+                try:
+                    self._write_snapshot(result, config)
+                except Exception as e:
+                    result.error = str(e)
+                result.write_seconds = time.perf_counter() - start
+            return list(results.values())
+
+    def _create_jobs(self, name: str, config: Config, tmp_dir: Path) -> List[LayerJob]:
+        snapshot_config = self._get_snapshot_config(name, config)
+        extent = (
+            extent_parameter(datapackage_bounds_to_extent(snapshot_config.bounds))
+            if snapshot_config.crop_layers and snapshot_config.bounds
+            else None
+        )
+        jobs = []
+        for i, resource in enumerate(snapshot_config.resources or []):
+            layer = self._get_layer(resource.name)
+            parameters = {
+                StyleToAttributesAlg.NAME: resource.name,
+                StyleToAttributesAlg.EXTENT: extent,
+                StyleToAttributesAlg.PRIMARY: resource.primary,
+                StyleToAttributesAlg.LEGEND_SHAPE: resource.shape,
+                StyleToAttributesAlg.CLIP: bool(extent and snapshot_config.clip_layers),
+                StyleToAttributesAlg.BULK_CLASSIFICATION: (
+                    Settings.bulk_classification.get()
+                ),
+                StyleToAttributesAlg.RULE_PUSHDOWN: (
+                    Settings.rule_filter.get() == RuleFilterOptions.provider.value
+                ),
+                StyleToAttributesAlg.BATCH_SIZE: Settings.export_batch_size.get(),
+                StyleToAttributesAlg.OUTPUT_GEOJSON: str(
+                    Path(tmp_dir, f"{name}-{i}.geojson")
+                ),
+            }
+            if self.resource_format == ResourceFormatOptions.flatgeobuf.value:
+                # Written from the styled features instead of the GeoJSON file
+                parameters[StyleToAttributesAlg.OUTPUT_FLATGEOBUF] = str(
+                    Path(tmp_dir, f"{name}-{i}.fgb")
+                )
+            elif (
+                self.resource_format == ResourceFormatOptions.geoparquet.value
+                and geoparquet_available()
+            ):
+                parameters[StyleToAttributesAlg.OUTPUT_GEOPARQUET] = str(
+                    Path(tmp_dir, f"{name}-{i}.parquet")
+                )
+            key = (name, resource.name)
+            if self.cache is not None:
+                cache_key = layer_fingerprint(layer, extent, parameters)
+                if cache_key is not None:
+                    self._cache_keys[key] = cache_key
+            jobs.append(LayerJob.from_layer(key, layer, parameters))
+        return jobs
+
+    def _get_cached(self, jobs: List[LayerJob]) -> Dict[Any, LayerResult]:
+        """Gets the results of the jobs found in the cache"""
+        results: Dict[Any, LayerResult] = {}
+        if self.cache is None:
+            return results
+        for job in jobs:
+            # Only the GeoJSON output is cached, the other outputs must be written
+            if (
+                StyleToAttributesAlg.OUTPUT_FLATGEOBUF in job.parameters
+                or StyleToAttributesAlg.OUTPUT_GEOPARQUET in job.parameters
+            ):
+                continue
+            cache_key = self._cache_keys.get(job.key)
+            resource = self.cache.get(cache_key) if cache_key is not None else None
+            if resource is None:
+                continue
+            output_file = job.parameters[StyleToAttributesAlg.OUTPUT_GEOJSON]
+            self.cache.copy_to(resource, Path(output_file))
+            results[job.key] = LayerResult(
+                job.key,
+                True,
+                {
+                    StyleToAttributesAlg.OUTPUT_GEOJSON: output_file,
+                    StyleToAttributesAlg.OUTPUT_LEGEND: resource.legend,
+                    StyleToAttributesAlg.OUTPUT_STYLE_TYPE: resource.style_type,
+                },
+                cached=True,
+            )
+        return results
+
+    def _store_in_cache(self, layer_result: LayerResult) -> None:
+        cache_key = self._cache_keys.get(layer_result.key)
+        if self.cache is None or cache_key is None or not layer_result.successful:
+            return
+        output = layer_result.results
+        self.cache.put(
+            cache_key,
+            Path(output[StyleToAttributesAlg.OUTPUT_GEOJSON]),
+            output[StyleToAttributesAlg.OUTPUT_LEGEND],
+            output[StyleToAttributesAlg.OUTPUT_STYLE_TYPE],
+        )
+
+    def _write_snapshot(self, result: SnapshotExportResult, config: Config) -> None:
+        snapshot_config = self._get_snapshot_config(result.name, config)
+        styled_layers = []
+        for layer_result in result.layers:
+            _, layer_name = layer_result.key
+            output = layer_result.results
+            # Layers found in the cache have only the GeoJSON file
+            flatgeobuf_path = output.get(StyleToAttributesAlg.OUTPUT_FLATGEOBUF)
+            geoparquet_path = output.get(StyleToAttributesAlg.OUTPUT_GEOPARQUET)
+            styled_layers.append(
+                StyledLayer(
+                    layer_name,
+                    self._get_layer(layer_name).id(),
+                    [
+                        Legend.from_dict(legend)
+                        for legend in output[StyleToAttributesAlg.OUTPUT_LEGEND]
+                    ],
+                    output[StyleToAttributesAlg.OUTPUT_STYLE_TYPE],
+                    geojson_path=Path(output[StyleToAttributesAlg.OUTPUT_GEOJSON]),
+                    flatgeobuf_path=Path(flatgeobuf_path) if flatgeobuf_path else None,
+                    geoparquet_path=Path(geoparquet_path) if geoparquet_path else None,
+                )
+            )
+        written = DataPackageHandler.create(config).write_snapshot(
+            result.output_file,
+            result.name,
+            snapshot_config,
+            styled_layers,
+            snapshot_config.licenses[0] if snapshot_config.licenses else None,
+            self.feedback,
+            self.resource_format,
+        )
+        if not written:
+            result.error = tr("Canceled")
+
+    def _get_layer(self, name: str) -> Any:
+        layers = self.project.mapLayersByName(name)
+        if not layers:
+            raise ValueError(tr("There is no layer named {} in the project.", name))
+        return layers[0]
+
+    @staticmethod
+    def _get_snapshot_config(name: str, config: Config) -> SnapshotConfig:
+        snapshot_config = config.get_snapshot_config()
+        if snapshot_config is None:
+            raise ValueError(
+                tr("Configuration {} does not contain any snapshots", name)
+            )
+        return snapshot_config
+
+
+def select_configs(
+    configs: Dict[str, Config], names: Optional[List[str]] = None
+) -> Tuple[Dict[str, Config], List[str]]:
+    """
+    :param configs: Available configurations by snapshot name
+    :param names: Names of the snapshots to select, all if empty
+    :return: Selected configurations and the names that were not found
+    """
+    if not names:
+        return dict(configs), []
+    return (
+        {name: configs[name] for name in names if name in configs},
+        [name for name in names if name not in configs],
+    )
@@ -0,0 +1,167 @@
+#  Gispo Ltd., hereby disclaims all copyright interest in the program
+#  SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+import logging
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from qgis.core import (
+    QgsApplication,
+    QgsFeatureRequest,
+    QgsFeedback,
+    QgsLayerMetadata,
+    QgsProject,
+    QgsTask,
+    QgsVectorLayer,
+)
+from qgis.PyQt.QtXml import QDomDocument
+
+from ...model.snapshot import Snapshot
+from ...model.styled_layer import StyledLayer
+from ...qgis_plugin_tools.tools.custom_logging import bar_msg
+from ...qgis_plugin_tools.tools.i18n import tr
+from ...qgis_plugin_tools.tools.resources import plugin_name
+from ..datapackage import DataPackageHandler
+
+LOGGER = logging.getLogger(plugin_name())
+
+
+class OutputLayer:
+    """
+    Styled output layer of an exported layer, added to the project once the
+    snapshot has been written
+    """
+
+    def __init__(
+        self,
+        input_layer: QgsVectorLayer,
+        name: str,
+        path: Optional[Path] = None,
+        layer: Optional[QgsVectorLayer] = None,
+        materialize: bool = False,
+    ) -> None:
+        """
+        Must be created on the main thread
+        :param input_layer: Layer the style and metadata are copied from
+        :param name: Name of the output layer
+        :param path: GeoJSON or FlatGeobuf file to load the output layer from
+        :param layer: Already loaded output layer, owned by the main thread
+        :param materialize: Whether to copy the file into a memory layer
+        """
+        self.name = name
+        self.path = path
+        self.layer = layer
+        self.materialize = materialize
+        self.metadata: QgsLayerMetadata = input_layer.metadata()
+        self.style = QDomDocument()
+        msg = input_layer.exportNamedStyle(self.style)
+        if msg:
+            LOGGER.error(tr("Could not load style"), extra=bar_msg(msg))
+            self.style = None
+        self._styled = False
+
+    def load(self) -> None:
+        """Loads and styles the layer from the file in the current thread"""
+        if self.layer is not None or self.path is None:
+            return
+        self.layer = QgsVectorLayer(str(self.path), self.name)
+        if self.materialize and self.layer.isValid():
+            self.layer = self.layer.materialize(QgsFeatureRequest())
+            self.layer.setName(self.name)
+        self._apply_style()
+        self.layer.moveToThread(QgsApplication.instance().thread())
+
+    def add_to_project(self) -> None:
+        """Adds the layer to the project, must be called on the main thread"""
+        if self.layer is None:
+            return
+        if not self.layer.isValid():
+            LOGGER.warning(tr("Output layer {} is not valid", self.name))
+            return
+        self._apply_style()
+        QgsProject.instance().addMapLayer(self.layer)
+
+    def _apply_style(self) -> None:
+        if self._styled or not self.layer.isValid():
+            return
+        if self.style is not None:
+            succeeded, msg = self.layer.importNamedStyle(self.style)
+            if not succeeded:
+                LOGGER.error(tr("Could not load style"), extra=bar_msg(msg))
+        self.layer.setMetadata(self.metadata)
+        self._styled = True
+
+
+class SnapshotTask(QgsTask):
+    """
+    Loads the output layers and writes the snapshot in a background thread.
+
+    Only adding the output layers to the project is done in finished, which is
+    run on the main thread.
+    """
+
+    def __init__(
+        self,
+        output_file: Path,
+        snapshot: Snapshot,
+        styled_layers: List[StyledLayer],
+        output_layers: List[OutputLayer],
+        completed: Callable[[bool, Optional[Exception]], None],
+    ) -> None:
+        """
+        :param output_file: Path of the snapshot JSON file
+        :param snapshot: Snapshot created on the main thread without inline data
+        :param styled_layers: Layers of the snapshot with GeoJSON files
+        :param output_layers: Layers to add to the project
+        :param completed: Called on the main thread with the result and the
+            exception raised while running
+        """
+        super().__init__(tr("Writing snapshot {}", snapshot.name), QgsTask.CanCancel)
+        self.output_file = output_file
+        self.snapshot = snapshot
+        self.styled_layers = styled_layers
+        self.output_layers = output_layers
+        self.completed = completed
+        self.exception: Optional[Exception] = None
+        self.feedback = QgsFeedback()
+        # noinspection PyUnresolvedReferences
+        self.feedback.progressChanged.connect(self.setProgress)
+
+    def cancel(self) -> None:
+        self.feedback.cancel()
+        super().cancel()
+
+    def run(self) -> bool:
+        try:
+            for output_layer in self.output_layers:
+                if self.isCanceled():
+                    return False
+                output_layer.load()
+            return DataPackageHandler.stream_snapshot(
+                self.output_file, self.snapshot, self.styled_layers, self.feedback
+            )
+        except Exception as e:
+            self.exception = e
+            return False
+
+    def finished(self, result: bool) -> None:
+        if result:
+            for output_layer in self.output_layers:
+                output_layer.add_to_project()
+        self.completed(result, self.exception)
@@ -17,21 +17,76 @@
 #
 #  You should have received a copy of the GNU General Public License
 #  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+import logging
+import os
 import uuid
 from functools import partial
-from typing import Any, Callable, Dict, List, Optional
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 from qgis.core import (
     QgsApplication,
+    QgsCoordinateReferenceSystem,
+    QgsCoordinateTransform,
+    QgsFeatureRequest,
+    QgsFields,
     QgsProcessingAlgRunnerTask,
     QgsProcessingContext,
     QgsProcessingFeedback,
+    QgsProject,
+    QgsReadWriteContext,
     QgsRectangle,
+    QgsTask,
     QgsVectorLayer,
 )
+from qgis.PyQt.QtXml import QDomDocument
 
+from ...definitions.configurable_settings import ExportModeOptions, Settings
+from ...qgis_plugin_tools.tools.i18n import tr
+from ...qgis_plugin_tools.tools.resources import plugin_name
+from ..change_tracker import (
+    ChangeTracker,
+    FeatureCache,
+    IncrementalExporter,
+    data_version,
+)
+from ..layer_snapshot import LayerSnapshot
+from ..resource_cache import ResourceCache, fingerprint
+from ..styles2attributes import StylesToAttributes
+from ..utils import file_versions
 from .algorithms import StyleToAttributesAlg
 from .provider import SpatialDataPackageProcessingProvider
+from .scheduler import JobScheduler, ScheduledJob
+from .worker_pool import (
+    LayerJob,
+    LayerResult,
+    WorkerPool,
+    extent_parameter,
+    is_readable_by_uri,
+)
+
+LOGGER = logging.getLogger(plugin_name())
+
+COST_SAMPLE_SIZE = 50
+BYTES_PER_VERTEX = 48
+BYTES_PER_FEATURE = 1024
+FILE_PROVIDERS = ("ogr", "spatialite", "delimitedtext", "gpx", "virtual")
+# Parameters not affecting the exported resource or fingerprinted separately
+NON_OUTPUT_PARAMS = (
+    "INPUT",
+    "EXTENT",
+    "OUTPUT",
+    "OUTPUT_GEOJSON",
+    "OUTPUT_FLATGEOBUF",
+    "OUTPUT_GEOPARQUET",
+    "BATCH_SIZE",
+    "THREAD_SAFE_SOURCE",
+    "WORKERS",
+)
+
+# Schedulers and tasks are kept alive until all of their tasks have finished
+_schedulers: List[JobScheduler] = []
+_incremental_tasks: List[QgsTask] = []
 
 
 class TaskWrapper:
@@ -48,10 +103,19 @@ class TaskWrapper:
         extent: Optional[QgsRectangle],
         primary: bool,
         legend_shape: str,
-        output: str,
+        output: Optional[str],
         feedback: QgsProcessingFeedback,
         context: QgsProcessingContext,
         executed: Callable,
+        bulk_classification: bool = False,
+        rule_pushdown: bool = False,
+        clip: bool = False,
+        batch_size: int = 1000,
+        geojson_output: Optional[str] = None,
+        flatgeobuf_output: Optional[str] = None,
+        geoparquet_output: Optional[str] = None,
+        thread_safe_source: bool = False,
+        workers: int = 1,
     ) -> None:
         self.id = id
         self.layer = layer
@@ -63,30 +127,296 @@ class TaskWrapper:
         self.feedback = feedback
         self.context = context
         self.executed = executed
+        self.bulk_classification = bulk_classification
+        self.rule_pushdown = rule_pushdown
+        self.clip = clip
+        self.batch_size = batch_size
+        self.geojson_output = geojson_output
+        self.flatgeobuf_output = flatgeobuf_output
+        self.geoparquet_output = geoparquet_output
+        self.thread_safe_source = thread_safe_source
+        self.workers = workers
 
     @property
     def params(self) -> Dict[str, Any]:
-        return {
+        params = {
             "EXTENT": self.extent,
             "INPUT": self.layer,
             "NAME": self.name,
             "PRIMARY": self.primary,
             "LEGEND_SHAPE": self.legend_shape,
-            "OUTPUT": self.output,
+            "BULK_CLASSIFICATION": self.bulk_classification,
+            "RULE_PUSHDOWN": self.rule_pushdown,
+            "CLIP": self.clip,
+            "BATCH_SIZE": self.batch_size,
+            "THREAD_SAFE_SOURCE": self.thread_safe_source,
+            "WORKERS": self.workers,
         }
+        if self.output is not None:
+            params["OUTPUT"] = self.output
+        if self.geojson_output is not None:
+            params["OUTPUT_GEOJSON"] = self.geojson_output
+        if self.flatgeobuf_output is not None:
+            params["OUTPUT_FLATGEOBUF"] = self.flatgeobuf_output
+        if self.geoparquet_output is not None:
+            params["OUTPUT_GEOPARQUET"] = self.geoparquet_output
+        return params
+
+    @property
+    def has_extra_outputs(self) -> bool:
+        """Whether the layer is exported to other files besides GeoJSON"""
+        return self.flatgeobuf_output is not None or self.geoparquet_output is not None
 
     def __str__(self) -> str:
         return str(self.params)
 
 
-def create_styles_to_attributes_tasks(
-    task_wrappers: List[TaskWrapper], completed: Callable
+def estimate_cost(layer: QgsVectorLayer) -> float:
+    """
+    Estimates the cost of exporting the layer as the feature count multiplied by
+    the average vertex count of a sample of features
+    """
+    vertex_counts = [
+        f.geometry().constGet().nCoordinates() if f.hasGeometry() else 0
+        for f in layer.getFeatures(
+            QgsFeatureRequest().setNoAttributes().setLimit(COST_SAMPLE_SIZE)
+        )
+    ]
+    average = sum(vertex_counts) / len(vertex_counts) if vertex_counts else 0
+    return max(0, layer.featureCount()) * max(1.0, average)
+
+
+def estimate_memory(layer: QgsVectorLayer, cost: float) -> float:
+    """Estimates the peak memory usage of exporting the layer in bytes"""
+    return cost * BYTES_PER_VERTEX + max(0, layer.featureCount()) * BYTES_PER_FEATURE
+
+
+def source_lane(
+    layer: QgsVectorLayer, thread_safe_source: bool = False
+) -> Optional[str]:
+    """
+    Layers reading the same file are exported sequentially, since the file based
+    providers share connections that are not thread-safe. Exports of the same
+    layer are sequential too, unless they read from snapshots of the layer.
+    """
+    provider = layer.providerType()
+    if provider in FILE_PROVIDERS:
+        return f"{provider}:{layer.source().split('|')[0]}"
+    return None if thread_safe_source else layer.id()
+
+
+def layer_fingerprint(
+    layer: QgsVectorLayer,
+    extent: Union[QgsRectangle, str, None],
+    parameters: Dict[str, Any],
+    include_data: bool = True,
+) -> Optional[str]:
+    """
+    Fingerprint of the exported resource of the layer, built from the data source
+    and its modification time, the fields including expression fields, the joins,
+    the renderer, the extent, the CRS and the export options. Layers with unsaved
+    edits and layers whose data, or the data of a joined layer, has no reliable
+    version stamp are not fingerprinted.
+    :param layer: Layer to export
+    :param extent: Extent in EPSG:4326
+    :param parameters: Parameters of StyleToAttributesAlg
+    :param include_data: Whether to include the version of the data, otherwise
+        the fingerprint covers only the style and the options and layers with
+        unsaved edits are fingerprinted too
+    """
+    if (include_data and layer.isModified()) or layer.renderer() is None:
+        return None
+
+    source = layer.source()
+    data_version: Any = None
+    if include_data:
+        data_version = [data_file_versions(layer)] + [
+            data_file_versions(join.joinLayer()) for join in layer.vectorJoins()
+        ]
+        # Attribute edits in databases or remote sources change neither the
+        # feature count nor the extent, so their changes can not be detected
+        if None in data_version:
+            return None
+
+    fields = layer.fields()
+    field_definitions = [
+        [
+            field.name(),
+            field.typeName(),
+            layer.expressionField(i)
+            if fields.fieldOrigin(i) == QgsFields.OriginExpression
+            else None,
+        ]
+        for i, field in enumerate(fields)
+    ]
+    joins = [
+        [
+            join.joinLayerId(),
+            join.joinFieldName(),
+            join.targetFieldName(),
+            join.prefix(),
+        ]
+        for join in layer.vectorJoins()
+    ]
+
+    renderer = QDomDocument()
+    renderer.appendChild(layer.renderer().save(renderer, QgsReadWriteContext()))
+    if isinstance(extent, QgsRectangle):
+        extent = extent.toString(12)
+    return fingerprint(
+        {
+            "provider": layer.providerType(),
+            "source": source,
+            "data_version": data_version,
+            "fields": field_definitions,
+            "joins": joins,
+            "renderer": renderer.toString(),
+            "extent": extent,
+            "crs": layer.crs().toWkt(),
+            "options": {
+                key: value
+                for key, value in parameters.items()
+                if key not in NON_OUTPUT_PARAMS
+            },
+        }
+    )
+
+
+def data_file_versions(
+    layer: Optional[QgsVectorLayer],
+) -> Optional[List[Tuple[str, int, int]]]:
+    """
+    Versions of the files of the layer, None if the layer is not read from a file
+    or has unsaved edits
+    """
+    if layer is None or layer.isModified():
+        return None
+    path = layer.source().split("|")[0]
+    if layer.providerType() not in FILE_PROVIDERS or not os.path.isfile(path):
+        return None
+    return file_versions(path)
+
+
+def create_resource_cache() -> Optional[ResourceCache]:
+    """Creates the resource cache if it is enabled in the settings"""
+    max_size = Settings.resource_cache_size.get()
+    if max_size <= 0:
+        return None
+    cache_dir = Path(QgsApplication.qgisSettingsDirPath(), plugin_name(), "cache")
+    return ResourceCache(cache_dir, max_size * 1024 * 1024)
+
+
+def apply_resource_cache(
+    task_wrappers: List[TaskWrapper], cache: ResourceCache, completed: Callable
+) -> List[TaskWrapper]:
+    """
+    Reports the layers found in the cache as exported right away and makes the
+    rest store their results in the cache once exported
+    :param task_wrappers: Parameters of the exports with GeoJSON outputs
+    :param cache: Resource cache
+    :param completed: Called after each layer found in the cache
+    :return: Task wrappers of the layers that need to be exported
+    """
+    misses = []
+    for task_wrapper in task_wrappers:
+        key = layer_fingerprint(
+            task_wrapper.layer, task_wrapper.extent, task_wrapper.params
+        )
+        # Only the GeoJSON output is cached
+        if (
+            key is None
+            or task_wrapper.geojson_output is None
+            or task_wrapper.has_extra_outputs
+        ):
+            misses.append(task_wrapper)
+            continue
+
+        resource = cache.get(key)
+        if resource is None:
+            task_wrapper.executed = partial(
+                _store_in_cache, cache, key, task_wrapper.executed
+            )
+            misses.append(task_wrapper)
+            continue
+
+        LOGGER.info(tr("Using the cached export of {}", task_wrapper.name))
+        cache.copy_to(resource, Path(task_wrapper.geojson_output))
+        task_wrapper.executed(
+            task_wrapper.layer,
+            task_wrapper.context,
+            task_wrapper.id,
+            True,
+            {
+                "OUTPUT_GEOJSON": task_wrapper.geojson_output,
+                "OUTPUT_LEGEND": resource.legend,
+                "OUTPUT_STYLE_TYPE": resource.style_type,
+            },
+        )
+        completed()
+    return misses
+
+
+def _store_in_cache(
+    cache: ResourceCache,
+    key: str,
+    executed: Callable,
+    layer: QgsVectorLayer,
+    context: QgsProcessingContext,
+    id: uuid.UUID,
+    successful: bool,
+    results: Dict[str, Any],
 ) -> None:
-    tasks = []
+    if successful and results.get("OUTPUT_GEOJSON"):
+        cache.put(
+            key,
+            Path(results["OUTPUT_GEOJSON"]),
+            results["OUTPUT_LEGEND"],
+            results["OUTPUT_STYLE_TYPE"],
+        )
+    executed(layer, context, id, successful, results)
+
+
+def create_styles_to_attributes_tasks(
+    task_wrappers: List[TaskWrapper],
+    completed: Callable,
+    max_parallel: int = 1,
+    memory_limit: Optional[float] = None,
+    tracker: Optional[ChangeTracker] = None,
+) -> JobScheduler:
+    """
+    Creates processing tasks for the layers and schedules them to the task
+    manager, at most max_parallel at a time
+    :param task_wrappers: Parameters of the tasks
+    :param completed: Called when each task is completed
+    :param max_parallel: Maximum number of concurrent tasks
+    :param memory_limit: Maximum estimated memory usage of concurrent tasks in MB
+    :param tracker: Tracker of the changes in the exported layers. Layers
+        supporting it are exported incrementally.
+    :return: Scheduler of the tasks, the reference must be kept until the tasks
+        are finished
+    """
     if len(task_wrappers) == 0:
         # TODO: custom execption
         raise ValueError()
+
+    jobs = []
     for task_wrapper in task_wrappers:
+        if tracker is not None and supports_incremental_export(task_wrapper):
+            cost = estimate_cost(task_wrapper.layer)
+            jobs.append(
+                ScheduledJob(
+                    task_wrapper.id,
+                    partial(
+                        _start_incremental_export, task_wrapper, tracker, completed
+                    ),
+                    cost=cost,
+                    memory=estimate_memory(task_wrapper.layer, cost),
+                    # The features are read from a snapshot of the layer
+                    lane=source_lane(task_wrapper.layer, thread_safe_source=True),
+                )
+            )
+            continue
+
         alg = QgsApplication.processingRegistry().algorithmById(
             f"{SpatialDataPackageProcessingProvider.ID}:{StyleToAttributesAlg.ID}"
         )
@@ -105,10 +435,293 @@ def create_styles_to_attributes_tasks(
         )
         # noinspection PyUnresolvedReferences
         task.taskCompleted.connect(completed)
-        tasks.append(task)
+        # noinspection PyUnresolvedReferences
+        task.taskCompleted.connect(partial(_job_finished, task_wrapper.id))
+        # noinspection PyUnresolvedReferences
+        task.taskTerminated.connect(partial(_job_finished, task_wrapper.id))
+
+        cost = estimate_cost(task_wrapper.layer)
+        jobs.append(
+            ScheduledJob(
+                task_wrapper.id,
+                partial(QgsApplication.taskManager().addTask, task),
+                cost=cost,
+                memory=estimate_memory(task_wrapper.layer, cost),
+                lane=source_lane(
+                    task_wrapper.layer,
+                    task_wrapper.thread_safe_source or task_wrapper.workers > 1,
+                ),
+            )
+        )
+
+    scheduler = JobScheduler(
+        jobs,
+        max_parallel=max_parallel,
+        memory_limit=memory_limit * 1024 * 1024 if memory_limit else None,
+    )
+    _schedulers.append(scheduler)
+    scheduler.start()
+    return scheduler
+
 
-    main_task = tasks[0]
-    for i in range(1, len(tasks)):
-        main_task.addSubTask(tasks[i])
+def _job_finished(id: uuid.UUID) -> None:
+    for scheduler in list(_schedulers):
+        scheduler.job_finished(id)
+        if scheduler.finished:
+            _schedulers.remove(scheduler)
 
-    QgsApplication.taskManager().addTask(main_task)
+
+def supports_process_export(task_wrapper: TaskWrapper) -> bool:
+    """Whether the layer can be exported in a worker process"""
+    return task_wrapper.geojson_output is not None and is_readable_by_uri(
+        task_wrapper.layer
+    )
+
+
+def start_exports(
+    task_wrappers: List[TaskWrapper],
+    completed: Callable,
+    tracker: Optional[ChangeTracker] = None,
+) -> Optional["ProcessPoolExportTask"]:
+    """
+    Starts the exports of the layers with the export mode of the settings. Layers
+    exported incrementally and layers the worker processes can not read are
+    exported in processing tasks.
+    :param task_wrappers: Parameters of the exports
+    :param completed: Called when each layer or the worker pool is completed
+    :param tracker: Tracker of the changes in the exported layers
+    :return: Task of the worker processes, the reference must be kept until the
+        task is finished
+    """
+    process_task = None
+    if Settings.export_mode.get() == ExportModeOptions.processes.value:
+        in_processes = [
+            task_wrapper
+            for task_wrapper in task_wrappers
+            if not (tracker is not None and supports_incremental_export(task_wrapper))
+            and supports_process_export(task_wrapper)
+        ]
+        task_wrappers = [
+            task_wrapper
+            for task_wrapper in task_wrappers
+            if task_wrapper not in in_processes
+        ]
+        if in_processes:
+            process_task = ProcessPoolExportTask(
+                in_processes, completed, Settings.parallel_exports.get()
+            )
+            QgsApplication.taskManager().addTask(process_task)
+    if task_wrappers:
+        create_styles_to_attributes_tasks(
+            task_wrappers,
+            completed=completed,
+            max_parallel=Settings.parallel_exports.get(),
+            memory_limit=Settings.export_memory_limit.get(),
+            tracker=tracker,
+        )
+    return process_task
+
+
+def create_layer_job(task_wrapper: TaskWrapper) -> LayerJob:
+    """
+    Creates a job for a worker process reading the layer by its URI. Must be
+    called on the main thread.
+    """
+    if task_wrapper.geojson_output is None:
+        raise ValueError(tr("Worker processes can only write GeoJSON output"))
+    params = task_wrapper.params
+    del params["INPUT"]
+    params.pop("OUTPUT", None)
+    # Threads are not shared between the processes
+    params["THREAD_SAFE_SOURCE"] = False
+    params["WORKERS"] = 1
+    if task_wrapper.extent is not None:
+        params["EXTENT"] = extent_parameter(task_wrapper.extent)
+    return LayerJob.from_layer(task_wrapper.id, task_wrapper.layer, params)
+
+
+class ProcessPoolExportTask(QgsTask):
+    """
+    Exports the layers in a pool of standalone QGIS processes. The results are
+    reported to the executed callbacks of the task wrappers on the main thread,
+    like with the processing tasks.
+    """
+
+    def __init__(
+        self, task_wrappers: List[TaskWrapper], completed: Callable, processes: int
+    ) -> None:
+        """
+        Must be created on the main thread
+        :param task_wrappers: Parameters of the exports, with GeoJSON outputs
+        :param completed: Called when the layers are exported
+        :param processes: Number of worker processes
+        """
+        super().__init__(tr("Exporting layers"), QgsTask.CanCancel)
+        self.task_wrappers = task_wrappers
+        self.completed = completed
+        self.jobs = [create_layer_job(task_wrapper) for task_wrapper in task_wrappers]
+        self.pool = WorkerPool(processes)
+        self.results: List[LayerResult] = []
+        self.exception: Optional[Exception] = None
+        self.feedback = QgsProcessingFeedback()
+        # noinspection PyUnresolvedReferences
+        self.feedback.progressChanged.connect(self.setProgress)
+
+    def cancel(self) -> None:
+        self.feedback.cancel()
+        super().cancel()
+
+    def run(self) -> bool:
+        try:
+            self.results = self.pool.run(self.jobs, self.feedback)
+        except Exception as e:
+            self.exception = e
+            return False
+        return all(result.successful for result in self.results)
+
+    def finished(self, result: bool) -> None:
+        results = {job_result.key: job_result for job_result in self.results}
+        for task_wrapper in self.task_wrappers:
+            job_result = results.get(task_wrapper.id)
+            if job_result is None:
+                # The pool failed or was canceled before exporting the layer
+                job_result = LayerResult(
+                    task_wrapper.id,
+                    False,
+                    error=(
+                        str(self.exception)
+                        if self.exception is not None
+                        else tr("Exporting {} was canceled", task_wrapper.name)
+                    ),
+                )
+            if not job_result.successful:
+                task_wrapper.feedback.reportError(job_result.error)
+            task_wrapper.executed(
+                task_wrapper.layer,
+                task_wrapper.context,
+                task_wrapper.id,
+                job_result.successful,
+                job_result.results,
+            )
+        self.completed()
+
+
+class IncrementalExportTask(QgsTask):
+    """
+    Exports a tracked layer to GeoJSON, styling only the features changed since
+    the previous export of the layer with the same style and options
+    """
+
+    def __init__(
+        self, task_wrapper: TaskWrapper, tracker: ChangeTracker, completed: Callable
+    ) -> None:
+        """
+        Must be created on the main thread
+        :param task_wrapper: Parameters of the export, with a GeoJSON output
+        :param tracker: Tracker of the changes in the exported layers
+        :param completed: Called when the layer is exported
+        """
+        super().__init__(tr("Exporting {}", task_wrapper.name), QgsTask.CanCancel)
+        self.task_wrapper = task_wrapper
+        self.tracker = tracker
+        self.completed = completed
+        self.feedback = task_wrapper.feedback
+
+        layer = task_wrapper.layer
+        key = layer_fingerprint(
+            layer, task_wrapper.extent, task_wrapper.params, include_data=False
+        )
+        # Track before taking the snapshot, so that no edit is missed
+        tracker.track(layer)
+        cached = tracker.get_cache(layer, key) if key is not None else None
+        changes = tracker.take_changes(layer)
+        self.cache = cached if cached is not None else FeatureCache(key or "", "")
+        self.cache.name = task_wrapper.name
+        self.fids = changes if cached is not None else None
+
+        self.cache.data_version = data_version(layer)
+        self.snapshot = LayerSnapshot(layer)
+        self.transform_context = QgsProject.instance().transformContext()
+        self.extent = task_wrapper.extent
+        extent_crs = QgsCoordinateReferenceSystem("EPSG:4326")
+        if self.extent is not None and extent_crs != layer.crs():
+            self.extent = QgsCoordinateTransform(
+                extent_crs, layer.crs(), self.transform_context
+            ).transformBoundingBox(self.extent)
+        # noinspection PyUnresolvedReferences
+        self.feedback.progressChanged.connect(self.setProgress)
+
+    def cancel(self) -> None:
+        self.feedback.cancel()
+        super().cancel()
+
+    def run(self) -> bool:
+        task_wrapper = self.task_wrapper
+        legend_shape = task_wrapper.legend_shape
+        converter = StylesToAttributes(
+            self.snapshot,
+            task_wrapper.name,
+            self.feedback,
+            primary_layer=task_wrapper.primary,
+            legend_shape=legend_shape if legend_shape != "automatic" else None,
+            bulk_classification=task_wrapper.bulk_classification,
+            rule_pushdown=task_wrapper.rule_pushdown,
+            clip=task_wrapper.clip,
+            batch_size=task_wrapper.batch_size,
+        )
+        exporter = IncrementalExporter(
+            self.snapshot, converter, self.transform_context, self.cache, self.fids
+        )
+        return exporter.export(
+            Path(task_wrapper.geojson_output), self.extent, self.feedback
+        )
+
+    def finished(self, result: bool) -> None:
+        task_wrapper = self.task_wrapper
+        results: Dict[str, Any] = {}
+        if result:
+            self.tracker.store(task_wrapper.layer, self.cache)
+            results = {
+                "OUTPUT_GEOJSON": task_wrapper.geojson_output,
+                "OUTPUT_LEGEND": self.cache.legend,
+                "OUTPUT_STYLE_TYPE": self.cache.style_type,
+            }
+        else:
+            # The changes taken for this export are lost, export fully next time
+            self.tracker.invalidate(task_wrapper.layer.id())
+        task_wrapper.executed(
+            task_wrapper.layer,
+            task_wrapper.context,
+            task_wrapper.id,
+            result,
+            results,
+        )
+        self.completed()
+
+
+def supports_incremental_export(task_wrapper: TaskWrapper) -> bool:
+    """
+    Whether the layer is small enough to be exported incrementally. Incremental
+    exports are disabled unless the maximum feature count is set.
+    """
+    max_features = Settings.incremental_max_features.get()
+    return (
+        max_features > 0
+        and task_wrapper.geojson_output is not None
+        and not task_wrapper.has_extra_outputs
+        and 0 <= task_wrapper.layer.featureCount() <= max_features
+    )
+
+
+def _start_incremental_export(
+    task_wrapper: TaskWrapper, tracker: ChangeTracker, completed: Callable
+) -> None:
+    # Created only when scheduled, so that the snapshot includes the latest edits
+    task = IncrementalExportTask(task_wrapper, tracker, completed)
+    _incremental_tasks.append(task)
+    for signal in (task.taskCompleted, task.taskTerminated):
+        # noinspection PyUnresolvedReferences
+        signal.connect(partial(_incremental_tasks.remove, task))
+        # noinspection PyUnresolvedReferences
+        signal.connect(partial(_job_finished, task_wrapper.id))
+    QgsApplication.taskManager().addTask(task)
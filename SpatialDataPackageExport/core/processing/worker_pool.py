@@ -0,0 +1,310 @@
+#  Gispo Ltd., hereby disclaims all copyright interest in the program
+#  SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from qgis.core import (
+    QgsApplication,
+    QgsFeedback,
+    QgsProcessingContext,
+    QgsProcessingFeedback,
+    QgsProject,
+    QgsRectangle,
+    QgsVectorLayer,
+)
+from qgis.PyQt.QtCore import QUrl
+from qgis.PyQt.QtXml import QDomDocument
+
+from ...qgis_plugin_tools.tools.i18n import tr
+from ...qgis_plugin_tools.tools.resources import plugin_name
+from .algorithms import StyleToAttributesAlg
+
+LOGGER = logging.getLogger(plugin_name())
+
+# Standalone QGIS application of a worker process
+_QGS_APP: Optional[QgsApplication] = None
+
+# Providers whose data a worker process can read by the URI of the layer
+DATABASE_PROVIDERS = ("postgres", "spatialite", "mssql", "oracle", "hana")
+FILE_BASED_PROVIDERS = ("ogr", "delimitedtext", "gpx")
+
+
+def is_readable_by_uri(layer: QgsVectorLayer) -> bool:
+    """
+    Whether a worker process reading the layer by its URI sees the same data.
+    Memory and virtual layers exist only in the current process and the unsaved
+    edits of a layer only in its edit buffer.
+    """
+    if layer.isModified():
+        return False
+    provider = layer.providerType()
+    if provider in DATABASE_PROVIDERS:
+        return True
+    if provider not in FILE_BASED_PROVIDERS:
+        return False
+    path = layer.source().split("|")[0]
+    if path.startswith("file:"):
+        path = QUrl(path).toLocalFile()
+    return os.path.isfile(path)
+
+
+class LayerJob:
+    """
+    Picklable description of a single layer export. The layer is read by its
+    URI in the worker and the resource is written to the GeoJSON output file of
+    the parameters.
+    """
+
+    def __init__(
+        self,
+        key: Any,
+        name: str,
+        uri: str,
+        provider: str,
+        style: str,
+        parameters: Dict[str, Any],
+    ) -> None:
+        """
+        :param key: Key of the job
+        :param name: Name of the layer
+        :param uri: Data source URI of the layer
+        :param provider: Data provider of the layer
+        :param style: QML style of the layer
+        :param parameters: Parameters of StyleToAttributesAlg without the input,
+            must contain OUTPUT_GEOJSON and only picklable values
+        """
+        self.key = key
+        self.name = name
+        self.uri = uri
+        self.provider = provider
+        self.style = style
+        self.parameters = parameters
+
+    @staticmethod
+    def from_layer(
+        key: Any, layer: QgsVectorLayer, parameters: Dict[str, Any]
+    ) -> "LayerJob":
+        """
+        Creates a job reading the layer by its URI with its current style. Must be
+        called on the thread owning the layer.
+        :raises ValueError: If the layer can not be read by its URI
+        """
+        if not is_readable_by_uri(layer):
+            raise ValueError(
+                tr("Layer {} can not be exported in a worker process", layer.name())
+            )
+        style = QDomDocument()
+        msg = layer.exportNamedStyle(style)
+        if msg:
+            raise ValueError(msg)
+        return LayerJob(
+            key,
+            layer.name(),
+            layer.source(),
+            layer.providerType(),
+            style.toString(),
+            parameters,
+        )
+
+
+class LayerResult:
+    def __init__(
+        self,
+        key: Any,
+        successful: bool,
+        results: Optional[Dict[str, Any]] = None,
+        error: str = "",
+        elapsed: float = 0.0,
+        cached: bool = False,
+    ) -> None:
+        self.key = key
+        self.successful = successful
+        self.results = results if results is not None else {}
+        self.error = error
+        self.elapsed = elapsed
+        self.cached = cached
+
+
+class JobFeedback(QgsProcessingFeedback):
+    def __init__(self) -> None:
+        super().__init__()
+        self.last_error = ""
+
+    def reportError(self, error: str, fatalError: bool = False) -> None:  # noqa
+        self.last_error = error
+        super().reportError(error, fatalError)
+
+
+def run_layer_job(job: LayerJob) -> LayerResult:
+    """
+    Exports the layer of the job with StyleToAttributesAlg. Run in a worker
+    process or in process as a fallback.
+    """
+    start = time.perf_counter()
+    try:
+        layer = QgsVectorLayer(job.uri, job.name, job.provider)
+        if not layer.isValid():
+            return LayerResult(job.key, False, error=tr("Invalid layer {}", job.uri))
+        style = QDomDocument()
+        style.setContent(job.style)
+        succeeded, msg = layer.importNamedStyle(style)
+        if not succeeded:
+            return LayerResult(job.key, False, error=msg)
+
+        context = QgsProcessingContext()
+        context.setProject(QgsProject.instance())
+        context.temporaryLayerStore().addMapLayer(layer)
+        feedback = JobFeedback()
+        parameters = {**job.parameters, StyleToAttributesAlg.INPUT: layer.id()}
+        results, successful = (
+            StyleToAttributesAlg().create().run(parameters, context, feedback)
+        )
+        return LayerResult(
+            job.key,
+            successful and not feedback.isCanceled(),
+            {
+                key: value
+                for key, value in results.items()
+                if key
+                in (
+                    StyleToAttributesAlg.OUTPUT_LEGEND,
+                    StyleToAttributesAlg.OUTPUT_STYLE_TYPE,
+                    StyleToAttributesAlg.OUTPUT_GEOJSON,
+                    StyleToAttributesAlg.OUTPUT_FLATGEOBUF,
+                    StyleToAttributesAlg.OUTPUT_GEOPARQUET,
+                )
+            },
+            error=feedback.last_error,
+            elapsed=time.perf_counter() - start,
+        )
+    except Exception as e:
+        return LayerResult(
+            job.key, False, error=str(e), elapsed=time.perf_counter() - start
+        )
+
+
+def extent_parameter(extent: QgsRectangle) -> str:
+    """Picklable value of an extent in EPSG:4326 for the EXTENT parameter"""
+    return (
+        f"{extent.xMinimum()},{extent.xMaximum()},"
+        f"{extent.yMinimum()},{extent.yMaximum()} [EPSG:4326]"
+    )
+
+
+def python_executable() -> Optional[str]:
+    """
+    Python interpreter for the worker processes. Inside QGIS sys.executable is
+    the QGIS binary, which must not be spawned.
+    """
+    if os.path.basename(sys.executable).lower().startswith("python"):
+        return sys.executable
+    candidates = (
+        os.path.join(sys.exec_prefix, "bin", "python3"),
+        os.path.join(sys.exec_prefix, "python3"),
+        os.path.join(sys.exec_prefix, "python.exe"),
+        os.path.join(sys.exec_prefix, "python3.exe"),
+    )
+    return next((path for path in candidates if os.path.isfile(path)), None)
+
+
+def _init_worker(prefix_path: str) -> None:
+    global _QGS_APP
+    if QgsApplication.instance() is not None:
+        return
+    QgsApplication.setPrefixPath(prefix_path, True)
+    _QGS_APP = QgsApplication([], False)
+    _QGS_APP.initQgis()
+
+
+class WorkerPool:
+    """
+    Runs layer jobs in a pool of standalone QGIS processes started with the
+    spawn method. Falls back to running the jobs one by one in the current
+    process if worker processes cannot be used.
+    """
+
+    def __init__(self, processes: int) -> None:
+        self.processes = max(1, processes)
+
+    def run(
+        self, jobs: List[LayerJob], feedback: Optional[QgsFeedback] = None
+    ) -> List[LayerResult]:
+        """
+        :param jobs: Jobs to run
+        :param feedback: Feedback for progress and cancellation
+        :return: Results in the order of the jobs
+        """
+        if self.processes > 1 and len(jobs) > 1:
+            try:
+                return self._run_in_processes(jobs, feedback)
+            except Exception as e:
+                LOGGER.warning(
+                    tr("Could not use worker processes, exporting in process: {}", e)
+                )
+        return self._run_in_process(jobs, feedback)
+
+    def _run_in_processes(
+        self, jobs: List[LayerJob], feedback: Optional[QgsFeedback]
+    ) -> List[LayerResult]:
+        executable = python_executable()
+        if executable is None:
+            raise RuntimeError(tr("Python interpreter not found"))
+        context = multiprocessing.get_context("spawn")
+        context.set_executable(executable)
+
+        results: List[LayerResult] = []
+        with context.Pool(
+            min(self.processes, len(jobs)),
+            initializer=_init_worker,
+            initargs=(QgsApplication.prefixPath(),),
+        ) as pool:
+            for result in pool.imap(run_layer_job, jobs, chunksize=1):
+                results.append(result)
+                if feedback is not None:
+                    if feedback.isCanceled():
+                        pool.terminate()
+                        break
+                    feedback.setProgress(100.0 * len(results) / len(jobs))
+        return self._with_canceled(jobs, results)
+
+    def _run_in_process(
+        self, jobs: List[LayerJob], feedback: Optional[QgsFeedback]
+    ) -> List[LayerResult]:
+        results: List[LayerResult] = []
+        for job in jobs:
+            if feedback is not None:
+                if feedback.isCanceled():
+                    break
+                feedback.setProgress(100.0 * len(results) / len(jobs))
+            results.append(run_layer_job(job))
+        return self._with_canceled(jobs, results)
+
+    @staticmethod
+    def _with_canceled(
+        jobs: List[LayerJob], results: List[LayerResult]
+    ) -> List[LayerResult]:
+        return results + [
+            LayerResult(job.key, False, error=tr("Canceled"))
+            for job in jobs[len(results) :]
+        ]
@@ -0,0 +1,119 @@
+#  Gispo Ltd., hereby disclaims all copyright interest in the program
+#  SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+import time
+from typing import Any, Callable, Optional
+
+
+class ProgressThrottle:
+    """
+    Rate-limited progress and cancellation reporting for feature loops.
+
+    The feedback is consulted only every `check_every` features. At those
+    checkpoints cancellation is checked, and progress is emitted only if at least
+    `interval` seconds have passed since the previous emission. Throughput and the
+    estimated time left are pushed as debug info every `report_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        feedback: Any,
+        total: int,
+        check_every: int = 100,
+        interval: float = 0.5,
+        report_interval: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        :param feedback: QgsFeedback to report to
+        :param total: Total number of features, 0 if unknown
+        :param check_every: Number of features between checkpoints
+        :param interval: Minimum number of seconds between progress emissions
+        :param report_interval: Minimum number of seconds between debug reports
+        :param clock: Time source, seconds as float
+        """
+        self.feedback = feedback
+        self.total = max(0, total)
+        self.check_every = max(1, check_every)
+        self.interval = interval
+        self.report_interval = report_interval
+        self.clock = clock
+
+        self.start = self.clock()
+        self._next_check = self.check_every
+        self._last_emit = self.start
+        self._last_report = self.start
+        self.canceled = False
+
+    def update(self, current: int) -> bool:
+        """
+        :param current: Number of features processed so far
+        :return: False if the feedback has been canceled
+        """
+        if current < self._next_check:
+            return True
+        self._next_check = current + self.check_every
+
+        if self.feedback.isCanceled():
+            self.canceled = True
+            return False
+
+        now = self.clock()
+        if now - self._last_emit >= self.interval:
+            self._last_emit = now
+            self.feedback.setProgress(self.progress(current))
+        if now - self._last_report >= self.report_interval:
+            self._last_report = now
+            self.feedback.pushDebugInfo(self.status(current, now))
+        return True
+
+    def finish(self, current: int) -> None:
+        """Emits the final progress and a throughput summary"""
+        if not self.canceled:
+            self.feedback.setProgress(self.progress(current))
+        self.feedback.pushDebugInfo(self.status(current, self.clock()))
+
+    def progress(self, current: int) -> int:
+        if self.total == 0:
+            return 100
+        return min(100, int(100.0 * current / self.total))
+
+    def throughput(self, current: int, now: float) -> float:
+        elapsed = now - self.start
+        return current / elapsed if elapsed > 0 else 0.0
+
+    def eta(self, current: int, now: float) -> Optional[float]:
+        """
+        :return: Estimated number of seconds left or None if unknown
+        """
+        rate = self.throughput(current, now)
+        if rate <= 0 or self.total == 0:
+            return None
+        return max(0, self.total - current) / rate
+
+    def status(self, current: int, now: float) -> str:
+        message = (
+            f"Processed {current}/{self.total} features "
+            f"in {now - self.start:.1f} s "
+            f"({self.throughput(current, now):.0f} features/s)"
+        )
+        eta = self.eta(current, now)
+        if eta is not None and current < self.total:
+            message += f", ETA {eta:.1f} s"
+        return message
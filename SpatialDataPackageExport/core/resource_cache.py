@@ -0,0 +1,142 @@
+#  Gispo Ltd., hereby disclaims all copyright interest in the program
+#  SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+import hashlib
+import json
+import logging
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..qgis_plugin_tools.tools.resources import plugin_name
+
+LOGGER = logging.getLogger(plugin_name())
+
+# Bump when the exported resources change for the same input
+CACHE_VERSION = 1
+
+
+def fingerprint(parts: Dict[str, Any]) -> str:
+    """
+    Stable hash of the parts describing an export
+    :param parts: JSON serializable values
+    """
+    encoded = json.dumps(
+        {"version": CACHE_VERSION, **parts}, sort_keys=True, default=str
+    )
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class CachedResource:
+    def __init__(
+        self, geojson_path: Path, legend: List[Dict[str, Any]], style_type: str
+    ) -> None:
+        self.geojson_path = geojson_path
+        self.legend = legend
+        self.style_type = style_type
+
+
+class ResourceCache:
+    """
+    On-disk cache of exported layer resources keyed by a fingerprint.
+
+    Each entry is the exported GeoJSON FeatureCollection and a metadata file with
+    the legend and the style type. The least recently used entries are removed
+    once the total size of the cache exceeds the size limit.
+    """
+
+    def __init__(self, cache_dir: Path, max_size: int) -> None:
+        """
+        :param cache_dir: Directory of the cache, created if missing
+        :param max_size: Maximum total size of the cache in bytes
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str) -> Optional[CachedResource]:
+        geojson_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            if not geojson_path.exists():
+                return None
+            os.utime(meta_path)
+        except (OSError, ValueError):
+            return None
+        LOGGER.debug(f"Resource cache hit {key}")
+        return CachedResource(geojson_path, meta["legend"], meta["style_type"])
+
+    def put(
+        self,
+        key: str,
+        geojson_path: Path,
+        legend: List[Dict[str, Any]],
+        style_type: str,
+    ) -> None:
+        """Copies the GeoJSON file and stores the legend and style type"""
+        cached_geojson, meta_path = self._paths(key)
+        tmp_path = Path(self.cache_dir, f".{uuid.uuid4().hex}.tmp")
+        try:
+            shutil.copyfile(geojson_path, tmp_path)
+            os.replace(tmp_path, cached_geojson)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"legend": legend, "style_type": style_type}, f)
+            os.replace(tmp_path, meta_path)
+        except OSError as e:
+            LOGGER.warning(f"Could not cache resource {geojson_path}: {e}")
+            if tmp_path.exists():
+                tmp_path.unlink()
+            return
+        self.evict()
+
+    def copy_to(self, resource: CachedResource, output_file: Path) -> None:
+        """Copies the cached GeoJSON to the output file"""
+        if output_file != resource.geojson_path:
+            shutil.copyfile(resource.geojson_path, output_file)
+
+    def evict(self) -> None:
+        """Removes the least recently used entries exceeding the size limit"""
+        entries = []
+        total = 0
+        for meta_path in self.cache_dir.glob("*.json"):
+            geojson_path = meta_path.with_suffix(".geojson")
+            try:
+                size = meta_path.stat().st_size + geojson_path.stat().st_size
+                entries.append((meta_path.stat().st_mtime, meta_path, geojson_path))
+            except OSError:
+                continue
+            total += size
+        for _, meta_path, geojson_path in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                total -= meta_path.stat().st_size + geojson_path.stat().st_size
+                meta_path.unlink()
+                geojson_path.unlink()
+            except OSError:
+                continue
+
+    def _paths(self, key: str) -> Tuple[Path, Path]:
+        return (
+            Path(self.cache_dir, f"{key}.geojson"),
+            Path(self.cache_dir, f"{key}.json"),
+        )
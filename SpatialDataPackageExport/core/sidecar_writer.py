@@ -0,0 +1,184 @@
+#  Gispo Ltd., hereby disclaims all copyright interest in the program
+#  SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+import logging
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from qgis.core import (
+    QgsCoordinateTransformContext,
+    QgsFeedback,
+    QgsVectorFileWriter,
+    QgsVectorLayer,
+)
+
+from ..definitions.configurable_settings import ResourceFormatOptions
+from ..definitions.types import FLATGEOBUF_MEDIA_TYPE, GEOPARQUET_MEDIA_TYPE
+from ..qgis_plugin_tools.tools.custom_logging import bar_msg
+from ..qgis_plugin_tools.tools.i18n import tr
+from ..qgis_plugin_tools.tools.resources import plugin_name
+from .exceptions import DataPackageException
+from .utils import unique_file_name
+
+LOGGER = logging.getLogger(plugin_name())
+
+
+class SidecarFormat:
+    def __init__(
+        self,
+        driver: str,
+        extension: str,
+        media_type: Optional[str] = None,
+        layer_options: Optional[List[str]] = None,
+    ) -> None:
+        """
+        :param driver: OGR driver writing the format
+        :param extension: File extension with the leading dot
+        :param media_type: Media type of the resource, None to keep the media type
+            of the style type
+        :param layer_options: OGR layer creation options
+        """
+        self.driver = driver
+        self.extension = extension
+        self.media_type = media_type
+        self.layer_options = layer_options or []
+
+
+SIDECAR_FORMATS: Dict[str, SidecarFormat] = {
+    ResourceFormatOptions.geojson.value: SidecarFormat("GeoJSON", ".geojson"),
+    ResourceFormatOptions.geojsonseq.value: SidecarFormat(
+        "GeoJSONSeq", ".geojsonl", "application/geo+json-seq"
+    ),
+    ResourceFormatOptions.flatgeobuf.value: SidecarFormat(
+        "FlatGeobuf", ".fgb", FLATGEOBUF_MEDIA_TYPE, ["SPATIAL_INDEX=YES"]
+    ),
+    # Converted with GDAL only if the layer was not exported as GeoParquet
+    ResourceFormatOptions.geoparquet.value: SidecarFormat(
+        "Parquet", ".parquet", GEOPARQUET_MEDIA_TYPE, ["GEOMETRY_ENCODING=WKB"]
+    ),
+}
+
+
+class SidecarWriter:
+    """
+    Writes the layer resources of a snapshot as files next to the snapshot JSON.
+    The files are written concurrently in a thread pool from the exported GeoJSON
+    files of the layers, or copied if the layers were exported in the format
+    already.
+    """
+
+    def __init__(self, output_dir: Path, resource_format: str, workers: int) -> None:
+        """
+        :param output_dir: Directory of the snapshot JSON file
+        :param resource_format: One of the non-inline ResourceFormatOptions
+        :param workers: Number of files written concurrently
+        """
+        self.output_dir = output_dir
+        self.format = SIDECAR_FORMATS[resource_format]
+        self.workers = max(1, workers)
+
+    def get_paths(
+        self, snapshot_name: str, resource_names: Iterable[str]
+    ) -> Dict[str, Path]:
+        """
+        :return: Unique paths of the files by resource name, with the characters
+            unsafe in file names replaced
+        """
+        taken: Set[str] = set()
+        return {
+            resource_name: Path(
+                self.output_dir,
+                unique_file_name(f"{snapshot_name}-{resource_name}", taken)
+                + self.format.extension,
+            )
+            for resource_name in resource_names
+        }
+
+    def write(
+        self,
+        snapshot_name: str,
+        sources: Dict[str, Path],
+        feedback: Optional[QgsFeedback] = None,
+    ) -> Optional[Dict[str, Path]]:
+        """
+        :param snapshot_name: Name of the snapshot, used as a prefix of the files
+        :param sources: GeoJSON files, or files in the format, in EPSG:4326 by
+            resource name
+        :param feedback: Feedback for progress and cancellation
+        :return: Written files by resource name, None if canceled
+        """
+        paths = self.get_paths(snapshot_name, sources.keys())
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(self._write_file, name, source, paths[name]): name
+                for name, source in sources.items()
+            }
+            for i, future in enumerate(as_completed(futures)):
+                if feedback is not None:
+                    if feedback.isCanceled():
+                        for pending in futures:
+                            pending.cancel()
+                        break
+                    feedback.setProgress(100.0 * (i + 1) / len(futures))
+                future.result()
+                LOGGER.debug(f"Wrote resource {futures[future]}")
+        if feedback is not None and feedback.isCanceled():
+            for path in paths.values():
+                if path.exists() and path not in sources.values():
+                    path.unlink()
+            return None
+        return paths
+
+    def _write_file(self, name: str, source: Path, output_file: Path) -> None:
+        if source.suffix == self.format.extension:
+            if output_file.resolve() != source.resolve():
+                shutil.copyfile(source, output_file)
+            return
+
+        layer = QgsVectorLayer(str(source), name, "ogr")
+        options = QgsVectorFileWriter.SaveVectorOptions()
+        options.driverName = self.format.driver
+        options.fileEncoding = "utf-8"
+        options.layerOptions = self.format.layer_options
+        error, msg = self._write_as_vector_format(layer, output_file, options)
+        if error != QgsVectorFileWriter.NoError:
+            raise DataPackageException(
+                tr("Could not write layer {} to disk", output_file),
+                bar_msg(msg),
+            )
+
+    @staticmethod
+    def _write_as_vector_format(
+        layer: QgsVectorLayer,
+        output_file: Path,
+        options: QgsVectorFileWriter.SaveVectorOptions,
+    ) -> Tuple[int, str]:
+        # Both the source and the output are in EPSG:4326
+        transform_context = QgsCoordinateTransformContext()
+        if hasattr(QgsVectorFileWriter, "writeAsVectorFormatV3"):
+            error, msg, _, _ = QgsVectorFileWriter.writeAsVectorFormatV3(
+                layer, str(output_file), transform_context, options
+            )
+        else:
+            error, msg = QgsVectorFileWriter.writeAsVectorFormatV2(
+                layer, str(output_file), transform_context, options
+            )
+        return error, msg
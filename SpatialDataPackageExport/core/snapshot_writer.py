@@ -0,0 +1,167 @@
+#  Gispo Ltd., hereby disclaims all copyright interest in the program
+#  SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+import json
+import logging
+import mmap
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from ..model.snapshot import Snapshot
+from ..qgis_plugin_tools.tools.resources import plugin_name
+
+LOGGER = logging.getLogger(plugin_name())
+
+# Inline data as a dict, a path to a JSON file or an iterable of JSON text chunks
+DataSource = Union[Dict, Path, Iterable[str]]
+
+UTF8_BOM = b"\xef\xbb\xbf"
+JSON_WHITESPACE = b" \t\r\n"
+# Number of bytes at the start of a GeoJSON file searched for the type member
+GEOJSON_HEAD_SIZE = 4096
+
+
+class SnapshotWriter:
+    """
+    Writes a snapshot as JSON without materializing the resource data.
+
+    The snapshot itself is encoded incrementally in the key order of
+    Snapshot.to_dict, and the data of each resource is written from its data
+    source in place of a placeholder, so that only one chunk of the data is held in
+    memory at a time. GeoJSON files are copied as raw UTF-8 bytes without parsing
+    them.
+    """
+
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, snapshot: Snapshot, data_sources: Dict[str, DataSource]) -> None:
+        """
+        :param snapshot: Snapshot to write
+        :param data_sources: Data sources of the resources by resource name. These
+            take precedence over the data of the resources.
+        """
+        self.snapshot = snapshot
+        self.data_sources = data_sources
+        self.encoder = json.JSONEncoder(ensure_ascii=False)
+        self.written_sources = 0
+
+    def write(self, output_file: Path, feedback: Optional[Any] = None) -> bool:
+        """
+        Writes the snapshot to the file
+        :param output_file: Path of the snapshot JSON file
+        :param feedback: QgsFeedback to report the progress to and to check for
+            cancellation between the chunks
+        :return: False if the writing was canceled and the file was not written
+        """
+        # Written next to the output first, so that a failed or canceled write
+        # never leaves a partial snapshot behind
+        tmp_file = output_file.with_name(f".{output_file.name}.{uuid.uuid4().hex}")
+        try:
+            with open(tmp_file, "wb") as f:
+                for chunk in self.iter_chunks():
+                    if feedback is not None:
+                        if feedback.isCanceled():
+                            break
+                        feedback.setProgress(self.progress())
+                    f.write(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+                else:
+                    f.close()
+                    os.replace(tmp_file, output_file)
+                    LOGGER.debug(f"Wrote snapshot to {output_file}")
+                    return True
+        finally:
+            if tmp_file.exists():
+                tmp_file.unlink()
+        return False
+
+    def progress(self) -> float:
+        """Percentage of the data sources written so far"""
+        if not self.data_sources:
+            return 100.0
+        return 100.0 * self.written_sources / len(self.data_sources)
+
+    def iter_chunks(self) -> Iterator[Union[str, bytes]]:
+        """
+        Yields the JSON of the snapshot chunk by chunk. The data of the file sources
+        is yielded as UTF-8 encoded bytes and the rest as text.
+        """
+        placeholders: Dict[str, DataSource] = {}
+        snapshot_dict = self.snapshot.to_dict()
+        for resource in snapshot_dict["resources"]:
+            source = self.data_sources.get(resource["name"])
+            if source is None:
+                continue
+            placeholder = f"resource-data-{uuid.uuid4().hex}"
+            placeholders[json.dumps(placeholder)] = source
+            path = resource.pop("path", None)
+            resource["data"] = placeholder
+            if path is not None:
+                resource["path"] = path
+
+        for chunk in self.encoder.iterencode(snapshot_dict):
+            # Strings are always encoded as a whole into a single chunk
+            while placeholders and '"resource-data-' in chunk:
+                placeholder = next((key for key in placeholders if key in chunk), None)
+                if placeholder is None:
+                    break
+                before, _, chunk = chunk.partition(placeholder)
+                yield before
+                yield from self._iter_data(placeholders.pop(placeholder))
+                self.written_sources += 1
+            yield chunk
+
+    def _iter_data(self, source: DataSource) -> Iterator[Union[str, bytes]]:
+        if isinstance(source, dict):
+            yield from self.encoder.iterencode(source)
+        elif isinstance(source, Path):
+            yield from self._iter_file(source)
+        else:
+            yield from source
+
+    def _iter_file(self, source: Path) -> Iterator[bytes]:
+        """Yields the bytes of the GeoJSON object in the file from a memory map"""
+        with open(source, "rb") as f:
+            if source.stat().st_size == 0:
+                raise ValueError(f"{source} is empty")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                start, end = self._object_range(data) or (0, 0)
+                head_end = min(start + GEOJSON_HEAD_SIZE, end)
+                if end == 0 or data.find(b'"type"', start, head_end) == -1:
+                    raise ValueError(f"{source} is not a GeoJSON object")
+                for i in range(start, end, self.CHUNK_SIZE):
+                    yield data[i : min(i + self.CHUNK_SIZE, end)]
+
+    @staticmethod
+    def _object_range(data: mmap.mmap) -> Optional[Tuple[int, int]]:
+        """
+        Checks that the data looks like a single JSON object without parsing it
+        :return: Start and end offsets of the object without the byte order mark
+            and the surrounding whitespace, or None if it is not an object
+        """
+        start = len(UTF8_BOM) if data[: len(UTF8_BOM)] == UTF8_BOM else 0
+        end = len(data)
+        while start < end and data[start] in JSON_WHITESPACE:
+            start += 1
+        while end > start and data[end - 1] in JSON_WHITESPACE:
+            end -= 1
+        if end - start < 2 or data[start] != ord("{") or data[end - 1] != ord("}"):
+            return None
+        return start, end
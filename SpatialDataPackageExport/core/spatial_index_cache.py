@@ -0,0 +1,117 @@
+#  Gispo Ltd., hereby disclaims all copyright interest in the program
+#  SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional, Tuple, Union
+
+from qgis.core import (
+    QgsFeatureRequest,
+    QgsFeatureSource,
+    QgsProcessingFeedback,
+    QgsSpatialIndex,
+    QgsVectorLayer,
+)
+
+from ..qgis_plugin_tools.tools.resources import plugin_name
+from .utils import file_versions
+
+if TYPE_CHECKING:
+    from .layer_snapshot import LayerSnapshot
+
+LOGGER = logging.getLogger(plugin_name())
+
+
+class SpatialIndexCache:
+    """
+    Process-wide cache of spatial indices for layers whose provider has no
+    spatial index of its own.
+
+    Indices are keyed by the layer id and invalidated when the modification
+    stamp of the data source changes. Layers that are not backed by a file or
+    have unsaved edits are never cached. Only the most recently used indices are
+    kept.
+    """
+
+    MAX_SIZE = 16
+
+    def __init__(self, max_size: int = MAX_SIZE) -> None:
+        self.max_size = max_size
+        self._indices: "OrderedDict[str, Tuple[Tuple, QgsSpatialIndex]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def modification_stamp(
+        layer: Union[QgsVectorLayer, "LayerSnapshot"]
+    ) -> Optional[Tuple]:
+        if layer.isModified():
+            return None
+        path = layer.source().split("|")[0]
+        if not os.path.isfile(path):
+            return None
+        return layer.source(), tuple(file_versions(path)), layer.featureCount()
+
+    def get(
+        self,
+        layer: Union[QgsVectorLayer, "LayerSnapshot"],
+        feedback: Optional[QgsProcessingFeedback] = None,
+    ) -> QgsSpatialIndex:
+        """
+        Gets the cached spatial index of the layer or builds a new one
+        :param layer: Layer to get the index for
+        :param feedback: Feedback used while building the index
+        :return: Spatial index of the layer
+        """
+        stamp = self.modification_stamp(layer)
+        if stamp is not None:
+            with self._lock:
+                cached = self._indices.get(layer.id())
+                if cached is not None:
+                    self._indices.move_to_end(layer.id())
+            if cached is not None and cached[0] == stamp:
+                LOGGER.debug(f"Using cached spatial index for {layer.name()}")
+                return cached[1]
+
+        if isinstance(layer, QgsFeatureSource):
+            index = QgsSpatialIndex(layer, feedback)
+        else:
+            index = QgsSpatialIndex(
+                layer.getFeatures(QgsFeatureRequest().setNoAttributes()), feedback
+            )
+        # A canceled build may be missing features
+        if stamp is not None and not (feedback is not None and feedback.isCanceled()):
+            with self._lock:
+                self._indices[layer.id()] = (stamp, index)
+                self._indices.move_to_end(layer.id())
+                while len(self._indices) > self.max_size:
+                    self._indices.popitem(last=False)
+        return index
+
+    def remove(self, layer_id: str) -> None:
+        with self._lock:
+            self._indices.pop(layer_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indices.clear()
+
+
+SPATIAL_INDEX_CACHE = SpatialIndexCache()
@@ -18,16 +18,24 @@
 #  You should have received a copy of the GNU General Public License
 #  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
 
-from typing import Any, Dict, List, Optional, cast
+import copy
+import math
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from queue import Queue
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union, cast
 
 from qgis.core import (
     QgsExpression,
     QgsFeature,
     QgsFeatureRequest,
     QgsFeatureSink,
+    QgsFeatureSource,
     QgsField,
     QgsFields,
     QgsFillSymbol,
+    QgsGeometry,
     QgsLineSymbol,
     QgsMarkerSymbol,
     QgsProcessingFeedback,
@@ -35,10 +43,11 @@ from qgis.core import (
     QgsPropertyCollection,
     QgsRectangle,
     QgsRuleBasedRenderer,
-    QgsSpatialIndex,
     QgsSymbol,
     QgsSymbolLayer,
     QgsVectorLayer,
+    QgsVectorLayerFeatureSource,
+    QgsWkbTypes,
 )
 from qgis.PyQt.QtCore import QVariant
 
@@ -48,22 +57,50 @@ from ..definitions.types import StyleType
 from ..model.snapshot import Legend
 from ..qgis_plugin_tools.tools.exceptions import QgsPluginNotImplementedException
 from ..qgis_plugin_tools.tools.i18n import tr
-from ..qgis_plugin_tools.tools.layers import evaluate_expressions
+from .expressions import ExpressionEvaluator
+from .layer_snapshot import LayerSnapshot
+from .progress import ProgressThrottle
+from .spatial_index_cache import SPATIAL_INDEX_CACHE
+from .symbol_index import NO_MATCH, CategoryIndex, GraduatedRangeIndex, is_null
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 class StylesToAttributes:
+    PUSHDOWN_STORAGE_TYPES = ("GPKG", "SQLite")
+    NATIVE_SPATIAL_INDEX_PROVIDERS = ("ogr", "postgres", "spatialite", "mssql")
+    PROGRESS_CHECK_EVERY = 100
+    PROGRESS_INTERVAL = 0.5
+    MIN_CHUNK_SIZE = 1000
+    CHUNKS_PER_WORKER = 4
+
     def __init__(
         self,
-        layer: QgsVectorLayer,
+        layer: Union[QgsVectorLayer, LayerSnapshot],
         layer_name: str,
         feedback: QgsProcessingFeedback,
         primary_layer: bool = False,
         legend_shape: Optional[str] = None,
+        bulk_classification: bool = False,
+        rule_pushdown: bool = False,
+        clip: bool = False,
+        batch_size: int = 1000,
+        workers: int = 1,
     ) -> None:
         self.layer = layer
         self.layer_name = layer_name
         self.feedback = feedback
         self.legend_shape = legend_shape
+        self.bulk_classification = bulk_classification
+        self.rule_pushdown = rule_pushdown
+        self.clip = clip
+        self.clip_extent: Optional[QgsRectangle] = None
+        self.batch_size = max(1, batch_size)
+        self._batch: List[QgsFeature] = []
+        self.workers = max(1, workers)
 
         self.renderer = self.layer.renderer()
         self.symbol_type: SymbolType = SymbolType[self.renderer.type()]
@@ -80,6 +117,12 @@ class StylesToAttributes:
             self.mapped_col = ""
 
         self.symbols: Dict[int, Dict[str, Any]] = {}
+        self.range_index: Optional[GraduatedRangeIndex] = None
+        self.category_index: Optional[CategoryIndex] = None
+        self.style_columns: List[int] = []
+        self.style_rows: Dict[int, Tuple[Any, ...]] = {}
+        self.classified: Dict[int, int] = {}
+        self.evaluator = ExpressionEvaluator(self.layer)
         self.primary_layer = primary_layer
 
         self.fields: QgsFields = self._generate_fields()
@@ -96,11 +139,34 @@ class StylesToAttributes:
         }
 
     def extract_styles_to_layer(
-        self, sink: QgsFeatureSink, extent: Optional[QgsRectangle] = None
+        self,
+        sink: QgsFeatureSink,
+        extent: Optional[QgsRectangle] = None,
+        fids: Optional[Iterable[int]] = None,
     ) -> None:
+        """
+        :param sink: Sink to add the styled features to
+        :param extent: Extent of the features in the layer CRS
+        :param fids: Ids of the features to style, all features if None
+        """
         try:
             self._update_symbols()
-            self._copy_fields(sink, extent)
+            if self.clip and extent is not None and not extent.isEmpty():
+                self.clip_extent = extent
+            request = self._get_feature_request(extent, fids)
+            if self.bulk_classification:
+                self._classify_features(request)
+            if self.rule_pushdown and self._supports_rule_pushdown():
+                self._copy_fields_by_rules(sink, request)
+            elif (
+                self.workers > 1
+                and isinstance(self.layer, LayerSnapshot)
+                and len(self.layer.worker_sources) > 1
+            ):
+                self._copy_fields_in_chunks(sink, request)
+            else:
+                self._copy_fields(sink, request)
+            self.evaluator.report(self.feedback)
             self._update_legend()
         except Exception as e:
             self.feedback.reportError(tr("Error occurred: {}", e), True)
@@ -205,6 +271,9 @@ class StylesToAttributes:
                     "style": style,
                 }
                 i = i + 1
+            self.range_index = GraduatedRangeIndex(
+                [(s["range_lower"], s["range_upper"]) for s in self.symbols.values()]
+            )
         elif self.symbol_type == SymbolType.categorizedSymbol:
             for c in self.renderer.categories():
                 style = self._get_style(c.symbol())
@@ -214,6 +283,9 @@ class StylesToAttributes:
                     "style": style,
                 }
                 i = i + 1
+            self.category_index = CategoryIndex(
+                [s["value"] for s in self.symbols.values()]
+            )
         elif self.symbol_type == SymbolType.singleSymbol:
             style = self._get_style(self.renderer.symbol())
             self.symbols[0] = {
@@ -235,41 +307,397 @@ class StylesToAttributes:
                 }
                 i = i + 1
 
-    def _copy_fields(
-        self, sink: QgsFeatureSink, extent: Optional[QgsRectangle] = None
-    ) -> None:
-        total = (
-            100.0 / self.layer.featureCount() if self.layer.featureCount() > 0 else 100
-        )
+        self._update_style_rows()
+        self._prepare_expressions()
+
+    def _prepare_expressions(self) -> None:
+        for symbol in self.symbols.values():
+            if self.symbol_type == SymbolType.RuleRenderer:
+                self.evaluator.prepare(symbol["value"])
+            for expression in symbol["style"].data_defined_expressions.values():
+                self.evaluator.prepare(expression)
+
+    def _update_style_rows(self) -> None:
+        """
+        Resolves the positions of the style fields and the style values of the
+        symbols without data defined properties, since those are the same for
+        every feature of the symbol
+        """
+        field_names = self.fields.names()
+        self.style_columns = [field_names.index(name) for name in self.field_template]
+        self.style_rows = {
+            index: self._get_style_row(symbol["style"])
+            for index, symbol in self.symbols.items()
+            if not symbol["style"].data_defined_expressions
+        }
+
+    def _get_style_row(self, style: Style) -> Tuple[Any, ...]:
+        values = style.to_dict()
+        return tuple(values[field_name] for field_name in self.field_template)
+
+    def _get_feature_request(
+        self,
+        extent: Optional[QgsRectangle] = None,
+        fids: Optional[Iterable[int]] = None,
+    ) -> QgsFeatureRequest:
+        if fids is not None:
+            request = QgsFeatureRequest().setFilterFids(list(fids))
+            if extent is not None and not extent.isEmpty():
+                request.setFilterRect(extent)
+            return request
         if extent is not None and not extent.isEmpty():
             self.feedback.pushDebugInfo(f"Extent: {extent.toString()}")
-            source_index = QgsSpatialIndex(self.layer, self.feedback)
+            if self._has_native_spatial_index():
+                return QgsFeatureRequest().setFilterRect(extent)
+            source_index = SPATIAL_INDEX_CACHE.get(self.layer, self.feedback)
             ids = source_index.intersects(extent)
-            features = self.layer.getFeatures(QgsFeatureRequest().setFilterFids(ids))
+            return QgsFeatureRequest().setFilterFids(ids)
+        return QgsFeatureRequest()
+
+    def _has_native_spatial_index(self) -> bool:
+        # QgsFeatureSource.hasSpatialIndex is available since QGIS 3.14
+        if hasattr(self.layer, "hasSpatialIndex"):
+            return (
+                self.layer.hasSpatialIndex() != QgsFeatureSource.SpatialIndexNotPresent
+            )
+        return self.layer.providerType() in self.NATIVE_SPATIAL_INDEX_PROVIDERS
+
+    def _classify_features(self, request: QgsFeatureRequest) -> None:
+        """
+        Classifies all requested features at once before copying them.
+        Reads only the classification attribute and uses NumPy to find the
+        symbols, features are classified one by one if this is not possible.
+        """
+        if self.symbol_type not in (
+            SymbolType.graduatedSymbol,
+            SymbolType.categorizedSymbol,
+        ):
+            return
+        if np is None:
+            self.feedback.pushInfo(
+                tr("NumPy is not available, classifying features one by one")
+            )
+            return
+
+        classification_request = QgsFeatureRequest(request)
+        classification_request.setFlags(QgsFeatureRequest.NoGeometry)
+        classification_request.setSubsetOfAttributes(
+            [self.mapped_col], self.layer.fields()
+        )
+        fids: List[int] = []
+        values: List[Any] = []
+        feature: QgsFeature
+        for feature in self.layer.getFeatures(classification_request):
+            fids.append(feature.id())
+            values.append(feature[self.mapped_col])
+
+        if self.symbol_type == SymbolType.graduatedSymbol:
+            assert self.range_index is not None
+            try:
+                array = np.array(
+                    [np.nan if is_null(value) else value for value in values],
+                    dtype=float,
+                )
+            except (TypeError, ValueError):
+                self.feedback.pushInfo(
+                    tr(
+                        "Values of {} are not numeric, "
+                        "classifying features one by one",
+                        self.mapped_col,
+                    )
+                )
+                return
+            indices = self.range_index.lookup_array(array)
         else:
-            features = self.layer.getFeatures()
+            assert self.category_index is not None
+            indices = self.category_index.lookup_array(values)
 
+        self.classified = dict(zip(fids, indices.tolist()))
+        self.feedback.pushDebugInfo(f"Classified {len(fids)} features")
+
+    def _copy_fields(self, sink: QgsFeatureSink, request: QgsFeatureRequest) -> None:
+        progress = self._get_progress_throttle()
+        features = self.layer.getFeatures(request)
+
+        current = 0
         f: QgsFeature
-        for current, f in enumerate(features):
-            if self.feedback.isCanceled():
+        for f in features:
+            if not progress.update(current):
                 break
 
             if not f.hasGeometry():
-                sink.addFeature(f, QgsFeatureSink.FastInsert)
+                self._add_to_batch(sink, f)
             else:
-                feat = QgsFeature()
-                attributes = self._get_attributes_for_feature(f)
-                feat.setAttributes(attributes)
-                feat.setGeometry(f.geometry())
-                succeeded = sink.addFeature(feat, QgsFeatureSink.FastInsert)
-                if not succeeded:
-                    raise ValueError(
-                        tr(
-                            "Could not add feature to target layer. Attributes: {}",
-                            attributes,
-                        )
+                self._add_styled_feature(sink, f, self._get_attributes_for_feature(f))
+            current += 1
+        self._flush_batch(sink)
+        progress.finish(current)
+
+    def _copy_fields_in_chunks(
+        self, sink: QgsFeatureSink, request: QgsFeatureRequest
+    ) -> None:
+        """
+        Copies the features in chunks of consecutive features that are styled in
+        worker threads. The chunks are merged in the order of the sequential copy,
+        so the output is identical to the output of _copy_fields. Each worker
+        reads the features from its own feature source of the snapshot.
+        """
+        layer = cast(LayerSnapshot, self.layer)
+        workers = min(self.workers, len(layer.worker_sources))
+        sources: "Queue[QgsVectorLayerFeatureSource]" = Queue()
+        for source in layer.worker_sources[:workers]:
+            sources.put(source)
+
+        fid_request = QgsFeatureRequest(request)
+        fid_request.setFlags(QgsFeatureRequest.NoGeometry)
+        fid_request.setNoAttributes()
+        fids = [f.id() for f in self.layer.getFeatures(fid_request)]
+        chunk_size = max(
+            self.MIN_CHUNK_SIZE,
+            math.ceil(len(fids) / (workers * self.CHUNKS_PER_WORKER)),
+        )
+        chunks = (fids[i : i + chunk_size] for i in range(0, len(fids), chunk_size))
+        self.feedback.pushDebugInfo(
+            f"Copying {len(fids)} features in chunks of {chunk_size} "
+            f"with {workers} workers"
+        )
+
+        progress = self._get_progress_throttle()
+        current = 0
+        canceled = False
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = deque(
+                executor.submit(self._style_chunk, chunk, sources)
+                for chunk in islice(chunks, 2 * workers)
+            )
+            while futures and not canceled:
+                features, styles, evaluator = futures.popleft().result()
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    futures.append(executor.submit(self._style_chunk, chunk, sources))
+
+                # The styles are left as evaluated for the last feature, as in
+                # the sequential copy
+                for index, style in styles.items():
+                    self.symbols[index]["style"].__dict__.update(style.__dict__)
+                self.evaluator.merge(evaluator)
+
+                for feature in features:
+                    if not progress.update(current):
+                        canceled = True
+                        break
+                    self._add_to_batch(sink, feature)
+                    current += 1
+            for future in futures:
+                future.cancel()
+        self._flush_batch(sink)
+        progress.finish(current)
+
+    def _style_chunk(
+        self, fids: List[int], sources: "Queue[QgsVectorLayerFeatureSource]"
+    ) -> Tuple[List[QgsFeature], Dict[int, Style], ExpressionEvaluator]:
+        """
+        Styles the features of the chunk in a worker thread. Data defined styles
+        are evaluated with copies of the styles and a separate evaluator.
+        :param fids: Feature ids of the chunk in the order of the output
+        :param sources: Feature sources not in use by other workers, one is
+            taken for reading the features of the chunk
+        :return: Styled features, evaluated styles and the evaluator
+        """
+        evaluator = ExpressionEvaluator(self.layer)
+        styles = {
+            index: copy.copy(symbol["style"])
+            for index, symbol in self.symbols.items()
+            if index not in self.style_rows
+        }
+        evaluated: Dict[int, Style] = {}
+        source = sources.get()
+        try:
+            features = {
+                f.id(): f
+                for f in source.getFeatures(QgsFeatureRequest().setFilterFids(fids))
+            }
+        finally:
+            sources.put(source)
+
+        styled = []
+        for fid in fids:
+            if self.feedback.isCanceled():
+                break
+            f = features.pop(fid, None)
+            if f is None:
+                continue
+            if not f.hasGeometry():
+                styled.append(f)
+                continue
+            matched = self._get_symbol_index(f, evaluator)
+            if matched in styles:
+                evaluated[matched] = styles[matched]
+            f = self._get_styled_feature(
+                f, self._get_attributes_for_symbol(f, matched, evaluator, styles)
+            )
+            if f is not None:
+                styled.append(f)
+        return styled, evaluated, evaluator
+
+    def _copy_fields_by_rules(
+        self, sink: QgsFeatureSink, request: QgsFeatureRequest
+    ) -> None:
+        """
+        Copies the features of a rule based layer with one request per rule, so
+        that the provider can compile the rule filters to SQL. Features are
+        claimed by the first matching rule, the rest are copied without style.
+        """
+        progress = self._get_progress_throttle()
+        allowed_fids: Optional[Set[int]] = None
+        if request.filterType() == QgsFeatureRequest.FilterFids:
+            allowed_fids = set(request.filterFids())
+
+        claimed: Set[int] = set()
+        f: QgsFeature
+        for index, symbol in self.symbols.items():
+            rule_request = QgsFeatureRequest(request)
+            rule_request.setFilterExpression(symbol["value"].expression())
+            self.feedback.pushDebugInfo(
+                f"Requesting features for rule {symbol['value'].expression()}"
+            )
+            for f in self.layer.getFeatures(rule_request):
+                if not progress.update(len(claimed)):
+                    self._flush_batch(sink)
+                    progress.finish(len(claimed))
+                    return
+                if f.id() in claimed or (
+                    allowed_fids is not None and f.id() not in allowed_fids
+                ):
+                    continue
+                claimed.add(f.id())
+                if not f.hasGeometry():
+                    self._add_to_batch(sink, f)
+                else:
+                    self._add_styled_feature(
+                        sink, f, self._get_attributes_for_symbol(f, index)
                     )
-            self.feedback.setProgress(int(current * total))
+
+        fid_request = QgsFeatureRequest(request)
+        fid_request.setFlags(QgsFeatureRequest.NoGeometry)
+        fid_request.setNoAttributes()
+        unclaimed = [
+            f.id() for f in self.layer.getFeatures(fid_request) if f.id() not in claimed
+        ]
+        self.feedback.pushDebugInfo(f"{len(unclaimed)} features matched no rule")
+        current = len(claimed)
+        if unclaimed:
+            for f in self.layer.getFeatures(
+                QgsFeatureRequest().setFilterFids(unclaimed)
+            ):
+                if not progress.update(current):
+                    break
+                if not f.hasGeometry():
+                    self._add_to_batch(sink, f)
+                else:
+                    self._add_styled_feature(sink, f, f.attributes())
+                current += 1
+        self._flush_batch(sink)
+        progress.finish(current)
+
+    def _get_progress_throttle(self) -> ProgressThrottle:
+        return ProgressThrottle(
+            self.feedback,
+            self.layer.featureCount(),
+            check_every=self.PROGRESS_CHECK_EVERY,
+            interval=self.PROGRESS_INTERVAL,
+        )
+
+    def _supports_rule_pushdown(self) -> bool:
+        """
+        Whether rule filters can be pushed down to the data provider. Rules
+        without a filter and ELSE rules are evaluated only feature by feature.
+        """
+        if self.symbol_type != SymbolType.RuleRenderer:
+            return False
+        provider = self.layer.providerType()
+        if not (
+            provider == "spatialite"
+            or (
+                provider == "ogr"
+                and self.layer.storageType() in self.PUSHDOWN_STORAGE_TYPES
+            )
+        ):
+            return False
+        return all(
+            symbol["value"].expression().strip() not in ("", "ELSE")
+            and not symbol["value"].hasParserError()
+            for symbol in self.symbols.values()
+        )
+
+    def _add_styled_feature(
+        self, sink: QgsFeatureSink, feature: QgsFeature, attributes: List[Any]
+    ) -> None:
+        """
+        Adds the feature with the styled attributes to the batch. The feature
+        fetched from the source is reused instead of allocating a new one.
+        """
+        styled = self._get_styled_feature(feature, attributes)
+        if styled is not None:
+            self._add_to_batch(sink, styled)
+
+    def _get_styled_feature(
+        self, feature: QgsFeature, attributes: List[Any]
+    ) -> Optional[QgsFeature]:
+        """
+        Sets the styled attributes to the feature and clips the geometry
+        :return: The feature or None if nothing is left after clipping
+        """
+        if self.clip_extent is not None:
+            geometry = self._clip_geometry(feature.geometry(), self.clip_extent)
+            if geometry is None:
+                return None
+            feature.setGeometry(geometry)
+        feature.setAttributes(attributes)
+        return feature
+
+    def _add_to_batch(self, sink: QgsFeatureSink, feature: QgsFeature) -> None:
+        self._batch.append(feature)
+        if len(self._batch) >= self.batch_size:
+            self._flush_batch(sink)
+
+    def _flush_batch(self, sink: QgsFeatureSink) -> None:
+        """Writes the batched features to the sink with a single call"""
+        if not self._batch:
+            return
+        succeeded = sink.addFeatures(self._batch, QgsFeatureSink.FastInsert)
+        if not succeeded:
+            first_fid = self._batch[0].id()
+            count = len(self._batch)
+            error = sink.lastError() if hasattr(sink, "lastError") else ""
+            self._batch.clear()
+            raise ValueError(
+                tr(
+                    "Could not add a batch of {} features starting from feature {} "
+                    "to target layer: {}",
+                    count,
+                    first_fid,
+                    error,
+                )
+            )
+        self._batch.clear()
+
+    def _clip_geometry(
+        self, geometry: QgsGeometry, extent: QgsRectangle
+    ) -> Optional[QgsGeometry]:
+        """
+        Clips the geometry to the extent with the rectangle clipper.
+        Geometries inside the extent are returned as they are.
+        :return: Clipped geometry or None if nothing is left of the geometry
+        """
+        if extent.contains(geometry.boundingBox()):
+            return geometry
+        clipped = geometry.clipped(extent)
+        if clipped.isNull() or clipped.isEmpty():
+            return None
+        if QgsWkbTypes.isMultiType(self.layer.wkbType()):
+            clipped.convertToMultiType()
+        return clipped
 
     def _generate_fields(self) -> QgsFields:
         fields: QgsFields = self.layer.fields()
@@ -290,67 +718,69 @@ class StylesToAttributes:
         return fields
 
     def _get_attributes_for_feature(self, feature: QgsFeature) -> List[Any]:
-        attributes = {
-            i: feature[field.name()]
-            for i, field in enumerate(feature.fields().toList())
-        }
+        return self._get_attributes_for_symbol(feature, self._get_symbol_index(feature))
+
+    def _get_attributes_for_symbol(
+        self,
+        feature: QgsFeature,
+        matched: Optional[int],
+        evaluator: Optional[ExpressionEvaluator] = None,
+        styles: Optional[Dict[int, Style]] = None,
+    ) -> List[Any]:
+        """
+        :param evaluator: Evaluator to use instead of the shared one
+        :param styles: Styles to evaluate instead of the shared styles
+        """
+        attributes = feature.attributes()
+        if matched is None:
+            return attributes
+
+        row = self.style_rows.get(matched)
+        if row is None:
+            style: Style = (
+                styles[matched]
+                if styles is not None
+                else self.symbols[matched]["style"]
+            )
+            style.evaluate_data_defined_expressions(
+                feature, evaluator if evaluator is not None else self.evaluator
+            )
+            row = self._get_style_row(style)
+
+        attributes.extend([None] * (self.fields.count() - len(attributes)))
+        for column, value in zip(self.style_columns, row):
+            attributes[column] = value
+        return attributes
+
+    def _get_symbol_index(
+        self, feature: QgsFeature, evaluator: Optional[ExpressionEvaluator] = None
+    ) -> Optional[int]:
+        if self.classified:
+            index = self.classified.get(feature.id())
+            if index is not None:
+                return None if index == NO_MATCH else index
+
         if self.symbol_type == SymbolType.graduatedSymbol:
             feature_value = feature[self.mapped_col]
-            matched = None
-            if feature_value is not None:
-                for index, s in self.symbols.items():
-                    if s["range_lower"] <= feature_value < s["range_upper"]:
-                        matched = index
-                        break
-                if matched is not None:
-                    style: Style = self.symbols[matched]["style"]
-                    style.evaluate_data_defined_expressions(feature)
-                    for field_name in self.field_template.keys():
-                        attributes[
-                            self.fields.names().index(field_name)
-                        ] = style.to_dict()[field_name]
+            if not is_null(feature_value) and self.range_index is not None:
+                return self.range_index.lookup(feature_value)
 
         elif self.symbol_type == SymbolType.categorizedSymbol:
-            feature_value = feature[self.mapped_col]
-            matched = None
-            if feature_value is not None:
-                for index, s in self.symbols.items():
-                    if str(feature_value) == str(s["value"]):
-                        matched = index
-                        break
-                if matched is not None:
-                    style = self.symbols[matched]["style"]
-                    style.evaluate_data_defined_expressions(feature)
-                    for field_name in self.field_template.keys():
-                        attributes[
-                            self.fields.names().index(field_name)
-                        ] = style.to_dict()[field_name]
+            if self.category_index is not None:
+                return self.category_index.lookup(feature[self.mapped_col])
 
         elif self.symbol_type == SymbolType.singleSymbol:
-            for field_name in self.field_template.keys():
-                style = self.symbols[0]["style"]
-                style.evaluate_data_defined_expressions(feature)
-                attributes[self.fields.names().index(field_name)] = style.to_dict()[
-                    field_name
-                ]
+            return 0
 
         elif self.symbol_type == SymbolType.RuleRenderer:
-            matched = None
+            evaluator = evaluator if evaluator is not None else self.evaluator
             for index, s in self.symbols.items():
-                if evaluate_expressions(s["value"], feature, layer=self.layer):
-                    matched = index
-                    break
-            if matched is not None:
-                style = self.symbols[matched]["style"]
-                style.evaluate_data_defined_expressions(feature)
-                for field_name in self.field_template.keys():
-                    attributes[self.fields.names().index(field_name)] = style.to_dict()[
-                        field_name
-                    ]
+                if evaluator.evaluate(s["value"], feature):
+                    return index
 
         # TODO: Add more
 
-        return [attributes[key] for key in sorted(attributes.keys())]
+        return None
 
     def _update_legend(self) -> None:
         legend = {}
@@ -0,0 +1,210 @@
+#  Gispo Ltd., hereby disclaims all copyright interest in the program
+#  SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NO_MATCH = -1
+
+
+class GraduatedRangeIndex:
+    """
+    Sorted boundary index for the ranges of a graduated renderer.
+
+    The ranges are split into elementary intervals between consecutive
+    boundaries and each interval is assigned to the first range (in symbol order)
+    covering it, so a lookup is a single binary search. Ranges are half-open
+    [lower, upper) except that the topmost upper boundary is inclusive, values
+    falling into gaps between the ranges do not match any range.
+    """
+
+    def __init__(self, ranges: Sequence[Tuple[float, float]]) -> None:
+        """
+        :param ranges: (lower, upper) pairs in symbol order
+        """
+        self.boundaries: List[float] = sorted(
+            {bound for range_ in ranges for bound in range_}
+        )
+        self.matches: List[Optional[int]] = []
+        for i in range(len(self.boundaries) - 1):
+            start, end = self.boundaries[i], self.boundaries[i + 1]
+            self.matches.append(
+                next(
+                    (
+                        index
+                        for index, (lower, upper) in enumerate(ranges)
+                        if lower <= start and end <= upper
+                    ),
+                    None,
+                )
+            )
+
+        self.top_match: Optional[int] = None
+        if self.boundaries:
+            top = self.boundaries[-1]
+            self.top_match = next(
+                (
+                    index
+                    for index, (lower, upper) in enumerate(ranges)
+                    if upper == top and lower <= top
+                ),
+                None,
+            )
+
+    def lookup(self, value: Any) -> Optional[int]:
+        """
+        :param value: Value of the classification attribute
+        :return: Index of the matching range or None
+        """
+        i = bisect_right(self.boundaries, value) - 1
+        if i < 0:
+            return None
+        if i < len(self.matches):
+            return self.matches[i]
+        if value == self.boundaries[-1]:
+            return self.top_match
+        return None
+
+    def lookup_array(self, values: "np.ndarray") -> "np.ndarray":
+        """
+        Vectorized lookup, requires NumPy.
+
+        :param values: Float array of classification attribute values, NULL values
+            as NaN
+        :return: Integer array of range indices, NO_MATCH for unmatched values
+        """
+        result = np.full(len(values), NO_MATCH, dtype=np.int64)
+        if not self.boundaries:
+            return result
+
+        boundaries = np.asarray(self.boundaries, dtype=float)
+        matches = np.array(
+            [NO_MATCH if match is None else match for match in self.matches],
+            dtype=np.int64,
+        )
+        i = np.searchsorted(boundaries, values, side="right") - 1
+        inside = (i >= 0) & (i < len(matches))
+        result[inside] = matches[i[inside]]
+        if self.top_match is not None:
+            result[values == boundaries[-1]] = self.top_match
+        return result
+
+
+class CategoryIndex:
+    """
+    Hash index from category values of a categorized renderer to symbol indices.
+
+    Keys keep their type: integers and floats compare numerically (1 and 1.0 are
+    the same key) and category strings that are plain numbers are registered
+    also with their numeric value. Values of other types are compared by their string
+    representation. NULL and empty category values form the "all other values"
+    catch-all category, which is returned for NULL and unmatched features.
+    """
+
+    def __init__(self, values: Sequence[Any]) -> None:
+        """
+        :param values: category values in symbol order
+        """
+        self.lookup_table: Dict[Any, int] = {}
+        self.catch_all: Optional[int] = None
+        for index, value in enumerate(values):
+            if is_null(value) or value == "":
+                if self.catch_all is None:
+                    self.catch_all = index
+                continue
+            for category_value in value if isinstance(value, list) else [value]:
+                for key in self._keys(category_value):
+                    self.lookup_table.setdefault(key, index)
+
+    @staticmethod
+    def key(value: Any) -> Union[str, int, float]:
+        if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+            return value
+        return str(value)
+
+    @staticmethod
+    def _keys(value: Any) -> List[Union[str, int, float]]:
+        key = CategoryIndex.key(value)
+        keys = [key]
+        if isinstance(key, str):
+            try:
+                number = float(key)
+                numeric = int(number) if number.is_integer() else number
+                if str(numeric) == key:
+                    keys.append(numeric)
+            except (ValueError, OverflowError):
+                pass
+        else:
+            keys.append(str(value))
+        return keys
+
+    def lookup(self, value: Any) -> Optional[int]:
+        """
+        :param value: Value of the classification attribute
+        :return: Index of the matching category, catch-all category or None
+        """
+        if is_null(value):
+            return self.catch_all
+        return self.lookup_table.get(self.key(value), self.catch_all)
+
+    def lookup_array(self, values: Sequence[Any]) -> "np.ndarray":
+        """
+        Vectorized lookup, requires NumPy. Each distinct value is looked up only
+        once if the values are all numbers or all strings.
+
+        :param values: Values of the classification attribute
+        :return: Integer array of category indices, NO_MATCH for unmatched values
+        """
+        not_null = np.array([not is_null(value) for value in values], dtype=bool)
+        result = np.full(
+            len(values),
+            NO_MATCH if self.catch_all is None else self.catch_all,
+            dtype=np.int64,
+        )
+        present = [value for value, keep in zip(values, not_null) if keep]
+        if not present:
+            return result
+
+        types = {type(value) for value in present}
+        if types <= {int, float} or types == {str}:
+            uniques, inverse = np.unique(np.array(present), return_inverse=True)
+            codes = np.array(
+                [self._code(self.lookup(unique.item())) for unique in uniques],
+                dtype=np.int64,
+            )[inverse.reshape(-1)]
+        else:
+            codes = np.array(
+                [self._code(self.lookup(value)) for value in present], dtype=np.int64
+            )
+        result[not_null] = codes
+        return result
+
+    @staticmethod
+    def _code(index: Optional[int]) -> int:
+        return NO_MATCH if index is None else index
+
+
+def is_null(value: Any) -> bool:
+    """Whether the value is None or a NULL QVariant"""
+    return value is None or (hasattr(value, "isNull") and value.isNull())
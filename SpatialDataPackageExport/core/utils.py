@@ -19,11 +19,16 @@
 #  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
 
 import json
+import os
+import re
 from pathlib import Path
-from typing import Dict, List, Union
+from typing import Dict, List, Set, Tuple, Union
 
 from qgis.core import QgsRectangle
 
+# Files of a shapefile besides the .shp file, affecting the read features
+SHAPEFILE_SIBLINGS = (".dbf", ".shx", ".cpg")
+
 
 def load_json(json_path: Union[str, Path]) -> Dict:
     with open(json_path, encoding="utf-8") as f:
@@ -36,6 +41,56 @@ def write_json(path: Union[str, Path], content: Dict) -> None:
         json.dump(content, f, ensure_ascii=False)
 
 
+def file_versions(path: str) -> List[Tuple[str, int, int]]:
+    """
+    Modification times in nanoseconds and sizes of the file, of its SQLite
+    write-ahead log, where committed changes may still be, and of the sibling
+    files of a shapefile
+    :param path: Path of the data source file
+    :return: Name, modification time and size of each existing file
+    """
+    files = [path, f"{path}-wal"]
+    root, extension = os.path.splitext(path)
+    if extension.lower() == ".shp":
+        files.extend(
+            root + (sibling if extension == ".shp" else sibling.upper())
+            for sibling in SHAPEFILE_SIBLINGS
+        )
+    versions = []
+    for file in files:
+        try:
+            stat = os.stat(file)
+        except OSError:
+            continue
+        versions.append((os.path.basename(file), stat.st_mtime_ns, stat.st_size))
+    return versions
+
+
+def safe_file_name(name: str) -> str:
+    """
+    Replaces the characters not allowed or troublesome in file names with "_"
+    :param name: Name of a layer or a snapshot
+    """
+    return re.sub(r"[^\w.-]", "_", name).lstrip(".") or "_"
+
+
+def unique_file_name(name: str, taken: Set[str]) -> str:
+    """
+    Safe file name not in the taken names, with a numeric suffix if needed
+    :param name: Name of a layer or a resource
+    :param taken: Lower case names already used, the new name is added to it.
+        Compared case-insensitively for the file systems ignoring the case.
+    """
+    stem = safe_file_name(name)
+    file_name = stem
+    i = 1
+    while file_name.lower() in taken:
+        i += 1
+        file_name = f"{stem}-{i}"
+    taken.add(file_name.lower())
+    return file_name
+
+
 def extent_to_datapackage_bounds(extent: QgsRectangle, precision: int) -> List[str]:
     """
     Datapackage bounds are in format ["geo:ymin,xmin", "geo:ymax,xmax"]
@@ -36,9 +36,31 @@ from ..qgis_plugin_tools.tools.settings import (
 class LayerFormatOptions(enum.Enum):
     memory = "memory"
     geojson = "geojson"
+    flatgeobuf = "flatgeobuf"
     none = "none"
 
 
+@enum.unique
+class RuleFilterOptions(enum.Enum):
+    feature = "feature"
+    provider = "provider"
+
+
+@enum.unique
+class ExportModeOptions(enum.Enum):
+    tasks = "tasks"
+    processes = "processes"
+
+
+@enum.unique
+class ResourceFormatOptions(enum.Enum):
+    inline = "inline"
+    geojson = "geojson"
+    geojsonseq = "geojsonseq"
+    flatgeobuf = "flatgeobuf"
+    geoparquet = "geoparquet"
+
+
 @enum.unique
 class Settings(enum.Enum):
     extent_precision = 8
@@ -46,6 +68,17 @@ class Settings(enum.Enum):
     snapshot_template = resources_path("templates", "snapshot-template.json")
     layer_format = "memory"
     crop_layers = True
+    bulk_classification = False
+    rule_filter = "feature"
+    export_batch_size = 1000
+    parallel_exports = 4
+    export_memory_limit = 2048
+    layer_workers = 1
+    export_mode = "tasks"
+    resource_cache_size = 1024
+    # Disabled when zero
+    incremental_max_features = 0
+    resource_format = "inline"
     role = "contributor"
     licences = {
         "Creative Commons CC Zero": {
@@ -76,19 +109,43 @@ class Settings(enum.Enum):
 
     _options = {
         "layer_format": [option.value for option in LayerFormatOptions],
+        "rule_filter": [option.value for option in RuleFilterOptions],
+        "export_mode": [option.value for option in ExportModeOptions],
+        "resource_format": [option.value for option in ResourceFormatOptions],
         "role": ["author", "publisher", "maintainer", "wrangler", "contributor"],
     }
 
+    default: Any
+
+    def __new__(cls, default: Any) -> "Settings":
+        """
+        Settings are identified by the type and the default value, so that
+        for example an integer default of 1 is not an alias of a True default
+        :param default: Default value of the setting
+        """
+        obj = object.__new__(cls)
+        obj._value_ = (type(default), default)
+        obj.default = default
+        return obj
+
     def get(self) -> Any:
         """Gets the value of the setting"""
         typehint: type = str
-        if self == Settings.crop_layers:
+        if self in (Settings.crop_layers, Settings.bulk_classification):
             typehint = bool
-        elif self == Settings.extent_precision:
+        elif self in (
+            Settings.extent_precision,
+            Settings.export_batch_size,
+            Settings.parallel_exports,
+            Settings.export_memory_limit,
+            Settings.layer_workers,
+            Settings.resource_cache_size,
+            Settings.incremental_max_features,
+        ):
             typehint = int
         elif self == Settings.licences:
-            return json.loads(get_setting(self.name, json.dumps(self.value), str))
-        return get_setting(self.name, self.value, typehint)
+            return json.loads(get_setting(self.name, json.dumps(self.default), str))
+        return get_setting(self.name, self.default, typehint)
 
     def set(self, value: Union[str, int, float, bool]) -> bool:
         """Sets the value of the setting"""
@@ -103,7 +160,7 @@ class Settings(enum.Enum):
 
     def get_options(self) -> List[Any]:
         """Get options for the setting"""
-        return Settings._options.value.get(self.name, [])
+        return Settings._options.default.get(self.name, [])
 
 
 @enum.unique
@@ -18,7 +18,7 @@
 #  You should have received a copy of the GNU General Public License
 #  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
 import logging
-from typing import Any, Dict, List, Tuple, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
 
 from qgis.core import (
     QgsExpression,
@@ -37,6 +37,9 @@ from ..qgis_plugin_tools.tools.i18n import tr
 from ..qgis_plugin_tools.tools.layers import LayerType, evaluate_expressions
 from ..qgis_plugin_tools.tools.resources import plugin_name
 
+if TYPE_CHECKING:
+    from ..core.expressions import ExpressionEvaluator
+
 LOGGER = logging.getLogger(plugin_name())
 
 
@@ -140,10 +143,15 @@ class Style:
                 )
             )
 
-    def evaluate_data_defined_expressions(self, feature: QgsFeature) -> None:
+    def evaluate_data_defined_expressions(
+        self, feature: QgsFeature, evaluator: Optional["ExpressionEvaluator"] = None
+    ) -> None:
         for fld_name, exp in self.data_defined_expressions.items():
             try:
-                value = evaluate_expressions(exp, feature)
+                if evaluator is not None:
+                    value = evaluator.evaluate(exp, feature)
+                else:
+                    value = evaluate_expressions(exp, feature)
                 self.__dict__[fld_name] = value
             except QgsPluginExpressionException as e:
                 LOGGER.warning(
@@ -25,9 +25,23 @@ from qgis.core import QgsVectorLayer
 from ..qgis_plugin_tools.tools.layers import LayerType
 from .style import PointStyle, SimpleStyle, Style
 
+# Media types of the resources written as FlatGeobuf or GeoParquet files, of
+# either style type
+FLATGEOBUF_MEDIA_TYPE = "application/flatgeobuf"
+GEOPARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
 
 @enum.unique
 class StyleType(enum.Enum):
+    """
+    Style of the exported layer. The media type is the one of the layer resources
+    with inline GeoJSON data: application/geo+json for the simplestyle attributes
+    and application/vnd.simplestyle-extended for points with the additional
+    radius attributes. Layer resources written as FlatGeobuf or GeoParquet files
+    carry the same style attributes and have the media type FLATGEOBUF_MEDIA_TYPE
+    or GEOPARQUET_MEDIA_TYPE.
+    """
+
     SimpleStyle = {"mediatype": "application/geo+json", "style_cls": SimpleStyle}
     PointStyle = {
         "mediatype": "application/vnd.simplestyle-extended",
@@ -72,6 +72,7 @@ class SnapshotConfig:
         bounds_precision: Optional[int] = None,
         crop_layers: Optional[bool] = None,
         contributors: Optional[List[Contributor]] = None,
+        clip_layers: Optional[bool] = None,
     ) -> None:
         self.title = title
         self.description = description
@@ -84,6 +85,7 @@ class SnapshotConfig:
         self.bounds_precision = bounds_precision
         self.crop_layers = crop_layers
         self.contributors = contributors
+        self.clip_layers = clip_layers
 
     @staticmethod
     def from_dict(obj: Any) -> "SnapshotConfig":
@@ -117,6 +119,7 @@ class SnapshotConfig:
             [lambda x: from_list(Contributor.from_dict, x), from_none],
             obj.get("contributors"),
         )
+        clip_layers = from_union([from_bool, from_none], obj.get("clip_layers"))
         return SnapshotConfig(
             title,
             description,
@@ -129,6 +132,7 @@ class SnapshotConfig:
             bounds_precision,
             crop_layers,
             contributors,
+            clip_layers,
         )
 
     @staticmethod
@@ -207,6 +211,8 @@ class SnapshotConfig:
                 ],
                 self.contributors,
             )
+        if self.clip_layers is not None:
+            result["clip_layers"] = from_union([from_bool, from_none], self.clip_layers)
         return result
 
 
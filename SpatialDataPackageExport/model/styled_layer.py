@@ -20,11 +20,12 @@
 import logging
 import tempfile
 from pathlib import Path
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Union
 
 from qgis.core import (
     QgsCoordinateReferenceSystem,
     QgsCoordinateTransform,
+    QgsLayerMetadata,
     QgsProject,
     QgsVectorFileWriter,
     QgsVectorLayer,
@@ -32,7 +33,7 @@ from qgis.core import (
 
 from ..core.exceptions import DataPackageException
 from ..core.utils import load_json
-from ..definitions.configurable_settings import Settings
+from ..definitions.configurable_settings import ResourceFormatOptions, Settings
 from ..definitions.types import StyleType
 from ..qgis_plugin_tools.tools.custom_logging import bar_msg
 from ..qgis_plugin_tools.tools.i18n import tr
@@ -49,6 +50,10 @@ class StyledLayer:
         layer_id: str,
         legend: List[Legend],
         style_type: Union[str, StyleType],
+        geojson_path: Optional[Path] = None,
+        metadata: Optional[QgsLayerMetadata] = None,
+        flatgeobuf_path: Optional[Path] = None,
+        geoparquet_path: Optional[Path] = None,
     ) -> None:
         self.resource_name = resource_name
         self.layer_id = layer_id
@@ -56,17 +61,25 @@ class StyledLayer:
         self.style_type: StyleType = (
             StyleType[style_type] if isinstance(style_type, str) else style_type
         )
+        self.geojson_path = geojson_path
+        self.metadata = metadata
+        self.flatgeobuf_path = flatgeobuf_path
+        self.geoparquet_path = geoparquet_path
 
     @property
     def layer(self) -> QgsVectorLayer:
         return QgsProject.instance().mapLayer(self.layer_id)
 
+    def get_metadata(self) -> QgsLayerMetadata:
+        """Metadata given on creation, or of the layer in the project"""
+        return self.metadata if self.metadata is not None else self.layer.metadata()
+
     def get_keywords(self) -> List[str]:
-        keyword_lists = self.layer.metadata().keywords().values()
+        keyword_lists = self.get_metadata().keywords().values()
         return [keyword for keyword_list in keyword_lists for keyword in keyword_list]
 
     def get_licenses(self) -> List[License]:
-        licenses = self.layer.metadata().licenses()
+        licenses = self.get_metadata().licenses()
         available_licenses = Settings.licences.get()
         return [
             License(
@@ -77,7 +90,19 @@ class StyledLayer:
             for license_ in licenses
         ]
 
+    def get_exported_file(self, resource_format: str) -> Optional[Path]:
+        """
+        :param resource_format: One of ResourceFormatOptions
+        :return: File the layer was exported to in the format, if any
+        """
+        return {
+            ResourceFormatOptions.flatgeobuf.value: self.flatgeobuf_path,
+            ResourceFormatOptions.geoparquet.value: self.geoparquet_path,
+        }.get(resource_format)
+
     def get_geojson_data(self) -> Dict:
+        if self.geojson_path is not None:
+            return load_json(str(self.geojson_path))
         source = self.layer.source()
         if source.lower().endswith(".geojson") or source.lower().endswith(".json"):
             data = load_json(source)
@@ -87,6 +112,26 @@ class StyledLayer:
                 data = load_json(json_path)
         return data
 
+    def get_geojson_file(self, output_path: Path) -> Path:
+        """
+        Gets a GeoJSON file of the layer without parsing it
+        :param output_path: Directory to write the layer to if it is not
+            available as an unfiltered GeoJSON file in EPSG:4326 already
+        :return: Path to the GeoJSON file
+        """
+        if self.geojson_path is not None:
+            return self.geojson_path
+        layer = self.layer
+        source = layer.source()
+        if (
+            source.lower().endswith((".geojson", ".json"))
+            and layer.crs() == QgsCoordinateReferenceSystem("EPSG:4326")
+            and not layer.subsetString()
+        ):
+            # The file is spliced into the snapshot as is
+            return Path(source)
+        return self.save_as_geojson(output_path)
+
     def save_as_geojson(self, output_path: Path) -> Path:
         output_file = Path(output_path, f"{self.resource_name}.geojson")
 
@@ -19,7 +19,7 @@
 #  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
 from typing import Callable, List, Optional
 
-from qgis.core import QgsApplication
+from qgis.core import QgsApplication, QgsProject
 from qgis.gui import QgisInterface
 from qgis.PyQt import QtWidgets
 from qgis.PyQt.QtCore import QCoreApplication, Qt, QTranslator
@@ -27,6 +27,7 @@ from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtWidgets import QAction, QWidget
 
 from .core.processing.provider import SpatialDataPackageProcessingProvider
+from .core.spatial_index_cache import SPATIAL_INDEX_CACHE
 from .qgis_plugin_tools.tools.custom_logging import setup_logger, teardown_logger
 from .qgis_plugin_tools.tools.i18n import setup_translation, tr
 from .qgis_plugin_tools.tools.resources import plugin_name, resources_path
@@ -139,6 +140,12 @@ class Plugin:
         )
 
         QgsApplication.processingRegistry().addProvider(self.processing_provider)
+        QgsProject.instance().layersRemoved.connect(self.__remove_spatial_indices)
+
+    @staticmethod
+    def __remove_spatial_indices(layer_ids: List[str]) -> None:
+        for layer_id in layer_ids:
+            SPATIAL_INDEX_CACHE.remove(layer_id)
 
     def onClosePlugin(self) -> None:  # noqa: N802
         """Cleanup necessary items here when plugin dockwidget is closed"""
@@ -153,6 +160,8 @@ class Plugin:
             self.iface.removeToolBarIcon(action)
 
         QgsApplication.processingRegistry().removeProvider(self.processing_provider)
+        QgsProject.instance().layersRemoved.disconnect(self.__remove_spatial_indices)
+        SPATIAL_INDEX_CACHE.clear()
         teardown_logger(plugin_name())
 
     # noinspection PyArgumentList
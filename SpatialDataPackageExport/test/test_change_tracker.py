@@ -0,0 +1,109 @@
+# type: ignore
+# flake8: noqa ANN201, ANN001
+
+#  Gispo Ltd., hereby disclaims all copyright interest in the program SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+import json
+from pathlib import Path
+
+from qgis.core import (
+    QgsCoordinateTransformContext,
+    QgsFeature,
+    QgsFeatureRequest,
+    QgsProcessingFeedback,
+)
+
+from ..core.change_tracker import (
+    ChangeTracker,
+    FeatureCache,
+    IncrementalExporter,
+    data_version,
+)
+from ..core.layer_snapshot import LayerSnapshot
+from ..core.styles2attributes import StylesToAttributes
+
+
+def export(layer, output_file, cache, fids=None):
+    snapshot = LayerSnapshot(layer)
+    feedback = QgsProcessingFeedback()
+    converter = StylesToAttributes(snapshot, layer.name(), feedback)
+    exporter = IncrementalExporter(
+        snapshot, converter, QgsCoordinateTransformContext(), cache, fids
+    )
+    assert exporter.export(output_file, None, feedback)
+    with open(output_file, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_changed_features_are_patched(new_project, layer_points, tmp_path):
+    layer = layer_points.materialize(QgsFeatureRequest())
+    layer.setRenderer(layer_points.renderer().clone())
+    tracker = ChangeTracker()
+    tracker.track(layer)
+    output_file = Path(tmp_path, "points.geojson")
+
+    cache = FeatureCache("key", layer.name(), data_version(layer))
+    full = export(layer, output_file, cache)
+    tracker.store(layer, cache)
+    assert tracker.take_changes(layer) == set()
+
+    fids = sorted(layer.allFeatureIds())
+    layer.startEditing()
+    layer.changeAttributeValue(fids[0], layer.fields().indexOf("category"), "edited")
+    layer.deleteFeature(fids[1])
+    changes = tracker.take_changes(layer)
+    assert changes == {fids[0], fids[1]}
+
+    patched = export(layer, output_file, tracker.get_cache(layer, "key"), changes)
+    categories = [f["properties"]["category"] for f in patched["features"]]
+    assert len(patched["features"]) == len(full["features"]) - 1
+    assert categories.count("edited") == 1
+    assert patched["name"] == layer.name()
+    layer.rollBack()
+
+
+def test_invalidated_layer_has_no_cache(new_project, layer_points):
+    tracker = ChangeTracker()
+    tracker.store(
+        layer_points,
+        FeatureCache("key", layer_points.name(), data_version(layer_points)),
+    )
+    assert tracker.get_cache(layer_points, "key") is not None
+    assert tracker.get_cache(layer_points, "other") is None
+
+    tracker.invalidate(layer_points.id())
+
+    assert tracker.get_cache(layer_points, "key") is None
+
+
+def test_cache_is_dropped_when_data_changes_on_disk(new_project, layer_points):
+    layer = layer_points.materialize(QgsFeatureRequest())
+    tracker = ChangeTracker()
+    tracker.store(layer, FeatureCache("key", layer.name(), data_version(layer)))
+
+    layer.startEditing()
+    layer.deleteFeature(next(iter(layer.allFeatureIds())))
+    # Edits in the edit buffer are tracked as changes
+    assert tracker.get_cache(layer, "key") is not None
+    layer.rollBack()
+
+    layer.dataProvider().addFeatures([QgsFeature(layer.fields())])
+
+    assert tracker.get_cache(layer, "key") is None
+    assert layer.id() not in tracker.caches
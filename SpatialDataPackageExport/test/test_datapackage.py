@@ -19,15 +19,23 @@
 #  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
 
 import json
+import math
 import shutil
 from pathlib import Path
 
 import pytest
-from qgis.core import QgsProcessingFeedback, QgsVectorDataProvider, QgsVectorLayer
+from qgis.core import (
+    QgsProcessingFeedback,
+    QgsProject,
+    QgsVectorDataProvider,
+    QgsVectorLayer,
+)
 
 from ..core.datapackage import DataPackageHandler
+from ..core.geojson_writer import GeoJsonWriter, MultiFeatureSink, json_value
+from ..core.sidecar_writer import SidecarWriter
 from ..core.styles2attributes import StylesToAttributes
-from ..core.utils import load_json
+from ..core.utils import load_json, safe_file_name
 from ..definitions.types import StyleType
 from ..model.config import Config
 from ..model.snapshot import Contributor, Snapshot
@@ -209,6 +217,97 @@ def test_styled_layer(tmp_path, points_with_radius):
     assert Path(tmp_path, "point-sample-snapshot.geojson").exists()
 
 
+def test_styled_layer_with_streamed_geojson(
+    new_project, tmp_path, categorized_poly, layer_empty_poly
+):
+    converter = StylesToAttributes(
+        categorized_poly, categorized_poly.name(), QgsProcessingFeedback()
+    )
+    update_fields(converter, layer_empty_poly)
+    layer_empty_poly.startEditing()
+    writer = GeoJsonWriter(
+        Path(tmp_path, "streamed.geojson"),
+        converter.fields,
+        categorized_poly.crs(),
+        QgsProject.instance().transformContext(),
+    )
+    with writer:
+        converter.extract_styles_to_layer(MultiFeatureSink([layer_empty_poly, writer]))
+    assert layer_empty_poly.commitChanges()
+    add_layer(layer_empty_poly)
+
+    streamed = StyledLayer(
+        "streamed",
+        layer_empty_poly.id(),
+        [],
+        converter.style_type,
+        geojson_path=writer.output_file,
+    ).get_geojson_data()
+    written = StyledLayer(
+        "written", layer_empty_poly.id(), [], converter.style_type
+    ).get_geojson_data()
+
+    assert writer.feature_count == len(written["features"])
+    assert [f["properties"] for f in streamed["features"]] == [
+        f["properties"] for f in written["features"]
+    ]
+    for streamed_f, written_f in zip(streamed["features"], written["features"]):
+        assert streamed_f["geometry"]["type"] == written_f["geometry"]["type"]
+        assert flatten(streamed_f["geometry"]["coordinates"]) == pytest.approx(
+            flatten(written_f["geometry"]["coordinates"])
+        )
+
+
+@pytest.mark.parametrize("value", (math.nan, math.inf, -math.inf))
+def test_non_finite_values_are_null(value):
+    assert json_value(value) is None
+    assert json_value([1.5, value]) == [1.5, None]
+    assert json_value({"value": value}) == {"value": None}
+
+
+@pytest.mark.parametrize("resource_format", ("geojson", "geojsonseq", "flatgeobuf"))
+def test_stream_snapshot_with_sidecar_resources(tmp_path, resource_format):
+    snapshot = Snapshot.from_dict(
+        get_test_json("snapshots", "with_non_ascii_chars.json")
+    )
+    resource = next(r for r in snapshot.resources if r.data is not None)
+    geojson_path = Path(tmp_path, "layer.geojson")
+    geojson_path.write_text(json.dumps(resource.data), encoding="utf-8")
+    feature_count = len(resource.data["features"])
+    resource.data = None
+    styled_layer = StyledLayer(
+        resource.name, "", [], StyleType.PointStyle, geojson_path=geojson_path
+    )
+    output_file = Path(tmp_path, "output", "snapshot.json")
+    output_file.parent.mkdir()
+
+    assert DataPackageHandler.stream_snapshot(
+        output_file, snapshot, [styled_layer], resource_format=resource_format
+    )
+
+    written = load_json(output_file)["resources"][0]
+    assert "data" not in written
+    sidecar = Path(output_file.parent, written["path"])
+    assert sidecar.name.startswith(safe_file_name(f"{snapshot.name}-{resource.name}"))
+    layer = QgsVectorLayer(str(sidecar), "sidecar", "ogr")
+    assert layer.isValid()
+    assert layer.featureCount() == feature_count
+
+
+def test_sidecar_paths_are_safe_and_unique(tmp_path):
+    writer = SidecarWriter(tmp_path, "geojson", 1)
+
+    paths = writer.get_paths("snap", ["a/b", "a:b", "A?b", "../c"])
+
+    assert [path.name for path in paths.values()] == [
+        "snap-a_b.geojson",
+        "snap-a_b-2.geojson",
+        "snap-A_b-3.geojson",
+        "snap-.._c.geojson",
+    ]
+    assert all(path.parent == tmp_path for path in paths.values())
+
+
 def test_config_saving_and_loading(new_project):
     config_data = load_json(plugin_test_data_path("config", "config_simple_poly.json"))
     config = Config.from_dict(config_data)
@@ -258,6 +357,12 @@ def test_load_snapshot_from_file(new_project, tmp_path, snapshot_name):
     """
 
 
+def flatten(coordinates):
+    if isinstance(coordinates, list):
+        return [value for item in coordinates for value in flatten(item)]
+    return [coordinates]
+
+
 def update_fields(converter: StylesToAttributes, layer: QgsVectorLayer):
     dp: QgsVectorDataProvider = layer.dataProvider()
     dp.addAttributes(converter.fields)
@@ -0,0 +1,103 @@
+# type: ignore
+# flake8: noqa ANN201, ANN001
+
+#  Gispo Ltd., hereby disclaims all copyright interest in the program SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from qgis.core import QgsExpression, QgsProcessingFeedback
+
+from ..core.expressions import ExpressionEvaluator
+from ..core.layer_snapshot import LayerSnapshot
+from ..qgis_plugin_tools.tools.exceptions import QgsPluginExpressionException
+
+
+class DebugFeedback(QgsProcessingFeedback):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def pushDebugInfo(self, info):  # noqa: N802
+        self.messages.append(info)
+
+
+def test_prepare_reuses_prepared_expression(new_project, layer_points):
+    evaluator = ExpressionEvaluator(layer_points)
+    prepared = evaluator.prepare(QgsExpression('"score" * 2'))
+
+    assert evaluator.prepare(QgsExpression('"score" * 2')) is prepared
+    assert evaluator.evaluation_counts == {'"score" * 2': 0}
+
+
+def test_evaluate(new_project, layer_points):
+    evaluator = ExpressionEvaluator(layer_points)
+    expression = QgsExpression('"score" * 2')
+
+    for feature in layer_points.getFeatures():
+        assert evaluator.evaluate(expression, feature) == feature["score"] * 2
+    assert evaluator.evaluation_counts['"score" * 2'] == layer_points.featureCount()
+
+
+def test_evaluate_with_parse_error(new_project, layer_points):
+    evaluator = ExpressionEvaluator(layer_points)
+    expression = QgsExpression('"score" *')
+    assert expression.hasParserError()
+
+    with pytest.raises(QgsPluginExpressionException):
+        evaluator.evaluate(expression, next(layer_points.getFeatures()))
+
+
+def test_evaluate_with_evaluation_error(new_project, layer_points):
+    evaluator = ExpressionEvaluator(layer_points)
+    expression = QgsExpression("to_date('not a date')")
+
+    with pytest.raises(QgsPluginExpressionException):
+        evaluator.evaluate(expression, next(layer_points.getFeatures()))
+    assert evaluator.evaluation_counts["to_date('not a date')"] == 1
+
+
+def test_merge_counts_of_threads(new_project, layer_points):
+    snapshot = LayerSnapshot(layer_points)
+    features = list(snapshot.getFeatures())
+    expressions = [QgsExpression('"score" * 2'), QgsExpression('"radius" + 1')]
+
+    def evaluate(expression_count):
+        evaluator = ExpressionEvaluator(snapshot)
+        for feature in features:
+            for expression in expressions[:expression_count]:
+                evaluator.evaluate(expression, feature)
+        return evaluator
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        evaluators = list(executor.map(evaluate, (1, 2)))
+    merged = ExpressionEvaluator(snapshot)
+    for evaluator in evaluators:
+        merged.merge(evaluator)
+
+    assert merged.evaluation_counts == {
+        '"score" * 2': 2 * len(features),
+        '"radius" + 1': len(features),
+    }
+    assert merged.evaluation_times['"score" * 2'] == pytest.approx(
+        sum(evaluator.evaluation_times['"score" * 2'] for evaluator in evaluators)
+    )
+
+    feedback = DebugFeedback()
+    merged.report(feedback)
+    assert len(feedback.messages) == 2
+    assert f"{2 * len(features)} evaluations" in feedback.messages[0]
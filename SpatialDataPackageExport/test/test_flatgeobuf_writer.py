@@ -0,0 +1,53 @@
+# type: ignore
+# flake8: noqa ANN201, ANN001
+
+#  Gispo Ltd., hereby disclaims all copyright interest in the program SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+from pathlib import Path
+
+from qgis.core import (
+    QgsFeatureSource,
+    QgsProcessingFeedback,
+    QgsProject,
+    QgsVectorLayer,
+)
+
+from ..core.flatgeobuf_writer import FlatGeobufWriter
+from ..core.styles2attributes import StylesToAttributes
+from ..definitions.style import SimpleStyle
+
+
+def test_flatgeobuf_writer(new_project, categorized_poly, tmp_path):
+    converter = StylesToAttributes(
+        categorized_poly, categorized_poly.name(), QgsProcessingFeedback()
+    )
+    output_file = Path(tmp_path, "layer.fgb")
+    with FlatGeobufWriter(
+        output_file,
+        converter.fields,
+        categorized_poly.wkbType(),
+        categorized_poly.crs(),
+        QgsProject.instance().transformContext(),
+    ) as writer:
+        converter.extract_styles_to_layer(writer)
+
+    layer = QgsVectorLayer(str(output_file), "written", "ogr")
+    assert layer.isValid()
+    assert layer.featureCount() == categorized_poly.featureCount()
+    assert layer.crs().authid() == "EPSG:4326"
+    assert set(SimpleStyle.FIELD_MAPPER).issubset(layer.fields().names())
+    assert layer.hasSpatialIndex() == QgsFeatureSource.SpatialIndexPresent
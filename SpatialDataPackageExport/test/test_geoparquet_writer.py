@@ -0,0 +1,51 @@
+# type: ignore
+# flake8: noqa ANN201, ANN001
+
+#  Gispo Ltd., hereby disclaims all copyright interest in the program SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+import json
+from pathlib import Path
+
+import pytest
+from qgis.core import QgsProcessingFeedback, QgsProject
+
+from ..core.geoparquet_writer import GeoParquetWriter
+from ..core.styles2attributes import StylesToAttributes
+
+
+def test_geoparquet_writer(new_project, categorized_poly, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    converter = StylesToAttributes(
+        categorized_poly, categorized_poly.name(), QgsProcessingFeedback()
+    )
+    output_file = Path(tmp_path, "layer.parquet")
+    with GeoParquetWriter(
+        output_file,
+        converter.fields,
+        categorized_poly.crs(),
+        QgsProject.instance().transformContext(),
+        dictionary_fields=converter.field_template.keys(),
+        row_group_size=2,
+    ) as writer:
+        converter.extract_styles_to_layer(writer)
+
+    table = pq.read_table(str(output_file))
+    assert table.num_rows == categorized_poly.featureCount()
+    assert table.schema.field("fill").type.value_type == "string"
+    assert table.schema.field("geometry").type == "binary"
+    assert json.loads(table.schema.metadata[b"geo"])["primary_column"] == "geometry"
+    assert None not in table.column("fill").to_pylist()
@@ -0,0 +1,110 @@
+#  Gispo Ltd., hereby disclaims all copyright interest in the program
+#  SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+#
+from ..core.progress import ProgressThrottle
+
+
+class Feedback:
+    def __init__(self, cancel_after=None):
+        self.cancel_after = cancel_after
+        self.cancel_checks = 0
+        self.progress = []
+        self.debug = []
+
+    def isCanceled(self):  # noqa: N802
+        self.cancel_checks += 1
+        return self.cancel_after is not None and self.cancel_checks > self.cancel_after
+
+    def setProgress(self, progress):  # noqa: N802
+        self.progress.append(progress)
+
+    def pushDebugInfo(self, info):  # noqa: N802
+        self.debug.append(info)
+
+
+class Clock:
+    def __init__(self, step):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+def test_progress_throttle_checks_only_at_checkpoints():
+    feedback = Feedback()
+    throttle = ProgressThrottle(
+        feedback, 1000, check_every=100, interval=0.0, clock=Clock(0.1)
+    )
+    for current in range(1000):
+        assert throttle.update(current)
+    throttle.finish(1000)
+
+    assert feedback.cancel_checks == 9
+    assert feedback.progress == [10, 20, 30, 40, 50, 60, 70, 80, 90, 100]
+
+
+def test_progress_throttle_limits_progress_by_time():
+    feedback = Feedback()
+    throttle = ProgressThrottle(
+        feedback, 1000, check_every=10, interval=1.0, clock=Clock(0.25)
+    )
+    for current in range(1000):
+        throttle.update(current)
+
+    assert feedback.cancel_checks == 99
+    assert len(feedback.progress) == 24
+
+
+def test_progress_throttle_stops_on_cancel():
+    feedback = Feedback(cancel_after=2)
+    throttle = ProgressThrottle(feedback, 1000, check_every=10, clock=Clock(0.1))
+    processed = 0
+    for current in range(1000):
+        if not throttle.update(current):
+            break
+        processed += 1
+    throttle.finish(processed)
+
+    assert processed == 30
+    assert throttle.canceled
+    assert feedback.progress == []
+
+
+def test_progress_throttle_reports_throughput_and_eta():
+    feedback = Feedback()
+    throttle = ProgressThrottle(
+        feedback, 100, check_every=10, report_interval=1.0, clock=Clock(0.5)
+    )
+    for current in range(50):
+        throttle.update(current)
+
+    assert throttle.eta(50, throttle.start + 5.0) == 5.0
+    assert "features/s" in feedback.debug[0]
+    assert "ETA" in feedback.debug[0]
+
+
+def test_progress_throttle_with_unknown_total():
+    feedback = Feedback()
+    throttle = ProgressThrottle(feedback, 0, clock=Clock(1.0))
+    throttle.finish(10)
+    assert feedback.progress == [100]
+    assert throttle.eta(10, throttle.start + 1.0) is None
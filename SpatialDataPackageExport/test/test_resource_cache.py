@@ -0,0 +1,69 @@
+# type: ignore
+# flake8: noqa ANN201, ANN001
+
+#  Gispo Ltd., hereby disclaims all copyright interest in the program SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+import os
+from pathlib import Path
+
+from ..core.resource_cache import ResourceCache, fingerprint
+
+LEGEND = [{"label": "a", "shape": "square"}]
+
+
+def write_geojson(path, size=10):
+    path.write_text('{"type":"FeatureCollection","features":[]}' + " " * size)
+    return path
+
+
+def test_fingerprint():
+    assert fingerprint({"a": 1, "b": [1, 2]}) == fingerprint({"b": [1, 2], "a": 1})
+    assert fingerprint({"a": 1}) != fingerprint({"a": 2})
+
+
+def test_put_and_get(tmp_path):
+    cache = ResourceCache(Path(tmp_path, "cache"), 1024 * 1024)
+    source = write_geojson(Path(tmp_path, "layer.geojson"))
+
+    assert cache.get("key") is None
+    cache.put("key", source, LEGEND, "SimpleStyle")
+    resource = cache.get("key")
+
+    assert resource.legend == LEGEND
+    assert resource.style_type == "SimpleStyle"
+    output_file = Path(tmp_path, "output.geojson")
+    cache.copy_to(resource, output_file)
+    assert output_file.read_text() == source.read_text()
+
+
+def test_least_recently_used_are_evicted(tmp_path):
+    cache = ResourceCache(Path(tmp_path, "cache"), 1500)
+    source = write_geojson(Path(tmp_path, "layer.geojson"), size=500)
+    cache.put("first", source, LEGEND, "SimpleStyle")
+    cache.put("second", source, LEGEND, "SimpleStyle")
+    # Make the first entry older, then use it to make it the most recent
+    for key, mtime in (("first", 1000), ("second", 2000)):
+        os.utime(Path(cache.cache_dir, f"{key}.json"), (mtime, mtime))
+    assert cache.get("first") is not None
+
+    cache.put("third", source, LEGEND, "SimpleStyle")
+
+    assert cache.get("second") is None
+    assert cache.get("first") is not None
+    assert cache.get("third") is not None
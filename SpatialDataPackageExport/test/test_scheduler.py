@@ -0,0 +1,102 @@
+#  Gispo Ltd., hereby disclaims all copyright interest in the program
+#  SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+#
+from ..core.processing.scheduler import JobScheduler, ScheduledJob
+
+
+def create_jobs(started, specs):
+    return [
+        ScheduledJob(
+            key,
+            lambda key=key: started.append(key),
+            cost=cost,
+            memory=memory,
+            lane=lane,
+        )
+        for key, cost, memory, lane in specs
+    ]
+
+
+def test_scheduler_starts_costliest_jobs_first():
+    started = []
+    jobs = create_jobs(
+        started, [("a", 1, 0, None), ("b", 3, 0, None), ("c", 2, 0, None)]
+    )
+    scheduler = JobScheduler(jobs, max_parallel=2)
+    scheduler.start()
+    assert started == ["b", "c"]
+
+    scheduler.job_finished("c")
+    assert started == ["b", "c", "a"]
+    scheduler.job_finished("b")
+    scheduler.job_finished("a")
+    assert scheduler.finished
+
+
+def test_scheduler_runs_jobs_in_same_lane_sequentially():
+    started = []
+    jobs = create_jobs(
+        started,
+        [("a", 3, 0, "file.gpkg"), ("b", 2, 0, "file.gpkg"), ("c", 1, 0, None)],
+    )
+    scheduler = JobScheduler(jobs, max_parallel=4)
+    scheduler.start()
+    assert started == ["a", "c"]
+
+    scheduler.job_finished("a")
+    assert started == ["a", "c", "b"]
+
+
+def test_scheduler_respects_memory_limit():
+    started = []
+    jobs = create_jobs(
+        started, [("a", 3, 80, None), ("b", 2, 50, None), ("c", 1, 10, None)]
+    )
+    scheduler = JobScheduler(jobs, max_parallel=4, memory_limit=100)
+    scheduler.start()
+    assert started == ["a", "c"]
+
+    scheduler.job_finished("a")
+    assert started == ["a", "c", "b"]
+
+
+def test_scheduler_starts_job_over_memory_limit_alone():
+    started = []
+    jobs = create_jobs(started, [("a", 1, 500, None), ("b", 1, 500, None)])
+    scheduler = JobScheduler(jobs, max_parallel=4, memory_limit=100)
+    scheduler.start()
+    assert started == ["a"]
+    scheduler.job_finished("a")
+    assert started == ["a", "b"]
+
+
+def test_scheduler_with_synchronously_finishing_jobs():
+    started = []
+    scheduler = None
+
+    def start(key):
+        started.append(key)
+        scheduler.job_finished(key)
+
+    jobs = [ScheduledJob(key, lambda key=key: start(key)) for key in "abc"]
+    scheduler = JobScheduler(jobs, max_parallel=1)
+    scheduler.start()
+    assert started == ["a", "b", "c"]
+    assert scheduler.finished
@@ -0,0 +1,102 @@
+# type: ignore
+# flake8: noqa ANN201, ANN001
+
+#  Gispo Ltd., hereby disclaims all copyright interest in the program SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+from pathlib import Path
+
+from qgis.core import QgsProcessingContext, QgsProcessingFeedback, QgsProject
+
+from ..cli import parse_args
+from ..core.processing.export_algorithm import ExportDataPackageAlg
+from ..core.processing.snapshot_export import SnapshotExporter, select_configs
+from ..core.utils import load_json
+from ..model.config import Config
+from ..qgis_plugin_tools.tools.resources import plugin_test_data_path
+
+
+def load_config(name):
+    return Config.from_dict(load_json(plugin_test_data_path("config", name)))
+
+
+def test_select_configs():
+    configs = {"a": Config(), "b": Config()}
+
+    assert select_configs(configs) == (configs, [])
+    assert select_configs(configs, ["b", "c"]) == ({"b": configs["b"]}, ["c"])
+
+
+def test_parse_args():
+    args = parse_args(["project.qgz", "out", "-s", "a", "-s", "b", "--jobs", "3"])
+
+    assert args.project == Path("project.qgz")
+    assert args.snapshot == ["a", "b"]
+    assert args.jobs == 3
+
+
+def test_export_snapshot(new_project, tmp_path, categorized_poly):
+    categorized_poly.setName("simple poly")
+    results = SnapshotExporter(QgsProject.instance(), tmp_path).export(
+        {"categorized": load_config("config_simple_poly.json")}
+    )
+
+    (result,) = results
+    assert result.successful, result.error
+    snapshot = load_json(str(Path(tmp_path, "categorized.json")))
+    assert snapshot["name"] == "categorized"
+    assert snapshot["resources"][0]["name"] == "simple poly"
+    assert snapshot["resources"][0]["data"]["features"]
+    timings = result.to_dict()
+    assert timings["layers"][0]["name"] == "simple poly"
+    assert timings["layers"][0]["seconds"] >= 0
+
+
+def test_export_snapshot_with_missing_layer(new_project, tmp_path):
+    results = SnapshotExporter(QgsProject.instance(), tmp_path).export(
+        {"missing": load_config("config_simple_poly.json")}
+    )
+
+    assert not results[0].successful
+    assert "simple poly" in results[0].error
+    assert not Path(tmp_path, "missing.json").exists()
+
+
+def test_export_data_package_alg(new_project, tmp_path, categorized_poly):
+    categorized_poly.setName("simple poly")
+    context = QgsProcessingContext()
+    context.setProject(QgsProject.instance())
+    output_file = Path(tmp_path, "categorized.json")
+    params = {
+        "LAYERS": [categorized_poly],
+        "CONFIG": plugin_test_data_path("config", "config_simple_poly.json"),
+        "NAME": "categorized",
+        "WORKERS": 2,
+        "OUTPUT": str(output_file),
+    }
+
+    results, successful = (
+        ExportDataPackageAlg().create().run(params, context, QgsProcessingFeedback())
+    )
+
+    assert successful
+    assert results["OUTPUT"] == str(output_file)
+    snapshot = load_json(str(output_file))
+    assert snapshot["name"] == "categorized"
+    assert [resource["name"] for resource in snapshot["resources"]][0] == "simple poly"
+    assert snapshot["views"][0]["spec"]["legend"]
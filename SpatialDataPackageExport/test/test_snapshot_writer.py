@@ -0,0 +1,120 @@
+#  Gispo Ltd., hereby disclaims all copyright interest in the program
+#  SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+
+# type: ignore
+import json
+from pathlib import Path
+
+import pytest
+
+from ..core.snapshot_writer import SnapshotWriter
+from ..model.snapshot import Snapshot
+from .utils import get_test_json
+
+RESOURCE = "point-sample-snapshot"
+
+
+@pytest.fixture
+def snapshot_with_data():
+    snapshot_data = get_test_json("snapshots", "with_non_ascii_chars.json")
+    return Snapshot.from_dict(snapshot_data)
+
+
+def test_snapshot_writer_with_inline_data(tmp_path, snapshot_with_data):
+    output_file = Path(tmp_path, "snapshot.json")
+    SnapshotWriter(snapshot_with_data, {}).write(output_file)
+
+    assert output_file.read_text(encoding="utf-8") == json.dumps(
+        snapshot_with_data.to_dict(), ensure_ascii=False
+    )
+
+
+@pytest.mark.parametrize("source_type", ("dict", "file", "generator"))
+def test_snapshot_writer_with_data_sources(tmp_path, snapshot_with_data, source_type):
+    expected = snapshot_with_data.to_dict()
+    resource = next(r for r in snapshot_with_data.resources if r.name == RESOURCE)
+    data = resource.data
+    resource.data = None
+
+    if source_type == "dict":
+        source = data
+    elif source_type == "file":
+        source = Path(tmp_path, f"{RESOURCE}.geojson")
+        source.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    else:
+        text = json.dumps(data)
+        source = (text[i : i + 10] for i in range(0, len(text), 10))
+
+    output_file = Path(tmp_path, "snapshot.json")
+    SnapshotWriter(snapshot_with_data, {RESOURCE: source}).write(output_file)
+
+    with open(output_file, encoding="utf-8") as f:
+        written = json.load(f)
+    assert written == expected
+    assert list(written["resources"][0].keys()) == list(expected["resources"][0].keys())
+
+
+def test_snapshot_writer_copies_file_bytes(tmp_path, snapshot_with_data):
+    expected = snapshot_with_data.to_dict()
+    resource = next(r for r in snapshot_with_data.resources if r.name == RESOURCE)
+    text = json.dumps(resource.data, ensure_ascii=False, indent=2)
+    resource.data = None
+    source = Path(tmp_path, f"{RESOURCE}.geojson")
+    source.write_bytes(b"\xef\xbb\xbf" + text.encode("utf-8") + b"\n")
+
+    output_file = Path(tmp_path, "snapshot.json")
+    writer = SnapshotWriter(snapshot_with_data, {RESOURCE: source})
+    writer.CHUNK_SIZE = 100
+    writer.write(output_file)
+
+    assert text.encode("utf-8") in output_file.read_bytes()
+    with open(output_file, encoding="utf-8") as f:
+        assert json.load(f) == expected
+
+
+@pytest.mark.parametrize("content", ("", "  \n", "[1, 2]", '{"features": []}'))
+def test_snapshot_writer_rejects_invalid_file(tmp_path, snapshot_with_data, content):
+    source = Path(tmp_path, f"{RESOURCE}.geojson")
+    source.write_text(content, encoding="utf-8")
+
+    output_file = Path(tmp_path, "snapshot.json")
+    output_file.write_text("previous", encoding="utf-8")
+
+    writer = SnapshotWriter(snapshot_with_data, {RESOURCE: source})
+    with pytest.raises(ValueError):
+        writer.write(output_file)
+    assert output_file.read_text(encoding="utf-8") == "previous"
+    assert sorted(tmp_path.iterdir()) == sorted([source, output_file])
+
+
+class CanceledFeedback:
+    def isCanceled(self):  # noqa: N802
+        return True
+
+    def setProgress(self, progress):  # noqa: N802
+        pass
+
+
+def test_snapshot_writer_canceled(tmp_path, snapshot_with_data):
+    output_file = Path(tmp_path, "snapshot.json")
+    writer = SnapshotWriter(snapshot_with_data, {})
+    assert not writer.write(output_file, CanceledFeedback())
+    assert not output_file.exists()
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,93 @@
+# type: ignore
+# flake8: noqa ANN201, ANN001
+
+#  Gispo Ltd., hereby disclaims all copyright interest in the program SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+from qgis.core import QgsFeedback, QgsVectorLayer
+
+from ..core.spatial_index_cache import SpatialIndexCache
+from .conftest import get_layer
+
+
+@pytest.fixture
+def gpkg_copy(tmp_path, test_gpkg):
+    path = Path(tmp_path, "data.gpkg")
+    shutil.copyfile(test_gpkg, path)
+    return path
+
+
+@pytest.fixture
+def layers(gpkg_copy):
+    return [
+        get_layer(name, gpkg_copy)
+        for name in ("simple_poly", "points_with_radius", "simple_lines")
+    ]
+
+
+def test_index_is_reused_for_the_same_stamp(layers):
+    cache = SpatialIndexCache()
+    index = cache.get(layers[0])
+
+    assert cache.get(layers[0]) is index
+    assert index.intersects(layers[0].extent())
+
+
+def test_index_is_rebuilt_when_the_file_changes(gpkg_copy, layers):
+    cache = SpatialIndexCache()
+    index = cache.get(layers[0])
+
+    stat = os.stat(gpkg_copy)
+    os.utime(gpkg_copy, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+
+    assert cache.get(layers[0]) is not index
+
+
+def test_least_recently_used_index_is_evicted(layers):
+    cache = SpatialIndexCache(max_size=2)
+    first, second, third = layers
+    index = cache.get(first)
+    cache.get(second)
+    cache.get(first)
+
+    cache.get(third)
+
+    assert list(cache._indices) == [first.id(), third.id()]
+    assert cache.get(first) is index
+
+
+def test_canceled_index_is_not_stored(layers):
+    cache = SpatialIndexCache()
+    feedback = QgsFeedback()
+    feedback.cancel()
+
+    cache.get(layers[0], feedback)
+
+    assert layers[0].id() not in cache._indices
+
+
+def test_layers_without_a_file_are_not_cached(layers):
+    cache = SpatialIndexCache()
+    layer = QgsVectorLayer("Point", "memory", "memory")
+
+    cache.get(layer)
+
+    assert cache._indices == {}
@@ -17,15 +17,20 @@
 #  You should have received a copy of the GNU General Public License
 #  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
 
+from pathlib import Path
+
 import pytest
 from qgis.core import (
     QgsExpression,
     QgsFields,
     QgsProcessingFeedback,
+    QgsProject,
     QgsVectorDataProvider,
     QgsVectorLayer,
 )
 
+from ..core.geojson_writer import GeoJsonWriter
+from ..core.layer_snapshot import LayerSnapshot
 from ..core.styles2attributes import StylesToAttributes
 from ..definitions.style import PointStyle, SimpleStyle, Style
 from ..definitions.symbols import SymbolType
@@ -142,6 +147,167 @@ def test_rule_based_points_with_no_fill_and_no_stroke(
     common_asserts(converter, expected_legend, expected_symbols, layer_empty_points)
 
 
+def test_rule_based_points_with_rule_pushdown(
+    new_project, points_with_no_fill_and_no_stroke_rule_based, layer_empty_points
+):
+    src_layer = points_with_no_fill_and_no_stroke_rule_based
+    feedback = LoggerProcessingFeedBack()
+    converter = StylesToAttributes(
+        src_layer, src_layer.name(), feedback, rule_pushdown=True
+    )
+    update_fields(converter, layer_empty_points)
+    layer_empty_points.startEditing()
+    converter.extract_styles_to_layer(layer_empty_points)
+    assert layer_empty_points.commitChanges()
+    assert not feedback.isCanceled(), feedback.last_report_error
+    assert converter._supports_rule_pushdown()
+
+    sequential_layer = QgsVectorLayer("Point", "test_point", "memory")
+    sequential_layer.setCrs(src_layer.crs())
+    sequential_converter = simple_asserts(
+        src_layer, sequential_layer, SymbolType.RuleRenderer
+    )
+
+    assert converter.get_symbols() == sequential_converter.get_symbols()
+    assert sorted(
+        str(f.attributes()) for f in layer_empty_points.getFeatures()
+    ) == sorted(str(f.attributes()) for f in sequential_layer.getFeatures())
+
+
+def test_simple_poly_clipped_to_extent(
+    new_project, layer_simple_poly, layer_empty_poly
+):
+    extent = layer_simple_poly.extent()
+    extent.setXMaximum(extent.center().x())
+    feedback = LoggerProcessingFeedBack()
+    converter = StylesToAttributes(
+        layer_simple_poly, layer_simple_poly.name(), feedback, clip=True
+    )
+    update_fields(converter, layer_empty_poly)
+    layer_empty_poly.startEditing()
+    converter.extract_styles_to_layer(layer_empty_poly, extent)
+    assert layer_empty_poly.commitChanges()
+    assert not feedback.isCanceled(), feedback.last_report_error
+
+    assert layer_empty_poly.featureCount() > 0
+    for f in layer_empty_poly.getFeatures():
+        assert extent.buffered(1e-9).contains(f.geometry().boundingBox())
+
+
+@pytest.mark.parametrize("clip", (False, True))
+def test_cropped_export_with_and_without_native_spatial_index(
+    new_project, categorized_poly, monkeypatch, clip
+):
+    extent = categorized_poly.extent()
+    extent.setXMaximum(extent.center().x())
+
+    exported = []
+    for native_index in (True, False):
+        monkeypatch.setattr(
+            StylesToAttributes, "_has_native_spatial_index", lambda _: native_index
+        )
+        layer = QgsVectorLayer("Polygon", "test_poly", "memory")
+        layer.setCrs(categorized_poly.crs())
+        feedback = LoggerProcessingFeedBack()
+        converter = StylesToAttributes(
+            categorized_poly, categorized_poly.name(), feedback, clip=clip
+        )
+        update_fields(converter, layer)
+        layer.startEditing()
+        converter.extract_styles_to_layer(layer, extent)
+        assert layer.commitChanges()
+        assert not feedback.isCanceled(), feedback.last_report_error
+        exported.append(
+            sorted(
+                (str(f.attributes()), f.geometry().asWkt(6))
+                for f in layer.getFeatures()
+            )
+        )
+
+    assert exported[0]
+    assert exported[0] == exported[1]
+
+
+def test_simple_poly_in_small_batches(new_project, layer_simple_poly, layer_empty_poly):
+    feedback = LoggerProcessingFeedBack()
+    converter = StylesToAttributes(
+        layer_simple_poly, layer_simple_poly.name(), feedback, batch_size=2
+    )
+    update_fields(converter, layer_empty_poly)
+    layer_empty_poly.startEditing()
+    converter.extract_styles_to_layer(layer_empty_poly)
+    assert layer_empty_poly.commitChanges()
+    assert not feedback.isCanceled(), feedback.last_report_error
+    assert not converter._batch
+
+    unbatched_layer = QgsVectorLayer("Polygon", "test_poly", "memory")
+    unbatched_layer.setCrs(layer_simple_poly.crs())
+    simple_asserts(layer_simple_poly, unbatched_layer)
+    assert [str(f.attributes()) for f in layer_empty_poly.getFeatures()] == [
+        str(f.attributes()) for f in unbatched_layer.getFeatures()
+    ]
+
+
+def test_categorized_poly_from_layer_snapshot(
+    new_project, categorized_poly, layer_empty_poly
+):
+    feedback = LoggerProcessingFeedBack()
+    converter = StylesToAttributes(
+        LayerSnapshot(categorized_poly), categorized_poly.name(), feedback
+    )
+    update_fields(converter, layer_empty_poly)
+    layer_empty_poly.startEditing()
+    converter.extract_styles_to_layer(layer_empty_poly)
+    assert layer_empty_poly.commitChanges()
+    assert not feedback.isCanceled(), feedback.last_report_error
+
+    direct_layer = QgsVectorLayer("Polygon", "test_poly", "memory")
+    direct_layer.setCrs(categorized_poly.crs())
+    direct_converter = simple_asserts(
+        categorized_poly, direct_layer, SymbolType.categorizedSymbol
+    )
+    assert converter.get_symbols() == direct_converter.get_symbols()
+    assert converter.get_legend() == direct_converter.get_legend()
+    assert [str(f.attributes()) for f in layer_empty_poly.getFeatures()] == [
+        str(f.attributes()) for f in direct_layer.getFeatures()
+    ]
+
+
+@pytest.mark.parametrize("clip", (False, True))
+def test_points_with_radius_in_parallel_chunks(
+    new_project, tmp_path, points_with_radius, monkeypatch, clip
+):
+    monkeypatch.setattr(StylesToAttributes, "MIN_CHUNK_SIZE", 1)
+    extent = points_with_radius.extent()
+    extent.setXMaximum(extent.center().x())
+
+    outputs = []
+    for workers in (1, 3):
+        feedback = LoggerProcessingFeedBack()
+        converter = StylesToAttributes(
+            LayerSnapshot(points_with_radius, workers=workers),
+            points_with_radius.name(),
+            feedback,
+            clip=clip,
+            workers=workers,
+        )
+        output_file = Path(tmp_path, f"workers_{workers}.geojson")
+        with GeoJsonWriter(
+            output_file,
+            converter.fields,
+            points_with_radius.crs(),
+            QgsProject.instance().transformContext(),
+        ) as writer:
+            converter.extract_styles_to_layer(writer, extent)
+        assert not feedback.isCanceled(), feedback.last_report_error
+        outputs.append((output_file.read_bytes(), converter))
+
+    (sequential, sequential_converter), (parallel, parallel_converter) = outputs
+    assert parallel == sequential
+    assert parallel_converter.get_symbols() == sequential_converter.get_symbols()
+    assert parallel_converter.get_legend() == sequential_converter.get_legend()
+
+
 def simple_asserts(
     src_layer, dst_layer, symbol=SymbolType.singleSymbol, legend_shape=None
 ):
@@ -0,0 +1,176 @@
+#  Gispo Ltd., hereby disclaims all copyright interest in the program
+#  SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+#
+import os
+import random
+import timeit
+
+import pytest
+
+from ..core.symbol_index import NO_MATCH, CategoryIndex, GraduatedRangeIndex
+
+
+def linear_scan(ranges, value):
+    for index, (lower, upper) in enumerate(ranges):
+        if lower <= value < upper:
+            return index
+    return None
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    (
+        (-1.0, None),
+        (0.0, 0),
+        (9.99, 0),
+        (10.0, 1),
+        (19.0, 1),
+        (20.0, 1),
+        (20.1, None),
+    ),
+)
+def test_range_index_contiguous_ranges(value, expected):
+    index = GraduatedRangeIndex([(0.0, 10.0), (10.0, 20.0)])
+    assert index.lookup(value) == expected
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    ((5.0, 0), (10.0, None), (14.9, None), (15.0, 1), (30.0, 1)),
+)
+def test_range_index_with_gaps(value, expected):
+    index = GraduatedRangeIndex([(0.0, 10.0), (15.0, 30.0)])
+    assert index.lookup(value) == expected
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    ((2.0, 0), (5.0, 0), (9.0, 0), (10.0, 1), (12.0, 1), (15.0, 1), (0.0, 2)),
+)
+def test_range_index_with_overlapping_ranges(value, expected):
+    # First matching range in symbol order wins
+    index = GraduatedRangeIndex([(1.0, 10.0), (5.0, 15.0), (0.0, 12.0)])
+    assert index.lookup(value) == expected
+
+
+def test_range_index_empty():
+    assert GraduatedRangeIndex([]).lookup(1.0) is None
+
+
+def test_range_index_matches_linear_scan():
+    rng = random.Random(0)
+    bounds = sorted(rng.uniform(0, 1000) for _ in range(51))
+    ranges = list(zip(bounds[:-1], bounds[1:]))
+    index = GraduatedRangeIndex(ranges)
+    for value in (rng.uniform(-10, 1010) for _ in range(1000)):
+        if value != bounds[-1]:
+            assert index.lookup(value) == linear_scan(ranges, value)
+
+
+@pytest.mark.skipif(
+    not os.environ.get("RUN_BENCHMARKS"),
+    reason="Benchmark, run with RUN_BENCHMARKS=1 and -s to see the timings",
+)
+def test_range_index_benchmark():
+    rng = random.Random(0)
+    bounds = [float(i) for i in range(51)]
+    ranges = list(zip(bounds[:-1], bounds[1:]))
+    index = GraduatedRangeIndex(ranges)
+    values = [rng.uniform(0, 50) for _ in range(10000)]
+
+    scan_time = timeit.timeit(
+        lambda: [linear_scan(ranges, value) for value in values], number=5
+    )
+    index_time = timeit.timeit(
+        lambda: [index.lookup(value) for value in values], number=5
+    )
+    # Only reported, timings are too noisy to assert on
+    print(f"Linear scan: {scan_time:.4f}s, range index: {index_time:.4f}s")
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    (
+        ("one", 0),
+        (2, 1),
+        (2.0, 1),
+        ("2", 1),
+        (3, 2),
+        ("3", 2),
+        (3.5, 3),
+        ("3.5", 3),
+        ("missing", None),
+        (None, None),
+    ),
+)
+def test_category_index(value, expected):
+    index = CategoryIndex(["one", 2, "3", 3.5])
+    assert index.lookup(value) == expected
+
+
+@pytest.mark.parametrize(
+    "catch_all_value",
+    ("", None),
+)
+def test_category_index_with_catch_all_category(catch_all_value):
+    index = CategoryIndex(["one", catch_all_value, "two"])
+    assert index.lookup("two") == 2
+    assert index.lookup("three") == 1
+    assert index.lookup(None) == 1
+
+
+def test_category_index_with_multiple_values_per_category():
+    index = CategoryIndex([["a", "b"], "c", "a"])
+    assert index.lookup("a") == 0
+    assert index.lookup("b") == 0
+    assert index.lookup("c") == 1
+
+
+def test_category_index_keeps_string_comparison_for_other_types():
+    index = CategoryIndex([True, "01"])
+    assert index.lookup(True) == 0
+    assert index.lookup(1) is None
+    assert index.lookup("01") == 1
+
+
+def test_range_index_lookup_array():
+    np = pytest.importorskip("numpy")
+    ranges = [(1.0, 10.0), (5.0, 15.0), (0.0, 12.0), (20.0, 30.0)]
+    index = GraduatedRangeIndex(ranges)
+    values = [-1.0, 0.0, 2.0, 10.0, 12.0, 15.0, 17.0, 20.0, 30.0, 31.0, np.nan]
+    expected = [index.lookup(value) for value in values]
+    result = index.lookup_array(np.array(values, dtype=float))
+    assert [None if i == NO_MATCH else i for i in result.tolist()] == expected
+
+
+@pytest.mark.parametrize(
+    "values",
+    (
+        [1, 2.0, 3, 4, 2, None],
+        ["a", "b", "c", "a", None],
+        ["a", 2, True, None, "3"],
+    ),
+)
+def test_category_index_lookup_array(values):
+    pytest.importorskip("numpy")
+    index = CategoryIndex(["a", 2, "3", None, True])
+    expected = [index.lookup(value) for value in values]
+    result = index.lookup_array(values)
+    assert [None if i == NO_MATCH else i for i in result.tolist()] == expected
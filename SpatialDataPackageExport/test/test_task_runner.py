@@ -0,0 +1,130 @@
+# type: ignore
+# flake8: noqa ANN201, ANN001
+
+#  Gispo Ltd., hereby disclaims all copyright interest in the program SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+import pytest
+from qgis.core import (
+    QgsApplication,
+    QgsFeatureRequest,
+    QgsField,
+    QgsProcessingContext,
+    QgsProcessingFeedback,
+    QgsVectorLayer,
+)
+from qgis.PyQt.QtCore import QCoreApplication, QVariant
+
+from ..core.processing.provider import SpatialDataPackageProcessingProvider
+from ..core.processing.task_runner import TaskWrapper, layer_fingerprint, start_exports
+from ..core.utils import load_json
+from ..definitions.configurable_settings import ExportModeOptions, Settings
+from .conftest import get_layer
+
+
+def test_fingerprint_changes_with_the_file(tmp_path, test_gpkg):
+    path = Path(tmp_path, "data.gpkg")
+    shutil.copyfile(test_gpkg, path)
+    layer = get_layer("simple_poly", path)
+    key = layer_fingerprint(layer, None, {})
+
+    assert key is not None
+    assert layer_fingerprint(layer, None, {}) == key
+
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    assert layer_fingerprint(layer, None, {}) != key
+
+
+def test_fingerprint_changes_with_expression_fields(layer_simple_poly):
+    key = layer_fingerprint(layer_simple_poly, None, {})
+
+    layer_simple_poly.addExpressionField("1 + 1", QgsField("two", QVariant.Int))
+
+    assert layer_fingerprint(layer_simple_poly, None, {}) != key
+
+
+def test_layers_without_a_file_are_not_fingerprinted():
+    layer = QgsVectorLayer("Point?field=class:string", "points", "memory")
+    assert layer.renderer() is not None
+
+    assert layer_fingerprint(layer, None, {}) is None
+    # Without the data, the style and the options are fingerprinted
+    assert layer_fingerprint(layer, None, {}, include_data=False) is not None
+
+
+@pytest.fixture
+def processing_provider():
+    provider = SpatialDataPackageProcessingProvider()
+    QgsApplication.processingRegistry().addProvider(provider)
+    yield provider
+    QgsApplication.processingRegistry().removeProvider(provider)
+
+
+@pytest.fixture
+def export_in_processes():
+    export_mode = Settings.export_mode.get()
+    Settings.export_mode.set(ExportModeOptions.processes.value)
+    yield
+    Settings.export_mode.set(export_mode)
+
+
+def test_memory_layer_is_exported_in_process(
+    new_project, tmp_path, points_with_radius, processing_provider, export_in_processes
+):
+    memory_layer = points_with_radius.materialize(QgsFeatureRequest())
+    memory_layer.setRenderer(points_with_radius.renderer().clone())
+    results = {}
+
+    def executed(layer, context, id, successful, outputs):
+        results[id] = (successful, outputs)
+
+    task_wrappers = [
+        TaskWrapper(
+            id=uuid.uuid4(),
+            layer=layer,
+            name=layer.name(),
+            extent=None,
+            primary=False,
+            legend_shape="automatic",
+            output=None,
+            feedback=QgsProcessingFeedback(),
+            context=QgsProcessingContext(),
+            executed=executed,
+            geojson_output=str(Path(tmp_path, f"{i}.geojson")),
+        )
+        for i, layer in enumerate((points_with_radius, memory_layer))
+    ]
+
+    process_task = start_exports(task_wrappers, completed=lambda: None)
+
+    assert process_task is not None
+    assert process_task.task_wrappers == task_wrappers[:1]
+    deadline = time.time() + 60
+    while len(results) < len(task_wrappers) and time.time() < deadline:
+        QCoreApplication.processEvents()
+        time.sleep(0.01)
+    for task_wrapper in task_wrappers:
+        successful, outputs = results[task_wrapper.id]
+        assert successful
+        data = load_json(outputs["OUTPUT_GEOJSON"])
+        assert len(data["features"]) == points_with_radius.featureCount()
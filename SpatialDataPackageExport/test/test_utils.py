@@ -16,6 +16,8 @@
 #
 #  You should have received a copy of the GNU General Public License
 #  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+import os
+
 import pytest
 from qgis.core import (
     QgsCoordinateReferenceSystem,
@@ -24,7 +26,11 @@ from qgis.core import (
     QgsRectangle,
 )
 
-from ..core.utils import datapackage_bounds_to_extent, extent_to_datapackage_bounds
+from ..core.utils import (
+    datapackage_bounds_to_extent,
+    extent_to_datapackage_bounds,
+    file_versions,
+)
 
 
 @pytest.fixture
@@ -69,3 +75,20 @@ def test_transformations(extent):
     transform = QgsCoordinateTransform(extent_crs, source_crs, QgsProject.instance())
     extent_transformed = transform.transformBoundingBox(extent)
     assert not extent_transformed == extent
+
+
+def test_file_versions_include_shapefile_siblings(tmp_path):
+    for name in ("points.shp", "points.dbf", "points.shx", "other.dbf"):
+        (tmp_path / name).write_bytes(b"data")
+    path = str(tmp_path / "points.shp")
+
+    versions = file_versions(path)
+    assert [name for name, _, _ in versions] == [
+        "points.shp",
+        "points.dbf",
+        "points.shx",
+    ]
+
+    (tmp_path / "points.dbf").write_bytes(b"edited data")
+    os.utime(tmp_path / "points.dbf", ns=(0, 0))
+    assert file_versions(path) != versions
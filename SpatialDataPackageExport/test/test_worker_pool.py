@@ -0,0 +1,84 @@
+# type: ignore
+# flake8: noqa ANN201, ANN001
+
+#  Gispo Ltd., hereby disclaims all copyright interest in the program SpatialDataPackageExport
+#  Copyright (C) 2020 Gispo Ltd (https://www.gispo.fi/).
+#
+#
+#  This file is part of SpatialDataPackageExport.
+#
+#  SpatialDataPackageExport is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SpatialDataPackageExport is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
+import json
+from pathlib import Path
+
+import pytest
+from qgis.core import QgsFeatureRequest
+
+from ..core.processing import worker_pool
+from ..core.processing.worker_pool import LayerJob, WorkerPool, is_readable_by_uri
+
+
+def layer_job(layer, output_file):
+    return LayerJob.from_layer(
+        layer.name(),
+        layer,
+        {"NAME": layer.name(), "OUTPUT_GEOJSON": str(output_file)},
+    )
+
+
+def test_run_in_process(new_project, tmp_path, points_with_radius):
+    output_file = Path(tmp_path, "points.geojson")
+    results = WorkerPool(1).run([layer_job(points_with_radius, output_file)])
+
+    assert len(results) == 1
+    assert results[0].successful, results[0].error
+    assert results[0].results["OUTPUT_STYLE_TYPE"] == "PointStyle"
+    assert len(results[0].results["OUTPUT_LEGEND"]) > 0
+    data = json.loads(output_file.read_text(encoding="utf-8"))
+    assert len(data["features"]) == points_with_radius.featureCount()
+
+
+def test_fallback_to_in_process(
+    new_project, tmp_path, points_with_radius, categorized_poly, monkeypatch
+):
+    monkeypatch.setattr(worker_pool, "python_executable", lambda: None)
+    layers = (points_with_radius, categorized_poly)
+    jobs = [
+        layer_job(layer, Path(tmp_path, f"{layer.name()}.geojson")) for layer in layers
+    ]
+    results = WorkerPool(2).run(jobs)
+
+    assert [result.key for result in results] == [job.key for job in jobs]
+    assert all(result.successful for result in results)
+
+
+def test_invalid_layer(new_project, tmp_path):
+    job = LayerJob("invalid", "invalid", "/does/not/exist.gpkg", "ogr", "", {})
+    (result,) = WorkerPool(1).run([job])
+
+    assert not result.successful
+    assert "Invalid layer" in result.error
+
+
+def test_layers_not_readable_by_uri(new_project, tmp_path, points_with_radius):
+    assert is_readable_by_uri(points_with_radius)
+    memory_layer = points_with_radius.materialize(QgsFeatureRequest())
+    points_with_radius.startEditing()
+    points_with_radius.deleteFeature(next(iter(points_with_radius.allFeatureIds())))
+
+    for layer in (memory_layer, points_with_radius):
+        assert not is_readable_by_uri(layer)
+        with pytest.raises(ValueError):
+            layer_job(layer, Path(tmp_path, "points.geojson"))
+    points_with_radius.rollBack()
@@ -19,13 +19,13 @@
 #  along with SpatialDataPackageExport.  If not, see <https://www.gnu.org/licenses/>.
 
 # Have to do absolute import in order to modify module variables
-import json
 import logging
-import os
+import shutil
 import tempfile
 import uuid
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, Optional, Set, Tuple
 
 from qgis.core import (
     QgsApplication,
@@ -48,10 +48,29 @@ from qgis.PyQt.QtWidgets import (
 )
 from qgis.utils import iface
 
+from ..core.change_tracker import ChangeTracker
 from ..core.datapackage import DataPackageHandler
-from ..core.processing.task_runner import TaskWrapper, create_styles_to_attributes_tasks
-from ..core.utils import datapackage_bounds_to_extent, extent_to_datapackage_bounds
-from ..definitions.configurable_settings import LayerFormatOptions, Settings
+from ..core.geoparquet_writer import is_available as geoparquet_available
+from ..core.processing.snapshot_task import OutputLayer, SnapshotTask
+from ..core.processing.task_runner import (
+    ProcessPoolExportTask,
+    TaskWrapper,
+    apply_resource_cache,
+    create_resource_cache,
+    start_exports,
+)
+from ..core.utils import (
+    datapackage_bounds_to_extent,
+    extent_to_datapackage_bounds,
+    unique_file_name,
+)
+from ..definitions.configurable_settings import (
+    ExportModeOptions,
+    LayerFormatOptions,
+    ResourceFormatOptions,
+    RuleFilterOptions,
+    Settings,
+)
 from ..model.config import Config, SnapshotConfig, SnapshotResource
 from ..model.snapshot import Contributor, Legend, License, Source
 from ..model.styled_layer import StyledLayer
@@ -97,6 +116,10 @@ class ExporterDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
         self.layer_rows: Dict = {}
         self.source_rows: Dict = {}
         self.contributor_rows: Dict = {}
+        self.tmp_dir: Optional[str] = None
+        self.snapshot_task: Optional[SnapshotTask] = None
+        self.process_task: Optional[ProcessPoolExportTask] = None
+        self.change_tracker = ChangeTracker()
         # TODO: add items here
         self.responsive_items = (
             self.btn_export,
@@ -108,6 +131,9 @@ class ExporterDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
             self.btn_settings,
         )
 
+        # noinspection PyUnresolvedReferences
+        self.cb_crop_layers.toggled.connect(self.cb_clip_layers.setEnabled)
+
         self.__set_initial_values()
 
     # noinspection PyUnresolvedReferences,PyCallByClass
@@ -210,6 +236,7 @@ class ExporterDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
 
         snapshot_config.bounds_precision = self.sb_extent_precision.value()
         snapshot_config.crop_layers = self.cb_crop_layers.isChecked()
+        snapshot_config.clip_layers = self.cb_clip_layers.isChecked()
         snapshot_config.licenses = [
             License.from_setting(
                 self.cb_license.currentText(),
@@ -241,6 +268,9 @@ class ExporterDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
 
         self.cb_crop_layers: QCheckBox
         self.cb_crop_layers.setChecked(snapshot_conf.crop_layers)
+        self.cb_clip_layers: QCheckBox
+        self.cb_clip_layers.setChecked(bool(snapshot_conf.clip_layers))
+        self.cb_clip_layers.setEnabled(self.cb_crop_layers.isChecked())
 
         if snapshot_conf.licenses:
             self.cb_license.setCurrentText(snapshot_conf.licenses[0].title)
@@ -306,7 +336,15 @@ class ExporterDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
             )
             return
 
+        self.__remove_tmp_dir()
+        self.tmp_dir = tempfile.mkdtemp(dir=resources_path())
+        layer_format = Settings.layer_format.get()
+        resource_format = Settings.resource_format.get()
+        in_processes = Settings.export_mode.get() == ExportModeOptions.processes.value
+
         task_wrappers = []
+        # Layer names may repeat or contain characters not allowed in file names
+        file_names: Set[str] = set()
         for id, row in self.layer_rows.items():
             cb: QgsMapLayerComboBox = row["layer"]
             layer_name = cb.currentText()
@@ -323,6 +361,25 @@ class ExporterDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
             is_primary = row["primary"].isChecked()
             legend_shape = row["legend_shape"].currentText()
             extent = self.extent if self.cb_crop_layers.isChecked() else None
+            geojson_dir = (
+                self.f_output.filePath()
+                if layer_format == LayerFormatOptions.geojson.value
+                else self.tmp_dir
+            )
+            file_name = unique_file_name(layer_name, file_names)
+            row["geojson_path"] = Path(geojson_dir, f"{file_name}.geojson")
+            row["flatgeobuf_path"] = (
+                Path(self.f_output.filePath(), f"{file_name}.fgb")
+                if layer_format == LayerFormatOptions.flatgeobuf.value
+                else None
+            )
+            row["geoparquet_path"] = (
+                Path(self.tmp_dir, f"{file_name}.parquet")
+                # Without pyarrow the GeoJSON file is converted with GDAL instead
+                if resource_format == ResourceFormatOptions.geoparquet.value
+                and geoparquet_available()
+                else None
+            )
 
             task_wrapper = TaskWrapper(
                 id=id,
@@ -331,10 +388,30 @@ class ExporterDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
                 extent=extent,
                 primary=is_primary,
                 legend_shape=legend_shape,
-                output=f"memory:{new_layer_name}",
+                output=(
+                    f"memory:{new_layer_name}"
+                    if layer_format == LayerFormatOptions.memory.value
+                    and not in_processes
+                    else None
+                ),
                 feedback=row["feedback"],
                 context=row["context"],
                 executed=self.__styles_to_attributes_finished,
+                bulk_classification=Settings.bulk_classification.get(),
+                rule_pushdown=(
+                    Settings.rule_filter.get() == RuleFilterOptions.provider.value
+                ),
+                clip=self.cb_clip_layers.isChecked(),
+                batch_size=Settings.export_batch_size.get(),
+                geojson_output=str(row["geojson_path"]),
+                flatgeobuf_output=(
+                    str(row["flatgeobuf_path"]) if row["flatgeobuf_path"] else None
+                ),
+                geoparquet_output=(
+                    str(row["geoparquet_path"]) if row["geoparquet_path"] else None
+                ),
+                thread_safe_source=Settings.parallel_exports.get() > 1,
+                workers=Settings.layer_workers.get(),
             )
             LOGGER.info(f"Exporting {layer_name}")
             task_wrappers.append(task_wrapper)
@@ -346,20 +423,52 @@ class ExporterDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
                 tr("No layers selected"),
                 extra=bar_msg(tr("Select at least one layer to create snapshot")),
             )
-        else:
-            create_styles_to_attributes_tasks(
-                task_wrappers, completed=lambda *args, **kwargs: self.__completed()
+            return
+
+        self.__disable_ui()
+        try:
+            resource_cache = create_resource_cache()
+            if resource_cache is not None:
+                # Layers found in the cache are reported as finished right away
+                task_wrappers = apply_resource_cache(
+                    task_wrappers, resource_cache, completed=self.__completed
+                )
+        except OSError as e:
+            LOGGER.exception(
+                tr("Reading the resource cache failed"),
+                extra=bar_msg(
+                    details=tr(f"Details: {e}. Check log file for more details")
+                ),
             )
-            self.__disable_ui()
+            self.__remove_tmp_dir()
+            self.__enable_ui()
+            return
+        # Layers exported before are patched with the features edited since then
+        self.process_task = start_exports(
+            task_wrappers, completed=self.__completed, tracker=self.change_tracker
+        )
 
     def __completed(self, *args: Any, **kwargs: Any) -> None:
         all_finished = all(map(lambda x: x["finished"], self.layer_rows.values()))
         if not all_finished:
             return
+        self.process_task = None
 
-        self.__enable_ui()
         LOGGER.info(tr("Finished exporting style to attributes"))
+        try:
+            self.__write_snapshot()
+        except Exception as e:
+            LOGGER.exception(
+                tr("Creating the snapshot failed"),
+                extra=bar_msg(
+                    details=tr(f"Details: {e}. Check log file for more details")
+                ),
+            )
+            self.snapshot_task = None
+            self.__remove_tmp_dir()
+            self.__enable_ui()
 
+    def __write_snapshot(self) -> None:
         output_path = Path(self.f_output.filePath())
 
         _, snapshot_config = self.__create_snapshot_config()
@@ -369,26 +478,46 @@ class ExporterDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
         license_title = self.cb_license.currentText()
         license_dict = Settings.licences.get().get(license_title)  # type: ignore
         license_ = License(license_dict["url"], license_dict["type"], license_title)
+        output_file = Path(output_path, f"{snapshot_name}.json")
         snapshot = self.data_pkg_handler.create_snapshot(
-            snapshot_name, snapshot_config, styled_layers, license_
+            snapshot_name,
+            snapshot_config,
+            styled_layers,
+            license_,
+            inline_data=False,
         )
 
-        output_file = Path(output_path, f"{snapshot_name}.json")
-
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(snapshot.to_dict(), f, ensure_ascii=False)
-
-        if Settings.layer_format.get() == LayerFormatOptions.none.value:
-            LOGGER.debug("Removing memory layers")
-            for row in self.layer_rows.values():
-                QgsProject.instance().removeMapLayer(row["styled_layer"].layer_id)
-
-        LOGGER.info(
-            tr("Snapshot succesfully exported"),
-            extra=bar_msg(
-                tr("Snapshot can be found in {}", str(output_file)), success=True
-            ),
+        self.snapshot_task = SnapshotTask(
+            output_file,
+            snapshot,
+            styled_layers,
+            [row["output_layer"] for row in self.layer_rows.values()],
+            completed=partial(self.__snapshot_written, output_file),
         )
+        QgsApplication.taskManager().addTask(self.snapshot_task)
+
+    def __snapshot_written(
+        self, output_file: Path, succesful: bool, exception: Optional[Exception]
+    ) -> None:
+        self.snapshot_task = None
+        self.__remove_tmp_dir()
+        self.__enable_ui()
+        if succesful:
+            LOGGER.info(
+                tr("Snapshot succesfully exported"),
+                extra=bar_msg(
+                    tr("Snapshot can be found in {}", str(output_file)), success=True
+                ),
+            )
+        elif exception is not None:
+            LOGGER.error(
+                tr("Writing the snapshot failed"),
+                extra=bar_msg(
+                    details=tr(f"Details: {exception}. Check log file for more details")
+                ),
+            )
+        else:
+            LOGGER.warning(tr("Writing the snapshot was canceled"))
 
     @log_if_fails
     def __styles_to_attributes_finished(
@@ -412,36 +541,33 @@ class ExporterDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
                 )
             )
 
-            output_layer: QgsVectorLayer = context.takeResultLayer(results["OUTPUT"])
-            if output_layer and output_layer.isValid():
-                QgsProject.instance().addMapLayer(output_layer)
-                styled_layer = StyledLayer(
-                    row["layer_name"], output_layer.id(), legends, style_type
-                )
-
-                if Settings.layer_format.get() == LayerFormatOptions.geojson.value:
-                    geojson_path = styled_layer.save_as_geojson(
-                        Path(self.f_output.filePath())
-                    )
-                    output_layer = QgsVectorLayer(
-                        str(geojson_path), output_layer.name()
-                    )
-                    QgsProject.instance().removeMapLayer(styled_layer.layer_id)
-                    QgsProject.instance().addMapLayer(output_layer)
-
-                    styled_layer.layer_id = output_layer.id()
-
-                with tempfile.TemporaryDirectory(dir=resources_path()) as tmpdirname:
-                    style_file = os.path.join(tmpdirname, "style.qml")
-                    msg, succeeded = input_layer.saveNamedStyle(style_file)
-                    if succeeded:
-                        output_layer.loadNamedStyle(style_file)
-                    else:
-                        LOGGER.error(tr("Could not load style"), extra=bar_msg(msg))
-
-                output_layer.setMetadata(input_layer.metadata())
-
-                row["styled_layer"] = styled_layer
+            geojson_path = Path(results["OUTPUT_GEOJSON"])
+            layer_format = Settings.layer_format.get()
+            output_layer = OutputLayer(input_layer, row["new_layer_name"])
+            if layer_format == LayerFormatOptions.memory.value:
+                if results.get("OUTPUT"):
+                    output_layer.layer = context.takeResultLayer(results["OUTPUT"])
+                else:
+                    # Exported in a worker process
+                    output_layer.path = geojson_path
+                    output_layer.materialize = True
+            elif layer_format == LayerFormatOptions.geojson.value:
+                output_layer.path = geojson_path
+            elif layer_format == LayerFormatOptions.flatgeobuf.value:
+                output_layer.path = row["flatgeobuf_path"]
+            row["output_layer"] = output_layer
+
+            # Output layers are added to the project only after the snapshot is
+            # written, the metadata is read from the input layer instead
+            row["styled_layer"] = StyledLayer(
+                row["layer_name"],
+                input_layer.id(),
+                legends,
+                style_type,
+                geojson_path=geojson_path,
+                flatgeobuf_path=row["flatgeobuf_path"],
+                geoparquet_path=row["geoparquet_path"],
+            )
 
             row["finished"] = True
         else:
@@ -455,6 +581,11 @@ class ExporterDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
             )
             self.__enable_ui()
 
+    def __remove_tmp_dir(self) -> None:
+        if self.tmp_dir is not None:
+            shutil.rmtree(self.tmp_dir, ignore_errors=True)
+            self.tmp_dir = None
+
     # noinspection PyUnresolvedReferences
     @log_if_fails
     def __add_layer_row(
@@ -21,7 +21,7 @@
 import logging
 from typing import Optional, Type
 
-from qgis.PyQt.QtWidgets import QDialog, QRadioButton, QWidget
+from qgis.PyQt.QtWidgets import QComboBox, QDialog, QRadioButton, QSpinBox, QWidget
 
 from ..definitions.configurable_settings import Settings
 from ..qgis_plugin_tools.tools.custom_logging import bar_msg
@@ -57,10 +57,33 @@ class SettingsDialog(QDialog, FORM_CLASS):
                 self.rb_layer_geojson.isChecked(), "geojson"
             )
         )
+        self.rb_layer_flatgeobuf.toggled.connect(
+            lambda: set_layer_format_setting(
+                self.rb_layer_flatgeobuf.isChecked(), "flatgeobuf"
+            )
+        )
         self.rb_layer_none.toggled.connect(
             lambda: set_layer_format_setting(self.rb_layer_none.isChecked(), "none")
         )
 
+        # Export options
+        for setting in (
+            Settings.resource_format,
+            Settings.export_mode,
+            Settings.rule_filter,
+        ):
+            cb: QComboBox = self.__get_widget(f"cb_{setting.name}")
+            if cb:
+                cb.currentTextChanged.connect(setting.set)
+        for setting in (
+            Settings.resource_cache_size,
+            Settings.incremental_max_features,
+            Settings.layer_workers,
+        ):
+            sb: QSpinBox = self.__get_widget(f"sb_{setting.name}")
+            if sb:
+                sb.valueChanged.connect(setting.set)
+
     @log_if_fails
     def __set_initial_values(self) -> None:
         LOGGER.debug("Initializing settings")
@@ -71,6 +94,25 @@ class SettingsDialog(QDialog, FORM_CLASS):
         if rb_button:
             rb_button.setChecked(True)
 
+        # Export options
+        for setting in (
+            Settings.resource_format,
+            Settings.export_mode,
+            Settings.rule_filter,
+        ):
+            cb: QComboBox = self.__get_widget(f"cb_{setting.name}")
+            if cb:
+                cb.addItems(setting.get_options())
+                cb.setCurrentText(setting.get())
+        for setting in (
+            Settings.resource_cache_size,
+            Settings.incremental_max_features,
+            Settings.layer_workers,
+        ):
+            sb: QSpinBox = self.__get_widget(f"sb_{setting.name}")
+            if sb:
+                sb.setValue(setting.get())
+
         # Template paths
         self.f_snapshot_template.setFilePath(Settings.snapshot_template.get())
         self.f_snapshot_template.fileChanged.connect(